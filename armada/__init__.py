@@ -1 +0,0 @@
-import pylibyaml  # noqa: F401  # patch pyyaml to use libyaml bindings
@@ -23,6 +23,7 @@ from oslo_utils import excutils
 import yaml
 
 from armada.handlers.helm import Helm
+from armada.utils import yaml as yaml_utils
 
 CONF = cfg.CONF
 
@@ -47,21 +48,21 @@ class BaseResource(object):
         resp.status = falcon.HTTP_200
 
     def req_yaml(self, req, default=None):
+        """Parses the documents of the YAML request body as they are
+        iterated, straight from the request stream, which raises YAMLError
+        while iterating if the body is invalid.
+        """
         if req.content_length is None or req.content_length == 0:
             return default
 
-        raw_body = req.stream.read(req.content_length or 0)
-
-        if raw_body is None:
-            return default
+        return self._load_yaml(req)
 
+    def _load_yaml(self, req):
         try:
-            return list(yaml.safe_load_all(raw_body.decode('utf-8')))
-        except yaml.YAMLError:
+            yield from yaml_utils.load_all(req.bounded_stream)
+        except yaml.YAMLError as e:
             with excutils.save_and_reraise_exception():
-                self.error(
-                    req.context,
-                    "Invalid YAML in request: \n%s" % raw_body.decode('utf-8'))
+                self.error(req.context, "Invalid YAML in request: %s" % e)
 
     def req_json(self, req):
         if req.content_length is None or req.content_length == 0:
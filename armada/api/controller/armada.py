@@ -15,15 +15,16 @@
 import json
 
 import falcon
-import yaml
 
 from armada import api
+from armada.api.jobs import JOBS
 from armada.common import policy
 from armada import exceptions
 from armada.handlers.armada import Armada
 from armada.handlers.document import ReferenceResolver
 from armada.handlers.lock import lock_and_thread, LockException
 from armada.handlers.override import Override
+from armada.utils import yaml as yaml_utils
 
 
 class Apply(api.BaseResource):
@@ -52,7 +53,7 @@ class Apply(api.BaseResource):
             data = ReferenceResolver.resolve_reference(doc_ref)
             documents = list()
             for d in data:
-                documents.extend(list(yaml.safe_load_all(d.decode())))
+                documents.extend(yaml_utils.load_all(d))
 
             if req_body.get('overrides', None):
                 overrides = Override(
@@ -67,9 +68,14 @@ class Apply(api.BaseResource):
                 falcon.HTTP_415,
                 message="Request must be in application/x-yaml"
                 "or application/json")
+        options = self._get_options(req)
+        if req.get_param_as_bool('async'):
+            return self._submit(req, resp, options, documents)
+
         try:
             with self.get_helm(req, resp) as helm:
-                msg = self.handle(req, documents, helm)
+                msg = self.handle(
+                    Armada(documents, helm=helm, **options), helm)
                 resp.text = json.dumps({
                     'message': msg,
                 })
@@ -86,16 +92,41 @@ class Apply(api.BaseResource):
             self.error(req.context, err_message)
             self.return_error(resp, falcon.HTTP_500, message=err_message)
 
-    @lock_and_thread()
-    def handle(self, req, documents, helm):
-        armada = Armada(
-            documents,
-            disable_update_pre=req.get_param_as_bool('disable_update_pre'),
-            disable_update_post=req.get_param_as_bool('disable_update_post'),
-            enable_chart_cleanup=req.get_param_as_bool('enable_chart_cleanup'),
-            force_wait=req.get_param_as_bool('wait'),
-            timeout=req.get_param_as_int('timeout'),
-            helm=helm,
-            target_manifest=req.get_param('target_manifest'))
+    def _get_options(self, req):
+        return {
+            'disable_update_pre': req.get_param_as_bool('disable_update_pre'),
+            'disable_update_post':
+            req.get_param_as_bool('disable_update_post'),
+            'enable_chart_cleanup':
+            req.get_param_as_bool('enable_chart_cleanup'),
+            'force_wait': req.get_param_as_bool('wait'),
+            'timeout': req.get_param_as_int('timeout'),
+            'target_manifest': req.get_param('target_manifest')
+        }
+
+    def _submit(self, req, resp, options, documents):
+        """Applies the manifest in the background, and responds with the
+        job tracking its progress.
+        """
+        def apply(job):
+            with self.get_helm(req, resp) as helm:
+                return self.handle(
+                    Armada(
+                        documents,
+                        helm=helm,
+                        progress=job.add_event,
+                        **options), helm)
+
+        job = JOBS.submit('apply', apply)
+        self.info(req.context, 'Submitted apply job {}'.format(job.id))
+        resp.text = json.dumps({'job': job.to_dict()})
+        resp.content_type = 'application/json'
+        resp.location = '/api/v1.0/jobs/{}'.format(job.id)
+        resp.status = falcon.HTTP_202
+
+    def _get_release_ids(self, armada, helm):
+        return armada.get_release_ids()
 
+    @lock_and_thread(release_ids=_get_release_ids)
+    def handle(self, armada, helm):
         return armada.sync()
@@ -0,0 +1,92 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import falcon
+from oslo_config import cfg
+
+from armada import api
+from armada.api.jobs import JOBS
+from armada.common import policy
+
+CONF = cfg.CONF
+
+# Time in seconds an events request waits for new events.
+EVENTS_TIMEOUT = 15
+# Time in milliseconds after which event stream clients reconnect.
+RECONNECT_DELAY = 1000
+
+
+class Job(api.BaseResource):
+    '''
+    Controller for looking up the status of a background job.
+    '''
+    @policy.enforce('armada:get_job')
+    def on_get(self, req, resp, job_id):
+        job = self._get_job(resp, job_id)
+        if job is None:
+            return
+        body = job.to_dict()
+        _, body['events'] = JOBS.get_events(
+            job, after=req.get_param_as_int('after') or 0)
+        resp.text = json.dumps({'job': body})
+        resp.content_type = 'application/json'
+        resp.status = falcon.HTTP_200
+
+    def _get_job(self, resp, job_id):
+        job = JOBS.get(job_id)
+        if job is None:
+            self.return_error(
+                resp,
+                falcon.HTTP_404,
+                message='Job {} not found'.format(job_id))
+        return job
+
+
+class JobEvents(Job):
+    '''
+    Controller serving the progress events of a background job as
+    server-sent events.
+
+    Each request waits only until there are new events, or up to
+    EVENTS_TIMEOUT seconds, so that no API worker is held for the whole job.
+    Event stream clients then reconnect and resume after the last event
+    they received, until the job has finished, which is answered with
+    204 No Content.
+    '''
+    @policy.enforce('armada:get_job')
+    def on_get(self, req, resp, job_id):
+        job = self._get_job(resp, job_id)
+        if job is None:
+            return
+        after = req.get_header('Last-Event-ID') or req.get_param('after')
+        try:
+            after = int(after or 0)
+        except ValueError:
+            after = 0
+        job, events = JOBS.get_events(job, after, timeout=EVENTS_TIMEOUT)
+        if not events and job.done:
+            resp.status = falcon.HTTP_204
+            return
+        resp.content_type = 'text/event-stream'
+        resp.set_header('Cache-Control', 'no-cache')
+        resp.text = 'retry: {}\n\n'.format(RECONNECT_DELAY) + ''.join(
+            format_event(event) for event in events)
+        resp.status = falcon.HTTP_200
+
+
+def format_event(event):
+    return 'id: {}\nevent: {}\ndata: {}\n\n'.format(
+        event['id'], event['type'], json.dumps(event))
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import json
+import threading
 
 import falcon
 from oslo_config import cfg
@@ -20,16 +21,45 @@ from oslo_log import log as logging
 
 from armada import api
 from armada.common import policy
+from armada.handlers.k8s import K8s
+from armada.handlers.release_storage import ReleaseIndex
 
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+# Time in seconds to wait for the release index to be built initially.
+INDEX_SYNC_TIMEOUT = 60
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_release_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ReleaseIndex(K8s())
+        return _index
+
 
 class Releases(api.BaseResource):
+    def __init__(self):
+        super(Releases, self).__init__()
+        # Serialized response body, by entity tag
+        self._body = (None, None)
+
     @policy.enforce('armada:get_release')
     def on_get(self, req, resp):
         '''Controller for listing Helm releases.
         '''
+        if CONF.api_releases_cache:
+            try:
+                return self._get_cached(req, resp)
+            except Exception as e:
+                self.warn(
+                    req.context,
+                    'Release index unavailable, listing releases with '
+                    'helm: {}'.format(e))
         try:
             with self.get_helm(req, resp) as helm:
                 releases = self.handle(helm)
@@ -44,6 +74,21 @@ class Releases(api.BaseResource):
             self.error(req.context, err_message)
             self.return_error(resp, falcon.HTTP_500, message=err_message)
 
+    def _get_cached(self, req, resp):
+        releases, etag = get_release_index().get_releases(INDEX_SYNC_TIMEOUT)
+        resp.etag = etag
+        if req.if_none_match and (etag in req.if_none_match
+                                  or '*' in req.if_none_match):
+            resp.status = falcon.HTTP_304
+            return
+        resp.content_type = 'application/json'
+        body_etag, body = self._body
+        if body_etag != etag:
+            body = json.dumps({'releases': releases})
+            self._body = (etag, body)
+        resp.text = body
+        resp.status = falcon.HTTP_200
+
     def handle(self, helm):
         LOG.debug('Getting helm releases')
 
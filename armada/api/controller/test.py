@@ -23,6 +23,7 @@ from armada.common import policy
 from armada import const
 from armada.handlers.helm import HelmReleaseId
 from armada.handlers.lock import lock_and_thread, LockException
+from armada.handlers.manifest import get_release_ids
 from armada.handlers.manifest import Manifest
 from armada.handlers.test import Test
 from armada.utils.release import release_prefixer
@@ -60,7 +61,10 @@ class TestReleasesReleaseNameController(api.BaseResource):
         except LockException as e:
             self.return_error(resp, falcon.HTTP_409, message=str(e))
 
-    @lock_and_thread()
+    def _get_release_ids(self, req, release_id, helm):
+        return [release_id]
+
+    @lock_and_thread(release_ids=_get_release_ids)
     def handle(self, req, release_id, helm):
         test_handler = Test({}, release_id, helm)
         return test_handler.test_release_for_success()
@@ -115,10 +119,9 @@ class TestReleasesManifestController(api.BaseResource):
         except LockException as e:
             self.return_error(resp, falcon.HTTP_409, message=str(e))
 
-    @lock_and_thread()
     def handle(self, req, resp, helm):
         try:
-            documents = self.req_yaml(req, default=[])
+            documents = list(self.req_yaml(req, default=[]))
         except yaml.YAMLError:
             err_message = 'Documents must be valid YAML.'
             return self.return_error(
@@ -131,7 +134,13 @@ class TestReleasesManifestController(api.BaseResource):
 
         armada_obj = Manifest(
             documents, target_manifest=target_manifest).get_manifest()
+        self._test_manifest(req, resp, helm, armada_obj)
+
+    def _get_manifest_release_ids(self, req, resp, helm, armada_obj):
+        return get_release_ids(armada_obj)
 
+    @lock_and_thread(release_ids=_get_manifest_release_ids)
+    def _test_manifest(self, req, resp, helm, armada_obj):
         prefix = armada_obj[const.KEYWORD_DATA][const.KEYWORD_PREFIX]
         release_ids = helm.list_release_ids()
 
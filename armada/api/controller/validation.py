@@ -15,12 +15,12 @@
 import json
 
 import falcon
-import yaml
 
 from armada import api
 from armada.common import policy
 from armada.utils.validate import validate_armada_documents
 from armada.handlers.document import ReferenceResolver
+from armada.utils import yaml as yaml_utils
 
 
 class Validate(api.BaseResource):
@@ -40,7 +40,7 @@ class Validate(api.BaseResource):
                         json_body.get('href'))
                     documents = list()
                     for d in data:
-                        documents.extend(list(yaml.safe_load_all(d.decode())))
+                        documents.extend(yaml_utils.load_all(d))
                 else:
                     resp.status = falcon.HTTP_400
                     return
@@ -0,0 +1,342 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+import time
+import uuid
+
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from armada.handlers.k8s import K8s
+from armada.handlers.lock import LOCK_NAMESPACE
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+# Jobs are stored next to the locks, as config maps with this label.
+JOB_NAMESPACE = LOCK_NAMESPACE
+JOB_LABEL = 'armada.process/job'
+JOB_PREFIX = 'armada-job-'
+# Time in seconds between reads of the events of jobs of other processes.
+JOB_POLL_INTERVAL = 1
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class Job(object):
+    '''
+    An operation run in the background on behalf of an API request, with the
+    events reporting its progress.
+
+    :param str kind: Kind of operation, e.g. ``apply``.
+    :param JobStore store: Store to save the job to as it progresses, so
+        that other processes can read it.
+    '''
+    def __init__(self, kind, store=None):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.status = PENDING
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.store = store
+        self._events = []
+        self._cond = threading.Condition()
+        self._save_lock = threading.Lock()
+        self._saved = False
+
+    @classmethod
+    def from_dict(cls, state, events):
+        '''
+        Returns a snapshot of a job read from the job store.
+        '''
+        job = cls(state['kind'])
+        for key in ('id', 'status', 'created', 'started', 'finished', 'result',
+                    'error'):
+            setattr(job, key, state[key])
+        job._events = events
+        return job
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    def add_event(self, event_type, **data):
+        '''
+        Records a progress event, and wakes up readers of the events.
+        '''
+        with self._cond:
+            self._events.append(
+                {
+                    'id': len(self._events) + 1,
+                    'type': event_type,
+                    'time': time.time(),
+                    'data': data
+                })
+            self._cond.notify_all()
+        self.save()
+
+    def save(self):
+        '''
+        Saves the state and events of the job to its store, if any. Failures
+        are logged, as they don't affect the job itself.
+        '''
+        if self.store is None:
+            return
+        with self._save_lock:
+            with self._cond:
+                state = self.to_dict()
+                events = list(self._events)
+            try:
+                self.store.save(state, events, create=not self._saved)
+                self._saved = True
+            except Exception:
+                LOG.warning('Failed to save job %s.', self.id, exc_info=True)
+
+    def get_events(self, after=0, timeout=0):
+        '''
+        :param int after: Id of the last event already seen.
+        :param timeout: Time in seconds to wait for new events, unless the
+            job has finished.
+        :returns: Events after ``after``, which are empty if there are none
+            by the timeout.
+        :rtype: list
+        '''
+        with self._cond:
+            self._cond.wait_for(
+                lambda: len(self._events) > after or self.done, timeout)
+            return self._events[after:]
+
+    def _set_status(self, status, **data):
+        with self._cond:
+            self.status = status
+            if status == RUNNING:
+                self.started = time.time()
+            elif status in FINISHED:
+                self.finished = time.time()
+        self.add_event(status, **data)
+
+    def run(self, func):
+        self._set_status(RUNNING)
+        try:
+            self.result = func(self)
+        except Exception as e:
+            LOG.exception('Job %s failed.', self.id)
+            self.error = str(e)
+            self._set_status(FAILED, error=self.error)
+        else:
+            self._set_status(SUCCEEDED)
+
+    def to_dict(self):
+        with self._cond:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'created': self.created,
+                'started': self.started,
+                'finished': self.finished,
+                'result': self.result,
+                'error': self.error,
+                'events': len(self._events)
+            }
+
+
+class JobStore(object):
+    '''
+    Keeps the state and events of jobs in config maps, so that every API
+    process can read the jobs started by the others, including after they
+    restart.
+    '''
+    def __init__(self, k8s=None):
+        self._k8s = k8s
+
+    @property
+    def k8s(self):
+        if self._k8s is None:
+            self._k8s = K8s()
+        return self._k8s
+
+    def save(self, state, events, create=False):
+        '''
+        Saves the state and events of a job.
+
+        :param dict state: The job state, as returned by ``Job.to_dict``.
+        :param list events: The events of the job.
+        :param bool create: Whether the job is not saved yet.
+        '''
+        name = JOB_PREFIX + state['id']
+        body = client.V1ConfigMap(
+            metadata=client.V1ObjectMeta(
+                name=name, labels={JOB_LABEL: state['kind']}),
+            data={
+                'job': json.dumps(state),
+                'events': json.dumps(events)
+            })
+        core = self.k8s.client
+        try:
+            if create:
+                core.create_namespaced_config_map(JOB_NAMESPACE, body)
+            else:
+                core.replace_namespaced_config_map(name, JOB_NAMESPACE, body)
+        except ApiException as e:
+            # The job was saved, or expired, in the meantime.
+            if create and e.status == 409:
+                core.replace_namespaced_config_map(name, JOB_NAMESPACE, body)
+            elif not create and e.status == 404:
+                core.create_namespaced_config_map(JOB_NAMESPACE, body)
+            else:
+                raise
+
+    def load(self, job_id):
+        '''
+        :returns: A snapshot of the job, or None if there is no such job.
+        :rtype: Job
+        '''
+        try:
+            config_map = self.k8s.client.read_namespaced_config_map(
+                JOB_PREFIX + job_id, JOB_NAMESPACE)
+        except ApiException as e:
+            if e.status == 404:
+                return None
+            raise
+        return _load_job(config_map)
+
+    def expire(self, retention):
+        '''
+        Deletes the oldest finished jobs beyond ``retention``.
+        '''
+        config_maps = self.k8s.client.list_namespaced_config_map(
+            JOB_NAMESPACE, label_selector=JOB_LABEL).items
+        jobs = sorted(
+            (_load_job(config_map) for config_map in config_maps),
+            key=lambda job: job.created)
+        excess = len(jobs) - retention
+        for job in jobs:
+            if excess <= 0:
+                break
+            if job.done:
+                try:
+                    self.k8s.client.delete_namespaced_config_map(
+                        JOB_PREFIX + job.id, JOB_NAMESPACE)
+                except ApiException as e:
+                    if e.status != 404:
+                        raise
+                excess -= 1
+
+
+def _load_job(config_map):
+    data = config_map.data or {}
+    return Job.from_dict(
+        json.loads(data['job']), json.loads(data.get('events') or '[]'))
+
+
+class JobManager(object):
+    '''
+    Runs jobs on a shared pool of threads, and saves them to the job store,
+    so that the jobs of every process can be looked up.
+
+    :param JobStore store: The job store, which defaults to config maps.
+    '''
+    def __init__(self, store=None):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._jobs = collections.OrderedDict()
+        self.store = store or JobStore()
+
+    def submit(self, kind, func):
+        '''
+        Starts running ``func`` in the background, which is given the job to
+        report its progress to, and whose return value is the job result.
+
+        :returns: The job.
+        :rtype: Job
+        '''
+        job = Job(kind, store=self.store)
+        # Save the job before it is returned, so that it can be read by
+        # any process right away.
+        job.save()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=CONF.api_job_workers, thread_name_prefix='job')
+            self._jobs[job.id] = job
+            self._expire()
+            self._executor.submit(job.run, func)
+        try:
+            self.store.expire(CONF.api_job_retention)
+        except Exception:
+            LOG.warning('Failed to expire jobs.', exc_info=True)
+        return job
+
+    def get(self, job_id):
+        '''
+        :returns: The job, or a snapshot of it if it was started by another
+            process, or None if there is no such job.
+        :rtype: Job
+        '''
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            job = self.store.load(job_id)
+        return job
+
+    def get_events(self, job, after=0, timeout=0):
+        '''
+        :param Job job: The job, as returned by ``get``.
+        :param int after: Id of the last event already seen.
+        :param timeout: Time in seconds to wait for new events, unless the
+            job has finished.
+        :returns: Tuple of the job, updated if it is a snapshot, and its
+            events after ``after``.
+        :rtype: tuple
+        '''
+        with self._lock:
+            local = self._jobs.get(job.id) is job
+        if local:
+            return job, job.get_events(after, timeout)
+        deadline = time.time() + timeout
+        while True:
+            events = job.get_events(after)
+            remaining = deadline - time.time()
+            if events or job.done or remaining <= 0:
+                return job, events
+            time.sleep(min(JOB_POLL_INTERVAL, remaining))
+            job = self.store.load(job.id) or job
+
+    def _expire(self):
+        # Forget the oldest finished jobs beyond the retention limit.
+        excess = len(self._jobs) - CONF.api_job_retention
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].done:
+                del self._jobs[job_id]
+                excess -= 1
+
+
+JOBS = JobManager()
@@ -26,6 +26,8 @@ from armada.api.middleware import LoggingMiddleware
 from armada.api.controller.test import TestReleasesReleaseNameController
 from armada.api.controller.test import TestReleasesManifestController
 from armada.api.controller.health import Health
+from armada.api.controller.jobs import Job
+from armada.api.controller.jobs import JobEvents
 from armada.api.controller.metrics import Metrics
 from armada.api.controller.releases import Releases
 from armada.api.controller.tiller import Status
@@ -63,6 +65,8 @@ def create(enable_middleware=None):
     url_routes_v1 = [
         (HEALTH_PATH, Health()),
         ('apply', Apply()),
+        ('jobs/{job_id}', Job()),
+        ('jobs/{job_id}/events', JobEvents()),
         ('releases', Releases()),
         # TODO: Remove this in follow on release after Shipyard has
         # been updated to no longer depend on it.
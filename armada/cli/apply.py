@@ -24,6 +24,7 @@ from armada.handlers.armada import Armada
 from armada.handlers.document import ReferenceResolver
 from armada.handlers.lock import lock_and_thread
 from armada.handlers.helm import Helm
+from armada.utils import yaml as yaml_utils
 
 CONF = cfg.CONF
 
@@ -132,16 +133,32 @@ SHORT_DESC = "Command installs manifest charts."
     '--enable-operator', help="Use operator for applying charts", is_flag=True)
 @click.option(
     '--go-wait', help="Use operator for applying charts", is_flag=True)
+@click.option(
+    '--dag-scheduling',
+    help=(
+        "Schedule charts as a dependency graph rather than by chart group, "
+        "starting each chart once the charts it depends on are deployed. "
+        "Chart groups wait for the preceding chart group unless they set "
+        "`depends_on`."),
+    is_flag=True)
+@click.option(
+    '--chart-fingerprint',
+    help=(
+        "Record a content fingerprint of each chart on its release, and skip "
+        "diffing deployed releases whose fingerprint is unchanged."),
+    is_flag=True)
 @click.option('--debug', help="Enable debug logging.", is_flag=True)
 @click.pass_context
 def apply_create(
         ctx, locations, api, disable_update_post, disable_update_pre,
         enable_chart_cleanup, metrics_output, use_doc_ref, set, timeout,
         values, wait, target_manifest, bearer_token, enable_operator, go_wait,
-        debug):
+        dag_scheduling, chart_fingerprint, debug):
     CONF.debug = debug
     CONF.enable_operator = enable_operator
     CONF.go_wait = go_wait
+    CONF.dag_scheduling = dag_scheduling
+    CONF.chart_fingerprint = chart_fingerprint
     ApplyManifest(
         ctx, locations, api, disable_update_post, disable_update_pre,
         enable_chart_cleanup, metrics_output, use_doc_ref, set, timeout,
@@ -193,7 +210,7 @@ class ApplyManifest(CliAction):
             doc_data = ReferenceResolver.resolve_reference(self.locations)
             documents = list()
             for d in doc_data:
-                documents.extend(list(yaml.safe_load_all(d.decode())))
+                documents.extend(yaml_utils.load_all(d))
         except InvalidPathException as ex:
             self.logger.error(str(ex))
             return
@@ -205,7 +222,7 @@ class ApplyManifest(CliAction):
             with Helm(bearer_token=self.bearer_token) as helm:
 
                 try:
-                    resp = self.handle(documents, helm)
+                    resp = self.handle(self.get_armada(documents, helm), helm)
                     self.output(resp)
                 finally:
                     if self.metrics_output:
@@ -237,9 +254,8 @@ class ApplyManifest(CliAction):
                     manifest=documents, set=self.set, query=query)
             self.output(resp.get('message'))
 
-    @lock_and_thread()
-    def handle(self, documents, helm):
-        armada = Armada(
+    def get_armada(self, documents, helm):
+        return Armada(
             documents,
             disable_update_pre=self.disable_update_pre,
             disable_update_post=self.disable_update_post,
@@ -250,4 +266,10 @@ class ApplyManifest(CliAction):
             helm=helm,
             values=self.values,
             target_manifest=self.target_manifest)
+
+    def _get_release_ids(self, armada, helm):
+        return armada.get_release_ids()
+
+    @lock_and_thread(release_ids=_get_release_ids)
+    def handle(self, armada, helm):
         return armada.sync()
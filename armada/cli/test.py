@@ -14,15 +14,16 @@
 
 import click
 from oslo_config import cfg
-import yaml
 
 from armada.cli import CliAction
 from armada import const
 from armada.handlers.lock import lock_and_thread
+from armada.handlers.manifest import get_release_ids
 from armada.handlers.manifest import Manifest
 from armada.handlers.test import Test
 from armada.handlers.helm import Helm, HelmReleaseId
 from armada.utils.release import release_prefixer
+from armada.utils import yaml as yaml_utils
 
 CONF = cfg.CONF
 
@@ -97,7 +98,21 @@ class TestChartManifest(CliAction):
 
             self.handle(helm)
 
-    @lock_and_thread()
+    def _get_release_ids(self, helm):
+        release_ids = []
+        if self.release:
+            release_ids.append(HelmReleaseId(self.namespace, self.release))
+        if self.file:
+            with open(self.file) as f:
+                documents = list(yaml_utils.load_all(f))
+            release_ids.extend(
+                get_release_ids(
+                    Manifest(
+                        documents,
+                        target_manifest=self.target_manifest).get_manifest()))
+        return release_ids
+
+    @lock_and_thread(release_ids=_get_release_ids)
     def handle(self, helm):
         release_ids = helm.list_release_ids()
 
@@ -115,7 +130,8 @@ class TestChartManifest(CliAction):
 
         if self.file:
             if not self.ctx.obj.get('api', False):
-                documents = list(yaml.safe_load_all(open(self.file).read()))
+                with open(self.file) as f:
+                    documents = list(yaml_utils.load_all(f))
                 armada_obj = Manifest(
                     documents,
                     target_manifest=self.target_manifest).get_manifest()
@@ -13,12 +13,12 @@
 # limitations under the License.
 
 import click
-import yaml
 from oslo_config import cfg
 
 from armada.cli import CliAction
 from armada.utils.validate import validate_armada_documents
 from armada.handlers.document import ReferenceResolver
+from armada.utils import yaml as yaml_utils
 
 CONF = cfg.CONF
 
@@ -62,7 +62,7 @@ class ValidateManifest(CliAction):
             doc_data = ReferenceResolver.resolve_reference(self.locations)
             documents = list()
             for d in doc_data:
-                documents.extend(list(yaml.safe_load_all(d.decode())))
+                documents.extend(yaml_utils.load_all(d))
 
             try:
                 valid, details = validate_armada_documents(documents)
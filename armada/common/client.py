@@ -123,6 +123,15 @@ class ArmadaClient(object):
 
         return resp.json()
 
+    def get_job(self, job_id, query=None, timeout=None):
+
+        endpoint = self._set_endpoint('1.0', 'jobs/{}'.format(job_id))
+        resp = self.session.get(endpoint, query=query, timeout=timeout)
+
+        self._check_response(resp)
+
+        return resp.json()
+
     def get_test_release(self, release=None, query=None, timeout=None):
 
         endpoint = self._set_endpoint('1.0', 'test/{}'.format(release))
@@ -23,6 +23,19 @@ armada_policies = [
             'path': '/api/v1.0/apply/',
             'method': 'POST'
         }]),
+    policy.DocumentedRuleDefault(
+        name=base.ARMADA % 'get_job',
+        check_str=base.RULE_ADMIN_VIEWER,
+        description='Get the status and progress of a background job',
+        operations=[
+            {
+                'path': '/api/v1.0/jobs/{job_id}',
+                'method': 'GET'
+            }, {
+                'path': '/api/v1.0/jobs/{job_id}/events',
+                'method': 'GET'
+            }
+        ]),
     policy.DocumentedRuleDefault(
         name=base.ARMADA % 'validate_manifest',
         check_str=base.RULE_ADMIN_VIEWER,
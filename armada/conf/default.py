@@ -65,6 +65,29 @@ The Keystone project domain name used for authentication.
             """Optional path to an SSH private key used for
 authenticating against a Git source repository. The path must be an absolute
 path to the private key that includes the name of the key itself.""")),
+    cfg.StrOpt(
+        'git_mirror_dir',
+        default=None,
+        help=utils.fmt(
+            """Optional path to a directory in which to keep a bare
+mirror of each Git chart source repository. When set, references are fetched
+incrementally into the mirror shared by all charts of the repository, and only
+the chart subpath of the reference is checked out, without Git history.""")),
+    cfg.StrOpt(
+        'chart_cache_dir',
+        default=None,
+        help=utils.fmt(
+            """Optional path to a directory in which to persist
+downloaded chart sources across applies, keyed by their resolved git commit or
+tarball digest. The directory may be shared by multiple processes. The cache
+is disabled if unset.""")),
+    cfg.IntOpt(
+        'chart_cache_size',
+        default=2048,
+        min=0,
+        help=utils.fmt(
+            """Maximum size in MiB of the chart source cache,
+beyond which the least recently used sources are evicted.""")),
     cfg.IntOpt(
         'lock_acquire_timeout',
         default=60,
@@ -78,7 +101,59 @@ path to the private key that includes the name of the key itself.""")),
         min=0,
         help=utils.fmt(
             """Time in seconds of how long to wait between attempts
-    to acquire a lock""")),
+    to acquire a lock, when the existing lock cannot be watched for its
+    release""")),
+    cfg.StrOpt(
+        'lock_scope',
+        default='global',
+        choices=['global', 'namespace', 'release'],
+        help=utils.fmt(
+            """Scope of the locks taken by applies and tests. With
+        the namespace or release scope, those which touch disjoint namespaces
+        or releases run concurrently, while chart cleanup still takes the
+        global lock. All armada instances of a cluster must use the same
+        scope""")),
+    cfg.StrOpt(
+        'lock_backend',
+        default='crd',
+        choices=['crd', 'lease'],
+        help=utils.fmt(
+            """Kubernetes resource used for locks, either the armada
+        lock custom resource or a coordination.k8s.io Lease""")),
+    cfg.StrOpt(
+        'schema_validator',
+        default='jsonschema',
+        choices=['jsonschema', 'fastjsonschema'],
+        help=utils.fmt(
+            """JSON schema validator of Armada documents. fastjsonschema
+        generates and compiles the code of a validator for each schema, and
+        is faster, but only finds the first error of a document, so invalid
+        documents are validated again with jsonschema to report all their
+        errors. Falls back to jsonschema if fastjsonschema is not
+        installed""")),
+    cfg.BoolOpt(
+        'api_releases_cache',
+        default=False,
+        help=utils.fmt(
+            """Determines whether the API serves release listings from
+        an in-memory index, kept up to date by watching the helm storage
+        secrets of all namespaces, instead of running helm for each request.
+        Requires permission to watch secrets""")),
+    cfg.IntOpt(
+        'api_job_workers',
+        default=4,
+        min=1,
+        help=utils.fmt(
+            """Maximum number of background jobs, such as asynchronous
+        applies, run concurrently by each API process""")),
+    cfg.IntOpt(
+        'api_job_retention',
+        default=100,
+        min=1,
+        help=utils.fmt(
+            """Number of finished background jobs whose status is kept
+        in config maps in the lock namespace, which are shared by all API
+        processes""")),
     cfg.IntOpt(
         'lock_update_interval',
         default=60,
@@ -106,6 +181,87 @@ path to the private key that includes the name of the key itself.""")),
         help=utils.fmt(
             """Determines whether the wait process has to be done
         via armada-go using client-go library""")),
+    cfg.BoolOpt(
+        'dag_scheduling',
+        default=False,
+        help=utils.fmt(
+            """Determines whether charts are scheduled as a
+        dependency graph, starting each chart as soon as the charts it depends
+        on are deployed, instead of waiting for whole chart groups. Chart
+        groups still wait for the preceding chart group unless they list the
+        chart groups they depend on in `depends_on`""")),
+    cfg.BoolOpt(
+        'chart_fingerprint',
+        default=False,
+        help=utils.fmt(
+            """Determines whether a content fingerprint of each
+        chart directory, its values and its upgrade and wait settings is
+        recorded on the release, so that the dry-run upgrade used to diff
+        deployed releases is skipped while the fingerprint is unchanged""")),
+    cfg.IntOpt(
+        'chart_deploy_workers',
+        default=0,
+        min=0,
+        help=utils.fmt(
+            """Maximum number of charts deployed concurrently by a
+        single apply, shared by all chart groups. 0 means one worker per
+        chart""")),
+    cfg.IntOpt(
+        'helm_concurrency',
+        default=0,
+        min=0,
+        help=utils.fmt(
+            """Maximum number of helm commands run concurrently
+        by the process. 0 means unbounded""")),
+    cfg.IntOpt(
+        'k8s_watch_concurrency',
+        default=0,
+        min=0,
+        help=utils.fmt(
+            """Maximum number of Kubernetes resource waits run
+        concurrently by the process, each of which holds a watch on the
+        apiserver. 0 means unbounded""")),
+    cfg.BoolOpt(
+        'k8s_wait_informers',
+        default=False,
+        help=utils.fmt(
+            """Determines whether Kubernetes resource waits are
+        served from informers shared by the process, each of which keeps a
+        label indexed cache of the resources of one type in one namespace with
+        a single list and watch, instead of each wait listing and watching the
+        apiserver itself""")),
+    cfg.BoolOpt(
+        'k8s_async_watches',
+        default=False,
+        help=utils.fmt(
+            """Determines whether the list and watch requests of
+        the informers enabled by ``k8s_wait_informers`` are multiplexed on a
+        single asyncio event loop instead of each using its own thread.
+        Requires the aiohttp package""")),
+    cfg.IntOpt(
+        'k8s_connection_pool_size',
+        default=32,
+        min=0,
+        help=utils.fmt(
+            """Maximum number of connections kept open to the
+        Kubernetes apiserver by each API client, which is shared by the whole
+        process per bearer token. Requests made while all connections are in
+        use open connections which are not reused. 0 means the Kubernetes
+        client default""")),
+    cfg.BoolOpt(
+        'k8s_tcp_keepalive',
+        default=True,
+        help=utils.fmt(
+            """Determines whether TCP keepalive is enabled on
+        connections to the Kubernetes apiserver, so that idle connections and
+        watches are not silently dropped by proxies or load balancers""")),
+    cfg.IntOpt(
+        'download_concurrency',
+        default=0,
+        min=0,
+        help=utils.fmt(
+            """Maximum number of chart sources downloaded
+        concurrently by the process. 0 means unbounded""")),
 ]
 
 
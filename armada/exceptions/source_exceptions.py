@@ -111,6 +111,23 @@ class TarballExtractException(SourceException):
         super(TarballExtractException, self).__init__(self._message)
 
 
+class TarballChecksumException(SourceException):
+    '''
+    Exception that occurs when the downloaded tarball does not match the
+    checksum of the chart source.
+
+    **Troubleshoot:**
+    *Coming Soon*
+    '''
+    def __init__(self, tarball_url, expected, actual):
+        self._tarball_url = tarball_url
+        self._message = (
+            'Checksum of {} is {}, expected {}'.format(
+                tarball_url, actual, expected))
+
+        super(TarballChecksumException, self).__init__(self._message)
+
+
 class InvalidPathException(SourceException):
     '''
     Exception that occurs when a nonexistant path is accessed.
@@ -16,9 +16,9 @@ import subprocess  # nosec
 import tempfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from kubernetes.client.rest import ApiException
 from oslo_config import cfg
 from oslo_log import log as logging
-import yaml
 
 from armada import const
 from armada.conf import set_current_chart
@@ -28,15 +28,30 @@ from armada.exceptions import validate_exceptions
 from armada.handlers import metrics
 from armada.handlers.chart_deploy import ChartDeploy
 from armada.handlers.chart_download import ChartDownload
-from armada.handlers.helm import HelmReleaseId
+from armada.handlers.manifest import get_release_ids
 from armada.handlers.manifest import Manifest
 from armada.handlers.override import Override
-from armada.utils.release import release_prefixer
+from armada.handlers.scheduler import ChartScheduler
+from armada.utils import yaml as yaml_utils
 
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 
 
+def build_manifest(documents, set_ovr=None, values=None, target_manifest=None):
+    '''
+    Applies the overrides to ``documents``, which are updated in place, and
+    builds the Armada manifest out of them.
+
+    :returns: The documents with the overrides applied, and the manifest.
+    :rtype: tuple
+    '''
+    documents = Override(
+        documents, overrides=set_ovr, values=values).update_manifests()
+    return documents, Manifest(
+        documents, target_manifest=target_manifest).get_manifest()
+
+
 class Armada(object):
     '''
     This is the main Armada class handling the Armada
@@ -55,7 +70,8 @@ class Armada(object):
             values=None,
             target_manifest=None,
             k8s_wait_attempts=1,
-            k8s_wait_attempt_sleep=1):
+            k8s_wait_attempt_sleep=1,
+            progress=None):
         '''
         Initialize the Armada engine.
 
@@ -73,39 +89,118 @@ class Armada(object):
             for pods to become ready.
         :param int k8s_wait_attempt_sleep: The time in seconds to sleep
             between attempts.
+        :param progress: Function called with the type and data of each
+            chart progress event, e.g. ``Job.add_event``.
         '''
 
         self.enable_chart_cleanup = enable_chart_cleanup
         self.enable_operator = CONF.enable_operator
+        self.dag_scheduling = CONF.dag_scheduling
         self.force_wait = force_wait
         self.helm = helm
+        self.progress = progress
         try:
-            self.documents = Override(
-                documents, overrides=set_ovr,
-                values=values).update_manifests()
+            self.documents, self.manifest = build_manifest(
+                documents,
+                set_ovr=set_ovr,
+                values=values,
+                target_manifest=target_manifest)
         except (validate_exceptions.InvalidManifestException,
                 override_exceptions.InvalidOverrideValueException):
             raise
         self.target_manifest = target_manifest
-        self.manifest = Manifest(
-            self.documents, target_manifest=target_manifest).get_manifest()
         self.chart_download = ChartDownload()
+        # Futures of the chart source downloads, by chart document id
+        self.chart_sources = {}
         self.chart_deploy = ChartDeploy(
             self.manifest, disable_update_pre, disable_update_post,
             k8s_wait_attempts, k8s_wait_attempt_sleep, timeout, self.helm)
 
+    def get_release_ids(self):
+        '''
+        Returns the ids of the releases which are applied, to be locked
+        before syncing, or None if chart cleanup may purge any release with
+        the manifest prefix.
+
+        :rtype: list
+        '''
+        if self.enable_chart_cleanup:
+            return None
+        return get_release_ids(self.manifest)
+
     def pre_flight_ops(self):
         """Perform a series of checks and operations to ensure proper
         deployment.
         """
+        with ThreadPoolExecutor(
+                max_workers=self._get_download_workers()) as executor:
+            self._pre_flight_ops(executor)
+        for future in self.chart_sources.values():
+            future.result()
+
+    def _pre_flight_ops(self, download_executor):
         LOG.info("Performing pre-flight operations.")
 
-        # Clone the chart sources
+        # Download the chart sources in the background, each chart waits for
+        # its own source before it is deployed.
+        self.chart_sources = {}
+        for ch in self._get_charts():
+            if id(ch) not in self.chart_sources:
+                self.chart_sources[id(ch)] = download_executor.submit(
+                    self.chart_download.get_chart, ch, manifest=self.manifest)
+
+        self.chart_deploy.set_release_snapshot(self._get_release_snapshot())
+
+    def _get_charts(self):
         manifest_data = self.manifest.get(const.KEYWORD_DATA, {})
         for group in manifest_data.get(const.KEYWORD_GROUPS, []):
             for ch in group.get(const.KEYWORD_DATA).get(const.KEYWORD_CHARTS,
                                                         []):
-                self.chart_download.get_chart(ch, manifest=self.manifest)
+                yield ch
+
+    def _get_download_workers(self):
+        chart_count = len(list(self._get_charts()))
+        workers = CONF.download_concurrency or chart_count
+        return max(min(workers, chart_count), 1)
+
+    def _wait_for_chart_source(self, chart):
+        future = self.chart_sources.get(id(chart))
+        if future is None:
+            return
+        if not future.done():
+            LOG.info(
+                'Waiting for source of chart %s to download.',
+                chart['metadata']['name'])
+        future.result()
+
+    def _get_release_snapshot(self):
+        '''
+        Prefetches the latest release metadata of every namespace with
+        releases in the manifest, using one secret list per namespace rather
+        than reading each release separately as it is deployed.
+
+        :returns: Mapping of namespace to the latest release metadata by
+            release name. Namespaces which could not be listed are omitted.
+        :rtype: dict
+        '''
+        namespaces = set(
+            ch.get(const.KEYWORD_DATA).get('namespace')
+            for ch in self._get_charts())
+
+        snapshot = {}
+        for namespace in sorted(namespaces):
+            try:
+                snapshot[namespace] = self.helm.namespace_release_metadata(
+                    namespace)
+            except ApiException as e:
+                LOG.warning(
+                    'Unable to prefetch releases in namespace %s, they will '
+                    'be read individually: %s', namespace, e.reason)
+        LOG.info(
+            'Prefetched %s releases in %s namespaces.',
+            sum(len(releases) for releases in snapshot.values()),
+            len(snapshot))
+        return snapshot
 
     def sync(self):
         '''
@@ -129,7 +224,7 @@ class Armada(object):
         }
 
         tfile = tempfile.NamedTemporaryFile(mode="w+", delete=False)
-        yaml.safe_dump_all(self.documents, tfile)
+        yaml_utils.dump_all(self.documents, tfile)
         tfile.flush()
         tfile.close()
 
@@ -165,14 +260,45 @@ class Armada(object):
             'protected': []
         }
 
-        # TODO: (gardlt) we need to break up this func into
-        # a more cleaner format
-        self.pre_flight_ops()
-
         manifest_data = self.manifest.get(const.KEYWORD_DATA, {})
         prefix = manifest_data.get(const.KEYWORD_PREFIX)
 
-        for cg in manifest_data.get(const.KEYWORD_GROUPS, []):
+        chart_groups = manifest_data.get(const.KEYWORD_GROUPS, [])
+
+        # Chart sources are downloaded by their own pool, so that charts
+        # whose source is ready can be deployed while others download.
+        with ThreadPoolExecutor(
+                max_workers=self._get_download_workers()) as download_executor:
+            # TODO: (gardlt) we need to break up this func into
+            # a more cleaner format
+            self._pre_flight_ops(download_executor)
+
+            # A single pool of workers is shared by all charts of the apply.
+            workers = self._get_chart_deploy_workers(chart_groups)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                if self.dag_scheduling:
+                    self._sync_dag(prefix, chart_groups, msg, executor)
+                else:
+                    self._sync_chart_groups(
+                        prefix, chart_groups, msg, executor, workers)
+
+        self.post_flight_ops()
+
+        if self.enable_chart_cleanup:
+            self._chart_cleanup(prefix, msg)
+
+        LOG.info('Done applying manifest.')
+        return msg
+
+    def _get_chart_deploy_workers(self, chart_groups):
+        chart_count = sum(
+            len(cg.get(const.KEYWORD_DATA).get(const.KEYWORD_CHARTS, []))
+            for cg in chart_groups)
+        workers = CONF.chart_deploy_workers or chart_count
+        return max(min(workers, chart_count), 1)
+
+    def _sync_chart_groups(self, prefix, chart_groups, msg, executor, workers):
+        for cg in chart_groups:
             chartgroup = cg.get(const.KEYWORD_DATA)
             cg_name = cg.get('metadata').get('name')
             cg_desc = chartgroup.get('description', '<missing description>')
@@ -189,12 +315,8 @@ class Armada(object):
             cg_charts = chartgroup.get(const.KEYWORD_CHARTS, [])
 
             def deploy_chart(chart, concurrency):
-                set_current_chart(chart)
-                try:
-                    return self.chart_deploy.execute(
-                        chart, cg_test_all_charts, prefix, concurrency)
-                finally:
-                    set_current_chart(None)
+                return self._deploy_chart(
+                    chart, cg_test_all_charts, prefix, concurrency)
 
             results = []
             failures = []
@@ -217,17 +339,15 @@ class Armada(object):
                     if (handle_result(chart, lambda: deploy_chart(chart, 1))):
                         break
             else:
-                with ThreadPoolExecutor(
-                        max_workers=len(cg_charts)) as executor:
-                    future_to_chart = {
-                        executor.submit(deploy_chart, chart, len(cg_charts)):
-                        chart
-                        for chart in cg_charts
-                    }
-
-                    for future in as_completed(future_to_chart):
-                        chart = future_to_chart[future]
-                        handle_result(chart, future.result)
+                concurrency = min(len(cg_charts), workers)
+                future_to_chart = {
+                    executor.submit(deploy_chart, chart, concurrency): chart
+                    for chart in cg_charts
+                }
+
+                for future in as_completed(future_to_chart):
+                    chart = future_to_chart[future]
+                    handle_result(chart, future.result)
 
             if failures:
                 LOG.error('Chart deploy(s) failed: %s', failures)
@@ -240,15 +360,57 @@ class Armada(object):
             # End of Charts in ChartGroup
             LOG.info('All Charts applied in ChartGroup %s.', cg_name)
 
-        self.post_flight_ops()
+    def _sync_dag(self, prefix, chart_groups, msg, executor):
+        scheduler = ChartScheduler(chart_groups, force_wait=self.force_wait)
+        LOG.info(
+            'Processing %s charts of %s ChartGroups as a dependency graph%s',
+            len(scheduler.nodes), len(chart_groups),
+            ' (forced sequenced)' if self.force_wait else '')
 
-        if self.enable_chart_cleanup:
-            self._chart_cleanup(
-                prefix,
-                self.manifest[const.KEYWORD_DATA][const.KEYWORD_GROUPS], msg)
+        def deploy_chart(chart, cg_test_all_charts, concurrency):
+            return self._deploy_chart(
+                chart, cg_test_all_charts, prefix, concurrency)
 
-        LOG.info('Done applying manifest.')
-        return msg
+        results, failures = scheduler.run(deploy_chart, executor)
+        if failures:
+            LOG.error('Chart deploy(s) failed: %s', failures)
+            raise armada_exceptions.ChartDeployException(failures)
+
+        for result in results:
+            for k, v in result.items():
+                msg[k].append(v)
+
+        LOG.info('All Charts applied in dependency graph.')
+
+    def _deploy_chart(self, chart, cg_test_all_charts, prefix, concurrency):
+        name = chart['metadata']['name']
+        set_current_chart(chart)
+        try:
+            self._report_progress('chart_started', chart=name)
+            self._wait_for_chart_source(chart)
+            result = self.chart_deploy.execute(
+                chart, cg_test_all_charts, prefix, concurrency)
+        except Exception as e:
+            self._report_progress('chart_failed', chart=name, error=str(e))
+            raise
+        finally:
+            set_current_chart(None)
+        self._report_progress(
+            'chart_succeeded',
+            chart=name,
+            result={
+                k: str(v)
+                for k, v in result.items()
+            })
+        return result
+
+    def _report_progress(self, event_type, **data):
+        if self.progress is None:
+            return
+        try:
+            self.progress(event_type, **data)
+        except Exception:
+            LOG.warning('Failed to report %s progress.', event_type)
 
     def post_flight_ops(self):
         '''
@@ -258,18 +420,10 @@ class Armada(object):
 
         self.chart_download.cleanup()
 
-    def _chart_cleanup(self, prefix, chart_groups, msg):
+    def _chart_cleanup(self, prefix, msg):
         LOG.info('Processing chart cleanup to remove unspecified releases.')
 
-        valid_release_ids = []
-        for group in chart_groups:
-            group_data = group.get(const.KEYWORD_DATA, {})
-            for chart in group_data.get(const.KEYWORD_CHARTS, []):
-                chart_data = chart.get(const.KEYWORD_DATA, {})
-                valid_release_ids.append(
-                    HelmReleaseId(
-                        chart_data['namespace'],
-                        release_prefixer(prefix, chart_data['release'])))
+        valid_release_ids = get_release_ids(self.manifest)
 
         actual_release_ids = self.helm.list_release_ids()
         release_diff = list(set(actual_release_ids) - set(valid_release_ids))
@@ -0,0 +1,247 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+import ssl
+import threading
+import types
+from urllib.parse import quote
+
+from kubernetes.client.rest import ApiException
+from oslo_log import log as logging
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+LOG = logging.getLogger(__name__)
+
+# Time in seconds after which the apiserver ends each watch request.
+WATCH_TIMEOUT = 60
+
+HTTP_GONE = 410
+
+# REST collection paths and list model types by Kubernetes API list function.
+RESOURCES = {
+    'list_namespaced_pod': ('/api/v1/namespaces/{}/pods', 'V1PodList'),
+    'list_namespaced_job': ('/apis/batch/v1/namespaces/{}/jobs', 'V1JobList'),
+    'list_namespaced_deployment':
+    ('/apis/apps/v1/namespaces/{}/deployments', 'V1DeploymentList'),
+    'list_namespaced_daemon_set':
+    ('/apis/apps/v1/namespaces/{}/daemonsets', 'V1DaemonSetList'),
+    'list_namespaced_stateful_set':
+    ('/apis/apps/v1/namespaces/{}/statefulsets', 'V1StatefulSetList'),
+    'list_secret_for_all_namespaces': ('/api/v1/secrets', 'V1SecretList'),
+}
+
+
+class WatchExpired(Exception):
+    '''The resource version being watched is too old.'''
+
+
+class WatchEngine(object):
+    '''
+    Runs the list and watch requests of any number of informers as tasks of
+    a single asyncio event loop, on one background thread, instead of one
+    blocking thread per informer.
+
+    Watches request bookmarks, and resume from the last seen resource
+    version after a disconnect, so resources are only listed again once
+    their resource version has expired.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        # aiohttp sessions by apiserver connection settings, only used on the
+        # loop
+        self._sessions = {}
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                if aiohttp is None:
+                    raise RuntimeError(
+                        'aiohttp is required for asynchronous watches')
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name='watch-engine',
+                    daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, informer):
+        '''
+        Starts running ``informer`` on the event loop.
+
+        :returns: Future of the informer task, which is cancelled to stop it.
+        :rtype: concurrent.futures.Future
+        '''
+        return asyncio.run_coroutine_threadsafe(
+            self._run(informer), self._get_loop())
+
+    def _get_session(self, configuration):
+        # Credentials are sent per request, so a session can be shared by all
+        # clients of the same apiserver.
+        key = (
+            configuration.host, configuration.verify_ssl,
+            configuration.ssl_ca_cert, configuration.ca_cert_data,
+            configuration.cert_file, configuration.key_file,
+            configuration.assert_hostname, configuration.tls_server_name)
+        session = self._sessions.get(key)
+        if session is None:
+            connector = aiohttp.TCPConnector(
+                # Each watch holds its own connection.
+                limit=0,
+                ssl=_get_ssl_context(configuration))
+            session = self._sessions[key] = aiohttp.ClientSession(
+                connector=connector)
+        return session
+
+    async def _run(self, informer):
+        api_client = informer.list_func.__self__.api_client
+        path, list_type = RESOURCES[informer.list_func.__name__]
+        if informer.namespace is not None:
+            path = path.format(quote(informer.namespace))
+        url = api_client.configuration.host + path
+        params = {}
+        if informer.label_selector is not None:
+            params['labelSelector'] = informer.label_selector
+        # Strip the "List" suffix for the item type.
+        item_type = list_type[:-4]
+        session = self._get_session(api_client.configuration)
+
+        while True:
+            try:
+                if informer.resource_version is None:
+                    data = await self._request(
+                        session, api_client, url, params)
+                    resource_list = _deserialize(api_client, data, list_type)
+                    informer.replace(
+                        resource_list.items,
+                        resource_list.metadata.resource_version)
+                await self._watch(
+                    session, api_client, url, params, item_type, informer)
+            except asyncio.CancelledError:
+                LOG.debug('Informer %s stopped.', informer.name)
+                raise
+            except WatchExpired:
+                informer.expire()
+                continue
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                await asyncio.sleep(informer.handle_error(e, relist=False))
+            except Exception as e:
+                await asyncio.sleep(informer.handle_error(e))
+
+    async def _request(self, session, api_client, url, params):
+        async with session.get(url, params=params,
+                               **_get_request_args(api_client)) as resp:
+            await _check_status(resp)
+            return await resp.text()
+
+    async def _watch(
+            self, session, api_client, url, params, item_type, informer):
+        params = {
+            **params, 'watch': 'true',
+            'allowWatchBookmarks': 'true',
+            'resourceVersion': informer.resource_version,
+            'timeoutSeconds': str(WATCH_TIMEOUT)
+        }
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_read=WATCH_TIMEOUT + 30)
+        async with session.get(url, params=params, timeout=timeout,
+                               **_get_request_args(api_client)) as resp:
+            await _check_status(resp)
+            # Events are newline delimited, and may be larger than the line
+            # limit of the response reader.
+            buffer = b''
+            async for chunk in resp.content.iter_any():
+                buffer += chunk
+                *lines, buffer = buffer.split(b'\n')
+                for line in lines:
+                    if line.strip():
+                        self._handle_event(
+                            api_client, json.loads(line), item_type, informer)
+
+    def _handle_event(self, api_client, event, item_type, informer):
+        event_type = event['type'].upper()
+        obj = event['object']
+        if event_type == 'ERROR':
+            if obj.get('code') == HTTP_GONE:
+                raise WatchExpired()
+            raise ApiException(
+                status=obj.get('code'),
+                reason='{}: {}'.format(obj.get('reason'), obj.get('message')))
+        informer.apply_event(
+            event_type, _deserialize(api_client, json.dumps(obj), item_type))
+
+
+async def _check_status(resp):
+    if resp.status == HTTP_GONE:
+        raise WatchExpired()
+    if not 200 <= resp.status <= 299:
+        raise ApiException(
+            status=resp.status,
+            reason='{}: {}'.format(resp.reason, await resp.text()))
+
+
+def _deserialize(api_client, data, response_type):
+    try:
+        return api_client.deserialize(data, response_type, 'application/json')
+    except TypeError:
+        # Older clients take a response object instead of its text.
+        return api_client.deserialize(
+            types.SimpleNamespace(data=data), response_type)
+
+
+def _get_request_args(api_client):
+    configuration = api_client.configuration
+    args = {'headers': _get_headers(api_client), 'proxy': configuration.proxy}
+    # Name the certificate of the apiserver is verified against, which the
+    # Kubernetes client also sends as the server name indication.
+    server_hostname = configuration.tls_server_name
+    if not server_hostname and isinstance(configuration.assert_hostname, str):
+        server_hostname = configuration.assert_hostname
+    if server_hostname:
+        args['server_hostname'] = server_hostname
+    return args
+
+
+def _get_headers(api_client):
+    headers = {'Accept': 'application/json'}
+    headers.update(api_client.default_headers)
+    # Resolved for each request, since API keys may be refreshed.
+    for auth in api_client.configuration.auth_settings().values():
+        if auth['in'] == 'header' and auth['value']:
+            headers[auth['key']] = auth['value']
+    return headers
+
+
+def _get_ssl_context(configuration):
+    # Same settings as the connection pool of the Kubernetes client.
+    context = ssl.create_default_context(
+        cafile=configuration.ssl_ca_cert, cadata=configuration.ca_cert_data)
+    if not configuration.verify_ssl:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    elif configuration.assert_hostname is False:
+        context.check_hostname = False
+    if configuration.cert_file:
+        context.load_cert_chain(
+            configuration.cert_file, configuration.key_file)
+    return context
+
+
+ENGINE = WatchEngine()
@@ -15,12 +15,15 @@
 import os
 import time
 
+from oslo_config import cfg
 from oslo_log import log as logging
 
 from armada import const
 from armada.exceptions import armada_exceptions
 from armada.handlers import metrics
 from armada.handlers.chartbuilder import ChartBuilder
+from armada.handlers.chartbuilder import get_fingerprint_description
+from armada.handlers.chartbuilder import get_release_fingerprint
 from armada.handlers import helm
 from armada.handlers.release_diff import ReleaseDiff
 from armada.handlers.chart_delete import ChartDelete
@@ -30,6 +33,7 @@ from armada.handlers.test import Test
 from armada.handlers.wait import ChartWait
 import armada.utils.release as r
 
+CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
 
@@ -44,6 +48,23 @@ class ChartDeploy(object):
         self.k8s_wait_attempt_sleep = k8s_wait_attempt_sleep
         self.timeout = timeout
         self.helm = helm
+        self.chart_fingerprint = CONF.chart_fingerprint
+        self.release_snapshot = {}
+
+    def set_release_snapshot(self, release_snapshot):
+        '''
+        :param dict release_snapshot: Mapping of namespace to the latest
+            release metadata by release name, prefetched before deployment.
+            Releases in namespaces missing from the snapshot are read
+            individually.
+        '''
+        self.release_snapshot = release_snapshot
+
+    def get_release_metadata(self, release_id):
+        releases = self.release_snapshot.get(release_id.namespace)
+        if releases is None:
+            return self.helm.release_metadata(release_id)
+        return releases.get(release_id.name)
 
     def execute(self, ch, cg_test_all_charts, prefix, concurrency):
         chart_name = ch['metadata']['name']
@@ -77,7 +98,7 @@ class ChartDeploy(object):
 
         # Begin Chart timeout deadline
         deadline = time.time() + wait_timeout
-        old_release = self.helm.release_metadata(release_id)
+        old_release = self.get_release_metadata(release_id)
         action = metrics.ChartDeployAction.NOOP
 
         def noop():
@@ -97,6 +118,16 @@ class ChartDeploy(object):
 
         chartbuilder = ChartBuilder.from_chart_doc(ch, self.helm)
 
+        fingerprint = None
+        description = None
+        if self.chart_fingerprint:
+            fingerprint = chartbuilder.get_fingerprint(
+                values, {
+                    'upgrade': chart.get('upgrade', {}),
+                    'wait': chart.get('wait', {})
+                })
+            description = get_fingerprint_description(fingerprint)
+
         if status == helm.STATUS_DEPLOYED:
 
             # indicate to the end user what path we are taking
@@ -132,9 +163,16 @@ class ChartDeploy(object):
                         'Post upgrade actions are ignored by Armada'
                         'and will not affect deployment.')
 
-            LOG.info('Checking for updates to chart release inputs.')
-            new_chart = chartbuilder.get_helm_chart(release_id, values)
-            diff = self.get_diff(old_chart, old_values, new_chart, values)
+            if (fingerprint
+                    and fingerprint == get_release_fingerprint(old_release)):
+                LOG.info(
+                    'Chart fingerprint %s is unchanged, skipping diff.',
+                    fingerprint)
+                diff = None
+            else:
+                LOG.info('Checking for updates to chart release inputs.')
+                new_chart = chartbuilder.get_helm_chart(release_id, values)
+                diff = self.get_diff(old_chart, old_values, new_chart, values)
 
             if not diff:
                 LOG.info("Found no updates to chart release inputs")
@@ -158,7 +196,8 @@ class ChartDeploy(object):
                         values=values,
                         wait=native_wait_enabled,
                         timeout=timer,
-                        force=force)
+                        force=force,
+                        description=description)
 
                     LOG.info('Upgrade completed')
                     result['upgrade'] = release_id
@@ -176,7 +215,8 @@ class ChartDeploy(object):
                     release_id,
                     values=values,
                     wait=native_wait_enabled,
-                    timeout=timer)
+                    timeout=timer,
+                    description=description)
 
                 LOG.info('Install completed')
                 result['install'] = release_id
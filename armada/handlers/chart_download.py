@@ -12,13 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import Future
+import threading
+
 from oslo_config import cfg
 from oslo_log import log as logging
 
 from armada import const
 from armada.exceptions import source_exceptions
 from armada.handlers import metrics
+from armada.utils import concurrency
 from armada.utils import source
+from armada.utils import source_cache
 
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
@@ -27,6 +32,9 @@ CONF = cfg.CONF
 class ChartDownload():
     def __init__(self):
         self.chart_cache = {}
+        self._lock = threading.Lock()
+        # Futures of the downloads in progress, by source key
+        self._pending = {}
 
     def get_chart(self, ch, manifest=None):
         manifest_name = manifest['metadata']['name'] if manifest else None
@@ -47,26 +55,30 @@ class ChartDownload():
         elif ct_type == 'tar':
             source_key = (ct_type, location)
 
-            if source_key not in self.chart_cache:
+            def fetch():
                 LOG.info(
                     "Downloading tarball from: %s / proxy %s", location,
                     proxy_server or "not set")
-
                 if not CONF.certs:
                     LOG.warn(
-                        'Disabling server validation certs to extract charts')
-                    tarball_dir = source.get_tarball(
-                        location, verify=False, proxy_server=proxy_server)
-                else:
-                    tarball_dir = source.get_tarball(
-                        location, verify=CONF.certs, proxy_server=proxy_server)
-                self.chart_cache[source_key] = tarball_dir
-            chart['source_dir'] = (self.chart_cache.get(source_key), subpath)
+                        'Disabling server validation certs to extract '
+                        'charts')
+
+                return self._get_tarball(
+                    location, proxy_server, chart_source.get('checksum'))
+
+            chart['source_dir'] = (
+                self._get_source_dir(source_key, fetch), subpath)
         elif ct_type == 'git':
             reference = chart_source.get('reference', 'master')
             source_key = (ct_type, location, reference)
+            # Only the chart subpath is checked out from git mirrors.
+            checkout_subpath = None
+            if CONF.git_mirror_dir:
+                checkout_subpath = subpath
+                source_key = source_key + (subpath, )
 
-            if source_key not in self.chart_cache:
+            def fetch():
                 auth_method = chart_source.get('auth_method')
 
                 logstr = 'Cloning repo: {} from branch: {}'.format(
@@ -77,14 +89,29 @@ class ChartDownload():
                     logstr += ' auth method: {}'.format(auth_method)
                 LOG.info(logstr)
 
-                repo_dir = source.git_clone(
+                def clone():
+                    with concurrency.DOWNLOAD.hold():
+                        return source.git_clone(
+                            location,
+                            reference,
+                            proxy_server=proxy_server,
+                            auth_method=auth_method,
+                            subpath=checkout_subpath)
+
+                if source_cache.get_source_cache() is None:
+                    return clone()
+                commit = source.resolve_git_ref(
                     location,
                     reference,
                     proxy_server=proxy_server,
                     auth_method=auth_method)
+                if commit is None:
+                    return clone()
+                return self._get_cached_source(
+                    (ct_type, location, commit, checkout_subpath), clone)
 
-                self.chart_cache[source_key] = repo_dir
-            chart['source_dir'] = (self.chart_cache.get(source_key), subpath)
+            chart['source_dir'] = (
+                self._get_source_dir(source_key, fetch), subpath)
         else:
             name = ch['metadata']['name']
             raise source_exceptions.ChartSourceException(ct_type, name)
@@ -92,6 +119,113 @@ class ChartDownload():
         for dep in ch.get(const.KEYWORD_DATA, {}).get('dependencies', []):
             self.get_chart(dep, manifest=manifest)
 
+    def _get_tarball(self, location, proxy_server, checksum):
+        '''
+        Returns a directory with the tarball at ``location`` extracted,
+        reusing the persistent source cache when the tarball has the given
+        ``checksum``, or else when it is unchanged since it was last fetched.
+        '''
+        def fetch(etag=None):
+            with concurrency.DOWNLOAD.hold():
+                return source.fetch_tarball(
+                    location,
+                    verify=CONF.certs or False,
+                    proxy_server=proxy_server,
+                    etag=etag,
+                    checksum=checksum)
+
+        cache = source_cache.get_source_cache()
+        if cache is None:
+            return fetch().path
+
+        if checksum:
+            # The checksum identifies the content without any request.
+            source_dir = cache.get(('tar', location, checksum.lower()))
+            if source_dir is not None:
+                LOG.info('Using cached tarball %s', location)
+                metrics.CHART_SOURCE_CACHE.hit('tar')
+                return source_dir
+
+        validator = cache.get_validator(location)
+        if validator and checksum in (None, validator['digest']):
+            fetched = fetch(etag=validator['etag'])
+            if fetched.path is None:
+                source_dir = cache.get(('tar', location, validator['digest']))
+                if source_dir is not None:
+                    LOG.info('Using cached tarball %s', location)
+                    metrics.CHART_SOURCE_CACHE.hit('tar')
+                    return source_dir
+                # The cache entry was evicted since.
+                fetched = fetch()
+        else:
+            fetched = fetch()
+
+        metrics.CHART_SOURCE_CACHE.miss('tar')
+        try:
+            cache.put(('tar', location, fetched.digest), fetched.path)
+            cache.put_validator(location, fetched.etag, fetched.digest)
+        except Exception:
+            LOG.warning('Unable to cache tarball %s', location, exc_info=True)
+        return fetched.path
+
+    def _get_cached_source(self, content_key, fetch):
+        '''
+        Returns a copy of the source identified by ``content_key`` from the
+        persistent source cache, or else fetches and caches it.
+        '''
+        cache = source_cache.get_source_cache()
+        if cache is None:
+            return fetch()
+
+        ct_type = content_key[0]
+        source_dir = cache.get(content_key)
+        if source_dir is not None:
+            LOG.info('Using cached source %s', content_key)
+            metrics.CHART_SOURCE_CACHE.hit(ct_type)
+            return source_dir
+
+        metrics.CHART_SOURCE_CACHE.miss(ct_type)
+        source_dir = fetch()
+        try:
+            cache.put(content_key, source_dir)
+        except Exception:
+            LOG.warning(
+                'Unable to cache source %s', content_key, exc_info=True)
+        return source_dir
+
+    def _get_source_dir(self, source_key, fetch):
+        '''
+        Returns the source directory of ``source_key``, calling ``fetch`` to
+        download it only once even when charts sharing the source are
+        downloaded concurrently.
+        '''
+        with self._lock:
+            if source_key in self.chart_cache:
+                return self.chart_cache[source_key]
+            future = self._pending.get(source_key)
+            if future is not None:
+                owner = False
+            else:
+                owner = True
+                future = self._pending[source_key] = Future()
+
+        if not owner:
+            LOG.debug('Waiting for concurrent download of %s', source_key)
+            return future.result()
+
+        try:
+            source_dir = fetch()
+        except Exception as e:
+            with self._lock:
+                del self._pending[source_key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self.chart_cache[source_key] = source_dir
+            del self._pending[source_key]
+        future.set_result(source_dir)
+        return source_dir
+
     def cleanup(self):
         '''
         Operations to run after deployment process has terminated
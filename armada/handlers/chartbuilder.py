@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import json
 import os
 from pathlib import Path
 from shutil import rmtree
@@ -26,6 +28,8 @@ LOG = logging.getLogger(__name__)
 
 CONF = cfg.CONF
 
+FINGERPRINT_DESCRIPTION_PREFIX = 'Armada chart fingerprint: '
+
 
 class ChartBuilder(object):
     '''
@@ -103,3 +107,55 @@ class ChartBuilder(object):
         except Exception as e:
             raise chartbuilder_exceptions.HelmChartBuildException(
                 self.name, details=e)
+
+    def get_fingerprint(self, values, options=None):
+        '''
+        Returns a content fingerprint of the chart, covering every file of
+        the chart directory (following the dependency symlinks in ``charts``),
+        the override values and the deploy options.
+
+        :param dict values: The values the chart is deployed with.
+        :param dict options: The options the chart is deployed with, e.g. its
+            ``upgrade`` and ``wait`` settings.
+        :returns: Hex digest of the fingerprint.
+        :rtype: str
+        '''
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(self.source_directory,
+                                         followlinks=True):
+            # Walk in a stable order, ignoring VCS metadata.
+            dirs[:] = sorted(d for d in dirs if d != '.git')
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                relpath = os.path.relpath(path, self.source_directory)
+                digest.update(relpath.encode('utf-8') + b'\0')
+                with open(path, 'rb') as f:
+                    for block in iter(lambda: f.read(65536), b''):
+                        digest.update(block)
+                digest.update(b'\0')
+        for data in (values, options or {}):
+            digest.update(
+                json.dumps(data, sort_keys=True, default=str).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+
+def get_fingerprint_description(fingerprint):
+    '''
+    :returns: Release description recording ``fingerprint``.
+    :rtype: str
+    '''
+    return FINGERPRINT_DESCRIPTION_PREFIX + fingerprint
+
+
+def get_release_fingerprint(release):
+    '''
+    :param release: helm release metadata
+    :returns: The chart fingerprint recorded in the release description, or
+        ``None`` if it was not deployed with one.
+    :rtype: str
+    '''
+    description = release.get('info', {}).get('description') or ''
+    if description.startswith(FINGERPRINT_DESCRIPTION_PREFIX):
+        return description[len(FINGERPRINT_DESCRIPTION_PREFIX):]
+    return None
@@ -12,20 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from base64 import b64decode
-import gzip
-import io
 import json as JSON
+import os
 import subprocess  # nosec
 import tempfile
 from typing import NamedTuple
 
 from oslo_config import cfg
 from oslo_log import log as logging
-import yaml
 
 from armada.exceptions.helm_exceptions import HelmCommandException
 from armada.handlers.k8s import K8s
+from armada.handlers import metrics
+from armada.handlers.release_storage import ReleaseStorage
+from armada.utils import concurrency
+from armada.utils import yaml as yaml_utils
 
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
@@ -39,6 +40,15 @@ STATUS_FAILED = 'failed'
 class Helm(object):
     '''
     Helm CLI handler
+
+    Every command forks a new helm process, which loads the kubeconfig and
+    discovers the API server from scratch. The helm CLI offers no long lived
+    or batched mode to amortize that startup, so this handler avoids running
+    commands whose results it can get otherwise: release metadata is read
+    from the release storage rather than `helm status`, and `helm show chart`
+    output is cached per chart directory. The latency of the remaining
+    commands is observed by the `helm_command` metric. A long lived helper
+    process is a follow-up, see `_run`.
     '''
     def __init__(self, bearer_token=None):
         self.bearer_token = bearer_token
@@ -46,6 +56,16 @@ class Helm(object):
         # init k8s connectivity
         self.k8s = K8s(bearer_token=self.bearer_token)
 
+        self.storage = ReleaseStorage(self.k8s)
+
+        # cache of `helm show chart` output by chart directory
+        self._show_chart_cache = {}
+
+    # TODO: Follow-up: run commands through a long lived helper built on the
+    # helm Go SDK, as armada-go does for waits, which loads the kubeconfig
+    # and discovers the API server once, and takes commands over a pipe.
+    # This method would then send each command to the helper rather than
+    # forking helm, keeping the `helm_command` metric to compare both.
     def _run(self, sub_command, args, json=True, timeout=None):
         if isinstance(sub_command, str):
             sub_command = [sub_command]
@@ -55,13 +75,16 @@ class Helm(object):
         command = command + args
         LOG.info('Running command=%s', command)
         try:
-            result = subprocess.run(  # nosec
-                command,
-                check=True,
-                universal_newlines=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=timeout)
+            with concurrency.HELM.hold():
+                with metrics.HELM_COMMAND.get_context(_get_command_label(
+                        sub_command, args)):
+                    result = subprocess.run(  # nosec
+                        command,
+                        check=True,
+                        universal_newlines=True,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        timeout=timeout)
         except subprocess.CalledProcessError as e:
             raise HelmCommandException(e)
 
@@ -90,7 +113,8 @@ class Helm(object):
             values=None,
             wait=False,
             dry_run=False,
-            timeout=None):
+            timeout=None,
+            description=None):
         timeout = self._check_timeout(wait, timeout)
 
         args = [
@@ -110,6 +134,8 @@ class Helm(object):
             args = args + ['--wait']
         if dry_run:
             args = args + ['--dry-run']
+        if description:
+            args = args + ['--description', description]
 
         with _TempValuesFile(values) as values_file:
             args = args + ['--values', values_file.file.name]
@@ -124,7 +150,8 @@ class Helm(object):
             wait=False,
             dry_run=False,
             timeout=None,
-            force=False):
+            force=False,
+            description=None):
         timeout = self._check_timeout(wait, timeout)
 
         args = [
@@ -139,6 +166,8 @@ class Helm(object):
             args = args + ['--wait']
         if dry_run:
             args = args + ['--dry-run']
+        if description:
+            args = args + ['--description', description]
 
         with _TempValuesFile(values) as values_file:
             args = args + ['--values', values_file.file.name]
@@ -170,26 +199,20 @@ class Helm(object):
     # chart metadata which we use for release diffing:
     #   https://github.com/helm/helm/issues/9968
     #
-    # So instead we access the helm release metadata secret directly
-    # as describe here:
-    #   https://gist.github.com/DzeryCZ/c4adf39d4a1a99ae6e594a183628eaee
+    # So instead we read the helm release storage secrets directly, which
+    # also avoids running `helm status` just to find the latest version.
     def release_metadata(self, release_id, version=None):
         if version is None:
-            # determine latest version
-            release = self.release_status(release_id)
-            if release is None:
-                return None
-            version = release['version']
-        secret_name = 'sh.helm.release.v1.{}.v{}'.format(
-            release_id.name, version)
-        secret_namespace = release_id.namespace
-        secret = self.k8s.read_namespaced_secret(secret_name, secret_namespace)
-        raw_data = secret.data['release']
-        k8s_data = b64decode(raw_data)
-        helm_data = b64decode(k8s_data)
-        helm_data_file_handle = io.BytesIO(helm_data)
-        helm_json = gzip.GzipFile(fileobj=helm_data_file_handle).read()
-        return JSON.loads(helm_json)
+            return self.storage.get_latest_release(release_id)
+        return self.storage.get_release(release_id, version)
+
+    def namespace_release_metadata(self, namespace):
+        '''
+        :returns: Mapping of release name to the latest release metadata, for
+            every release in ``namespace``.
+        :rtype: dict
+        '''
+        return self.storage.get_latest_releases(namespace)
 
     def uninstall_release(
             self,
@@ -206,9 +229,16 @@ class Helm(object):
         return self._run('uninstall', args, json=False, timeout=timeout)
 
     def show_chart(self, chart_dir):
-
-        output = self._run(['show', 'chart'], [chart_dir], json=False)
-        return yaml.safe_load(output)
+        # Dependencies such as helm-toolkit are shared by many charts, and
+        # their metadata doesn't change during the lifetime of this handler,
+        # so only run `helm show chart` once per chart directory.
+        key = os.path.realpath(chart_dir)
+        chart = self._show_chart_cache.get(key)
+        if chart is None:
+            output = self._run(['show', 'chart'], [chart_dir], json=False)
+            chart = yaml_utils.load(output)
+            self._show_chart_cache[key] = chart
+        return dict(chart)
 
     def _check_timeout(self, wait, timeout):
         if timeout is None or timeout <= 0:
@@ -226,6 +256,17 @@ class Helm(object):
         pass
 
 
+def _get_command_label(sub_command, args):
+    '''
+    Returns the metric label value for a helm command, which distinguishes
+    dry runs from the commands they simulate.
+    '''
+    label = ' '.join(sub_command)
+    if '--dry-run' in args:
+        label += ' --dry-run'
+    return label
+
+
 class _TempValuesFile():
     def __init__(self, values):
         self.values = values
@@ -234,8 +275,7 @@ class _TempValuesFile():
 
     def __enter__(self):
         self.file.__enter__()
-        values_content = yaml.safe_dump(self.values)
-        self.file.write(values_content)
+        yaml_utils.dump(self.values, self.file)
         self.file.flush()
         return self
 
@@ -0,0 +1,440 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import contextlib
+import queue
+import threading
+import time
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+from oslo_config import cfg
+from oslo_log import log as logging
+import urllib3.exceptions
+
+from armada.exceptions import k8s_exceptions
+from armada.handlers import async_watch
+from armada.utils import backoff
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+# Time in seconds after which the apiserver ends each watch request, after
+# which the watch is resumed from the last seen resource version.
+WATCH_TIMEOUT = 60
+
+# Time in seconds after which subscription events notice being stopped.
+STOP_POLL_INTERVAL = 1
+
+HTTP_GONE = 410
+
+# Errors after which the watch can be resumed from the last seen resource
+# version, without listing again.
+CONNECTION_ERRORS = (
+    urllib3.exceptions.ProtocolError, urllib3.exceptions.MaxRetryError)
+
+
+class Subscription(object):
+    '''
+    Resources of an ``Informer`` matching a set of labels, and the
+    subsequent changes to them.
+
+    :param dict labels: Labels which resources must match.
+    '''
+    def __init__(self, labels):
+        self.labels = labels
+        # Matching resources at the time of subscribing
+        self.items = []
+        self._events = queue.Queue()
+
+    def matches(self, resource):
+        if resource is None:
+            return False
+        resource_labels = resource.metadata.labels or {}
+        return all(resource_labels.get(k) == v for k, v in self.labels.items())
+
+    def put(self, event_type, resource):
+        self._events.put({'type': event_type, 'object': resource})
+
+    def events(self, timeout, stop=None):
+        '''
+        Yields watch events for changes to matching resources, in the same
+        form as ``kubernetes.watch.Watch.stream``, until ``timeout``, or
+        until ``stop`` is set.
+
+        :param threading.Event stop: Event which ends the events once set.
+        '''
+        deadline = time.time() + timeout
+        while stop is None or not stop.is_set():
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            try:
+                yield self._events.get(
+                    timeout=min(remaining, STOP_POLL_INTERVAL))
+            except queue.Empty:
+                pass
+
+
+class Informer(object):
+    '''
+    Maintains a local store of the resources of one kind in one namespace,
+    with a single list and watch shared by any number of subscriptions.
+
+    The store is indexed by label, so that subscriptions can be served
+    without listing from the apiserver.
+
+    :param list_func: Kubernetes API function to list the resources, e.g.
+        ``CoreV1Api.list_namespaced_pod``.
+    :param str namespace: Namespace of the resources, or ``None`` for a
+        ``list_func`` which lists the resources of all namespaces, e.g.
+        ``CoreV1Api.list_secret_for_all_namespaces``.
+    :param str label_selector: Label selector limiting the resources listed
+        and watched from the apiserver.
+    '''
+    def __init__(self, list_func, namespace, label_selector=None):
+        self.list_func = list_func
+        self.namespace = namespace
+        self.label_selector = label_selector
+        self.name = '{}/{}'.format(list_func.__name__, namespace or '*')
+        self._lock = threading.Condition()
+        # Resources by name
+        self._store = {}
+        # Resource names by (label key, label value)
+        self._index = collections.defaultdict(set)
+        self._subscriptions = set()
+        self._resource_version = None
+        self._synced = False
+        self._error = None
+        self._stopped = False
+        self._watch = None
+        self._thread = None
+        self._task = None
+        # Consecutive failed attempts to list or watch
+        self._attempt = 0
+        # Incremented on every change to the store
+        self._generation = 0
+
+    def start(self):
+        if CONF.k8s_async_watches:
+            self._task = async_watch.ENGINE.run(self)
+            return
+        self._thread = threading.Thread(
+            target=self._run, name='informer-' + self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            w = self._watch
+        if w is not None:
+            w.stop()
+        if self._task is not None:
+            self._task.cancel()
+
+    def subscribe(self, labels, timeout):
+        '''
+        :param dict labels: Labels which resources must match.
+        :param timeout: Time in seconds to wait for the store to be synced.
+        :returns: Subscription to the matching resources.
+        :rtype: Subscription
+        :raises: KubernetesWatchTimeoutException if the store is not synced
+            within ``timeout``, or any error listing the resources before.
+        '''
+        subscription = Subscription(labels)
+        with self._lock:
+            self._wait_synced(timeout)
+            subscription.items = [
+                self._store[name] for name in self._get_names(labels)
+            ]
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def get_items(self, labels, timeout):
+        '''
+        :param dict labels: Labels which resources must match.
+        :param timeout: Time in seconds to wait for the store to be synced.
+        :returns: Tuple of the generation of the store, which changes along
+            with any of the resources, and the matching resources.
+        :rtype: tuple
+        :raises: KubernetesWatchTimeoutException if the store is not synced
+            within ``timeout``, or any error listing the resources before.
+        '''
+        with self._lock:
+            self._wait_synced(timeout)
+            return self._generation, [
+                self._store[key] for key in self._get_names(labels)
+            ]
+
+    def _wait_synced(self, timeout):
+        # Must be called with the lock held.
+        deadline = time.time() + timeout
+        while not self._synced and self._error is None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                # Not being synced must not be taken for there being no
+                # resources.
+                raise k8s_exceptions.KubernetesWatchTimeoutException(
+                    'Informer {} not synced after {}s'.format(
+                        self.name, timeout))
+            self._lock.wait(remaining)
+        if not self._synced:
+            raise self._error
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def _get_names(self, labels):
+        if not labels:
+            return set(self._store)
+        name_sets = sorted(
+            (self._index.get((k, v), set()) for k, v in labels.items()),
+            key=len)
+        return set.intersection(*name_sets)
+
+    @property
+    def resource_version(self):
+        '''
+        Resource version from which to resume watching, or ``None`` if the
+        resources must be listed first.
+        '''
+        return self._resource_version
+
+    def _run(self):
+        while not self._stopped:
+            try:
+                if self._resource_version is None:
+                    self._list()
+                self._watch_events()
+            except ApiException as e:
+                if e.status == HTTP_GONE:
+                    self.expire()
+                    continue
+                time.sleep(self.handle_error(e))
+            except CONNECTION_ERRORS as e:
+                time.sleep(self.handle_error(e, relist=False))
+            except Exception as e:
+                time.sleep(self.handle_error(e))
+        LOG.debug('Informer %s stopped.', self.name)
+
+    def get_args(self):
+        '''
+        :returns: Tuple of the positional and keyword arguments of
+            ``list_func`` to list or watch the resources.
+        '''
+        args = () if self.namespace is None else (self.namespace, )
+        kwargs = {}
+        if self.label_selector is not None:
+            kwargs['label_selector'] = self.label_selector
+        return args, kwargs
+
+    def get_key(self, resource):
+        '''
+        :returns: Key of ``resource`` in the store, which is its name, or
+            its namespace and name for an informer of all namespaces.
+        '''
+        if self.namespace is None:
+            return '{}/{}'.format(
+                resource.metadata.namespace, resource.metadata.name)
+        return resource.metadata.name
+
+    def _list(self):
+        args, kwargs = self.get_args()
+        resource_list = self.list_func(*args, **kwargs)
+        self.replace(
+            resource_list.items, resource_list.metadata.resource_version)
+
+    def expire(self):
+        '''
+        Forces the resources to be listed again, since the resource version
+        being watched has expired.
+        '''
+        LOG.debug(
+            'Informer %s resource version expired, listing again.', self.name)
+        self._resource_version = None
+
+    def handle_error(self, error, relist=True):
+        '''
+        Records an error listing or watching the resources.
+
+        :param bool relist: Whether to list the resources again, or else to
+            resume watching from the last seen resource version.
+        :returns: Time in seconds to wait before retrying.
+        :rtype: float
+        '''
+        if self._stopped:
+            return 0
+        delay = backoff.get_delay(self._attempt)
+        self._attempt += 1
+        LOG.warning(
+            'Informer %s failed, %s in %.1fs: %s', self.name,
+            'listing again' if relist else 'resuming watch', delay, error)
+        with self._lock:
+            if not self._synced:
+                self._error = error
+                self._lock.notify_all()
+        if relist:
+            self._resource_version = None
+        return delay
+
+    def replace(self, resources, resource_version):
+        '''
+        Reconciles the store with a full list of the resources.
+        '''
+        resources = {
+            self.get_key(resource): resource
+            for resource in resources
+        }
+        with self._lock:
+            for name in list(self._store):
+                if name not in resources:
+                    self._update('DELETED', name, None)
+            for name, resource in resources.items():
+                old = self._store.get(name)
+                if old is None:
+                    self._update('ADDED', name, resource)
+                elif (old.metadata.resource_version
+                      != resource.metadata.resource_version):
+                    self._update('MODIFIED', name, resource)
+            self._resource_version = resource_version
+            self._attempt = 0
+            self._synced = True
+            self._error = None
+            self._lock.notify_all()
+        LOG.debug(
+            'Informer %s listed %s resources at version %s.', self.name,
+            len(resources), resource_version)
+
+    def apply_event(self, event_type, resource):
+        '''
+        Applies a watch event to the store.
+        '''
+        with self._lock:
+            if event_type in {'ADDED', 'MODIFIED', 'DELETED'}:
+                self._update(
+                    event_type, self.get_key(resource),
+                    None if event_type == 'DELETED' else resource)
+            elif event_type != 'BOOKMARK':
+                return
+            self._resource_version = _get_resource_version(resource)
+            self._attempt = 0
+
+    def _watch_events(self):
+        w = watch.Watch()
+        with self._lock:
+            if self._stopped:
+                return
+            self._watch = w
+        args, kwargs = self.get_args()
+        try:
+            for event in w.stream(self.list_func, *args,
+                                  resource_version=self._resource_version,
+                                  allow_watch_bookmarks=True,
+                                  timeout_seconds=WATCH_TIMEOUT, **kwargs):
+                self.apply_event(event['type'].upper(), event['object'])
+        finally:
+            with self._lock:
+                self._watch = None
+
+    def _update(self, event_type, name, resource):
+        '''
+        Updates the store and index, and notifies matching subscriptions.
+        Must be called with the lock held.
+        '''
+        self._generation += 1
+        old = self._store.pop(name, None)
+        if old is not None:
+            for item in (old.metadata.labels or {}).items():
+                self._index[item].discard(name)
+                if not self._index[item]:
+                    del self._index[item]
+        if resource is not None:
+            self._store[name] = resource
+            for item in (resource.metadata.labels or {}).items():
+                self._index[item].add(name)
+
+        for subscription in self._subscriptions:
+            old_match = subscription.matches(old)
+            new_match = subscription.matches(resource)
+            if new_match:
+                subscription.put(
+                    'MODIFIED' if old_match else 'ADDED', resource)
+            elif old_match:
+                subscription.put('DELETED', old)
+
+
+class InformerCache(object):
+    '''
+    Per-process registry of informers, one per kind of resource, namespace
+    and Kubernetes API client. API clients are shared by all users of the
+    same credentials, see ``k8s.get_api_client``, so informers are shared by
+    all applies of the process. Informers run while they have subscriptions.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._informers = {}
+        self._refs = collections.Counter()
+
+    @contextlib.contextmanager
+    def subscribe(self, list_func, namespace, labels, timeout):
+        '''
+        Context manager subscribing to the resources listed by ``list_func``
+        in ``namespace`` which match ``labels``.
+
+        :returns: The subscription.
+        :rtype: Subscription
+        '''
+        key = _get_informer_key(list_func, namespace)
+        with self._lock:
+            informer = self._informers.get(key)
+            if informer is None:
+                informer = self._informers[key] = Informer(
+                    list_func, namespace)
+                informer.start()
+            self._refs[key] += 1
+        try:
+            subscription = informer.subscribe(labels, timeout)
+            try:
+                yield subscription
+            finally:
+                informer.unsubscribe(subscription)
+        finally:
+            with self._lock:
+                self._refs[key] -= 1
+                if not self._refs[key]:
+                    del self._refs[key]
+                    del self._informers[key]
+                    informer.stop()
+
+
+INFORMERS = InformerCache()
+
+
+def _get_informer_key(list_func, namespace):
+    # List functions are bound methods of per K8s instance API objects, whose
+    # API client is shared.
+    api = getattr(list_func, '__self__', None)
+    if api is None:
+        return (list_func, namespace)
+    return (type(api), list_func.__name__, namespace, api.api_client)
+
+
+def _get_resource_version(resource):
+    # Bookmarks are not deserialized by the watch, as they only carry the
+    # resource version.
+    if isinstance(resource, dict):
+        return resource['metadata']['resourceVersion']
+    return resource.metadata.resource_version
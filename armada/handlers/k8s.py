@@ -12,7 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import copy
 import re
+import socket
+import threading
 import time
 
 from kubernetes import client
@@ -21,13 +25,131 @@ from kubernetes import watch
 from kubernetes.client.rest import ApiException
 from oslo_config import cfg
 from oslo_log import log as logging
+import urllib3
 
 from armada.const import DEFAULT_K8S_TIMEOUT
 from armada.exceptions import k8s_exceptions as exceptions
+from armada.handlers import metrics
 
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+# Maximum number of API clients kept for distinct bearer tokens.
+MAX_API_CLIENTS = 16
+
+# TCP keepalive timings in seconds, matching those of client-go.
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 15
+
+_lock = threading.Lock()
+_configuration = None
+# Shared API clients by bearer token, least recently used first
+_api_clients = collections.OrderedDict()
+
+
+def _get_socket_options():
+    options = list(urllib3.connection.HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        options.append(
+            (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE))
+    if hasattr(socket, 'TCP_KEEPINTVL'):
+        options.append(
+            (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL))
+    return options
+
+
+def _load_configuration():
+    try:
+        config.load_incluster_config()
+    except config.config_exception.ConfigException:
+        config.load_kube_config()
+
+    configuration = client.Configuration.get_default_copy()
+    if CONF.k8s_connection_pool_size:
+        configuration.connection_pool_maxsize = CONF.k8s_connection_pool_size
+    if CONF.k8s_tcp_keepalive:
+        configuration.socket_options = _get_socket_options()
+    return configuration
+
+
+def _get_token_configuration(bearer_token):
+    # Only the connection settings are kept, not the credentials of the
+    # configuration (e.g. the service account token or client certificate),
+    # so that requests are authenticated with the bearer token alone.
+    configuration = client.Configuration()
+    for name in ('host', 'verify_ssl', 'ssl_ca_cert', 'ca_cert_data',
+                 'assert_hostname', 'tls_server_name', 'proxy', 'no_proxy',
+                 'proxy_headers', 'connection_pool_maxsize', 'socket_options'):
+        setattr(
+            configuration, name, copy.deepcopy(getattr(_configuration, name)))
+    # Configure API key authorization: Bearer Token
+    configuration.api_key_prefix['authorization'] = 'Bearer'
+    configuration.api_key['authorization'] = bearer_token
+    return configuration
+
+
+def get_api_client(bearer_token=None):
+    '''
+    Returns the Kubernetes API client shared by the process for
+    ``bearer_token``, so that its connection pool is reused by all users.
+    The Kubernetes configuration is only loaded once.
+
+    :param str bearer_token: Token to authenticate with, or ``None`` to use
+        the credentials of the Kubernetes configuration.
+    :rtype: kubernetes.client.ApiClient
+    '''
+    global _configuration
+    with _lock:
+        api_client = _api_clients.get(bearer_token)
+        if api_client is not None:
+            _api_clients.move_to_end(bearer_token)
+            return api_client
+
+        if _configuration is None:
+            _configuration = _load_configuration()
+        if bearer_token:
+            configuration = _get_token_configuration(bearer_token)
+        else:
+            configuration = copy.deepcopy(_configuration)
+
+        api_client = _api_clients[bearer_token] = client.ApiClient(
+            configuration)
+        metrics.K8S_CONNECTION_POOL.start()
+        if len(_api_clients) > MAX_API_CLIENTS:
+            _api_clients.popitem(last=False)
+        return api_client
+
+
+def _get_pools():
+    with _lock:
+        api_clients = list(_api_clients.values())
+    for api_client in api_clients:
+        pool_manager = api_client.rest_client.pool_manager
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is not None:
+                yield pool
+
+
+def get_pool_size():
+    '''
+    :returns: Maximum number of pooled connections of the shared API clients.
+    '''
+    return sum(pool.pool.maxsize for pool in _get_pools())
+
+
+def get_pool_in_use():
+    '''
+    :returns: Number of pooled connections of the shared API clients which
+        are in use. Once all are in use, further requests open connections
+        which are discarded afterwards.
+    '''
+    return sum(pool.pool.maxsize - pool.pool.qsize() for pool in _get_pools())
+
+
+metrics.K8S_CONNECTION_POOL.observe(get_pool_size, get_pool_in_use)
+
 
 class K8s(object):
     '''
@@ -38,25 +160,14 @@ class K8s(object):
         Initialize connection to Kubernetes
         '''
         self.bearer_token = bearer_token
-        api_client = None
-
-        try:
-            config.load_incluster_config()
-        except config.config_exception.ConfigException:
-            config.load_kube_config()
-
-        if self.bearer_token:
-            # Configure API key authorization: Bearer Token
-            configuration = client.Configuration()
-            configuration.api_key_prefix['authorization'] = 'Bearer'
-            configuration.api_key['authorization'] = self.bearer_token
-            api_client = client.ApiClient(configuration)
+        api_client = get_api_client(bearer_token)
 
         self.client = client.CoreV1Api(api_client)
         self.batch_api = client.BatchV1Api(api_client)
         self.custom_objects = client.CustomObjectsApi(api_client)
         self.api_extensions = client.ApiextensionsV1Api(api_client)
         self.apps_v1_api = client.AppsV1Api(api_client)
+        self.coordination_api = client.CoordinationV1Api(api_client)
 
     def delete_job_action(
             self,
@@ -293,6 +404,16 @@ class K8s(object):
 
         return self.client.read_namespaced_secret(name, namespace, **kwargs)
 
+    def list_namespaced_secret(self, namespace="default", **kwargs):
+        '''
+        :param namespace: namespace of the secrets
+        :param label_selector: filters secrets by label
+
+        This will return a list of objects req namespace
+        '''
+
+        return self.client.list_namespaced_secret(namespace, **kwargs)
+
     def wait_for_pod_redeployment(self, old_pod_name, namespace):
         '''
         :param old_pod_name: name of pods
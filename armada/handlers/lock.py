@@ -13,14 +13,17 @@
 # limitations under the License.
 
 import functools
+import threading
 import time
-from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor
+import uuid
+from datetime import datetime, timezone
 
 from kubernetes import client
+from kubernetes import watch
 from kubernetes.client.rest import ApiException
 from oslo_config import cfg
 from oslo_log import log as logging
+import urllib3.exceptions
 
 from armada.handlers.k8s import K8s
 from armada.handlers.helm import Helm
@@ -34,6 +37,8 @@ LOCK_VERSION = "v1"
 LOCK_NAMESPACE = "kube-system"
 LOCK_PLURAL = "locks"
 LOCK_SINGULAR = "lock"
+# Consecutive failed updates after which the lock is considered lost
+LOCK_UPDATE_RETRIES = 3
 
 LOG = logging.getLogger(__name__)
 
@@ -42,12 +47,19 @@ class LockException(Exception):
     pass
 
 
-def lock_and_thread(lock_name="lock"):
-    """This function creates a thread to execute the wrapped function after
-    acquiring a lock. While the thread is still running, this function
-    periodically updates the lock
+def lock_and_thread(lock_name="lock", release_ids=None):
+    """This function executes the wrapped function after acquiring a lock.
+    While the function is still running, a heartbeat thread periodically
+    updates the lock
+
+    Unless the lock scope is global, functions which only touch some releases
+    take the locks of those releases or of their namespaces instead, so that
+    they can run alongside each other.
 
     :param lock_name: name of the lock to create
+    :param release_ids: function returning the ids of the releases touched
+        by the wrapped function, given the same arguments, or None if those
+        are not known in advance
     """
     def lock_decorator(func):
         @functools.wraps(func)
@@ -68,27 +80,109 @@ def lock_and_thread(lock_name="lock"):
                     "authentication issues in Kubernetes clusters with "
                     "external auth backend")
 
-            with Lock(lock_name, bearer_token=bearer_token) as lock:
-                pool = ThreadPoolExecutor(1)
-                future = pool.submit(func, *args, **kwargs)
-                start = time.time()
-                while not future.done():
-                    if time.time() - start > CONF.lock_update_interval:
-                        lock.update_lock()
-                        start = time.time()
-                    time.sleep(1)
-                return future.result()
+            lock = _get_lock(
+                lock_name, bearer_token, release_ids, args, kwargs)
+            with lock:
+                with LockHeartbeat(lock, CONF.lock_update_interval):
+                    return func(*args, **kwargs)
 
         return func_wrapper
 
     return lock_decorator
 
 
+def _get_lock(lock_name, bearer_token, release_ids, args, kwargs):
+    if CONF.lock_scope == 'global':
+        return Lock(lock_name, bearer_token=bearer_token)
+    ids = None
+    if release_ids is not None:
+        ids = release_ids(*args, **kwargs)
+    if ids is None:
+        return ExclusiveLock(lock_name, bearer_token=bearer_token)
+    return LockSet(
+        lock_name, get_lock_names(lock_name, ids), bearer_token=bearer_token)
+
+
+def get_lock_names(lock_name, release_ids):
+    """Names of the locks of the given releases in the configured lock scope
+
+    Namespaces cannot contain dots, so release lock names are unique.
+
+    :param lock_name: name of the global lock
+    :param release_ids: iterable of HelmReleaseId
+    :return: sorted list of lock names
+    """
+    if CONF.lock_scope == 'namespace':
+        keys = {release_id.namespace for release_id in release_ids}
+    else:
+        keys = {
+            '{}.{}'.format(release_id.namespace, release_id.name)
+            for release_id in release_ids
+        }
+    return sorted(
+        '{}.{}.{}'.format(lock_name, CONF.lock_scope, key) for key in keys)
+
+
+class LockHeartbeat:
+    def __init__(self, lock, interval):
+        """Context manager which updates ``lock`` every ``interval`` seconds
+        from a dedicated timer thread, for as long as the context lasts.
+
+        The heartbeat stops once the lock is lost, i.e. it was removed or
+        taken over by another process, or could not be updated
+        LOCK_UPDATE_RETRIES times in a row, in which case a LockException is
+        raised when the context exits.
+
+        :param lock: the acquired Lock to update
+        :param interval: time in seconds between updates
+        """
+        self.lock = lock
+        self.interval = interval
+        self.error = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name='lock-heartbeat', daemon=True)
+
+    def _run(self):
+        failures = 0
+        while not self._stopped.wait(self.interval):
+            try:
+                self.lock.update_lock()
+                failures = 0
+            except ApiException as err:
+                if err.status in (404, 409):
+                    self.error = LockException(
+                        "Lock was lost: {}".format(err.reason))
+                    break
+                failures += 1
+                LOG.warning('Failed to update lock', exc_info=True)
+            except Exception:
+                failures += 1
+                LOG.warning('Failed to update lock', exc_info=True)
+            if failures >= LOCK_UPDATE_RETRIES:
+                self.error = LockException(
+                    "Unable to update lock {} times in a row".format(failures))
+                break
+        if self.error:
+            LOG.error('%s, stopping lock updates', self.error)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stopped.set()
+        self._thread.join()
+        if self.error and exc_type is None:
+            raise self.error
+        return False
+
+
 class Lock:
     def __init__(self, lock_name, bearer_token=None, additional_data=None):
         """Creates a lock with the specified name and data. When a lock with
-        that name already exists then this will continuously attempt to acquire
-        it until:
+        that name already exists then this will watch it, and attempt to
+        acquire it again whenever it is released, until:
             * the attempt times out
             * the lock is gone this is able to acquire a new lock
             * the existing lock expires, in which case this will forcibly
@@ -102,36 +196,44 @@ class Lock:
         self.expire_time = CONF.lock_expiration
         self.timeout = CONF.lock_acquire_timeout
         self.acquire_delay = CONF.lock_acquire_delay
-        self.lock_config = LockConfig(
+        if CONF.lock_backend == 'lease':
+            config_class = LeaseLockConfig
+        else:
+            config_class = LockConfig
+        self.lock_config = config_class(
             name=lock_name,
             bearer_token=bearer_token,
             additional_data=additional_data)
 
     def _test_lock_ownership(self):
-        # If the uid of the current lock is the same as the one given when we
-        # created the lock, then it must be the one created by this program
         lock = self.lock_config.get_lock()
         if lock:
-            lock_uid = lock['metadata']['uid']
-            current_uid = self.lock_config.metadata.get('uid', None)
-            return current_uid == lock_uid
+            return self.lock_config.is_owner(lock)
         # The lock must not exist
         return False
 
     def lock_age(self):
         lock = self.lock_config.get_lock()
         if lock:
-            creation = lock['data']['lastUpdated']
-            creation_time = datetime.strptime(creation, TIME_FORMAT)
-            return datetime.utcnow() - creation_time
+            return self.lock_config.get_age(lock)
         # If no lock exists then 0 is returned so the lock is assuredly not old
         # enough to be expired
         return 0
 
-    def acquire_lock(self):
+    def expires_in(self, lock):
+        """Time in seconds until ``lock`` expires, negative once expired"""
+        expire_time = self.lock_config.get_duration(lock) or self.expire_time
+        return expire_time - self.lock_config.get_age(lock).total_seconds()
+
+    def acquire_lock(self, timeout=None):
+        """Acquires the lock, or raises a LockException once ``timeout``
+        seconds have passed, which defaults to the lock_acquire_timeout.
+        """
+        if timeout is None:
+            timeout = self.timeout
         start = time.time()
-        LOG.info("Acquiring lock")
-        while (time.time() - start) < self.timeout:
+        LOG.info("Acquiring lock %s", self.lock_config.name)
+        while (time.time() - start) < timeout:
             try:
                 self.lock_config.create_lock()
                 return True
@@ -148,25 +250,42 @@ class Lock:
                     LOG.warn("There is already an existing lock")
                 else:
                     raise
-            if self._test_lock_ownership():
+            lock = self.lock_config.get_lock()
+            if not lock:
+                # The lock was released in the meantime
+                continue
+            if self.lock_config.is_owner(lock):
                 # If there is already a lock that was created by this thread
                 # then we must have successfully acquired the lock
                 return True
-            else:
-                # There is a lock but it was not created by this thread, which
-                # means that the only way it should be removed is if the age
-                # of the lock exceeds the expire time in order to avoid
-                # removing another thread's lock while it is still working
-                if self.lock_age() > timedelta(seconds=self.expire_time):
-                    LOG.info(
-                        "Lock has exceeded expiry time, removing so"
-                        "processing can continue")
-                    self.release_lock()
-                    continue
-            LOG.debug("Sleeping before attempting to acquire lock again")
-            time.sleep(self.acquire_delay)
+            # There is a lock but it was not created by this thread, which
+            # means that the only way it should be removed is if the age of
+            # the lock exceeds the expire time in order to avoid removing
+            # another thread's lock while it is still working
+            expires_in = self.expires_in(lock)
+            if expires_in < 0:
+                LOG.info(
+                    "Lock has exceeded expiry time, taking it over so "
+                    "processing can continue")
+                if self.lock_config.take_over(lock):
+                    return True
+                continue
+            # Rather than polling, retry as soon as the lock is released or
+            # expires, whichever comes first
+            remaining = timeout - (time.time() - start)
+            self.wait_for_release(lock, max(min(remaining, expires_in), 0))
         raise LockException("Unable to acquire lock before timeout")
 
+    def wait_for_release(self, lock, timeout):
+        LOG.debug("Waiting up to %.1fs for the lock to be released", timeout)
+        try:
+            self.lock_config.wait_for_release(lock, timeout)
+        except (ApiException, urllib3.exceptions.HTTPError) as err:
+            LOG.warn(
+                "Unable to watch the lock, sleeping before attempting to "
+                "acquire it again: %s", err)
+            time.sleep(self.acquire_delay)
+
     def release_lock(self):
         LOG.info("Releasing lock")
         return self.lock_config.delete_lock()
@@ -184,6 +303,105 @@ class Lock:
         return False
 
 
+class ExclusiveLock(Lock):
+    """The global lock when the lock scope is not global. Once acquired, this
+    also waits for the release of the scoped locks of other processes, such
+    as those of a LockSet, which in turn back off while it is held.
+    """
+    def acquire_lock(self, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        start = time.time()
+        super(ExclusiveLock, self).acquire_lock(timeout)
+        try:
+            self._wait_for_scoped_locks(start, timeout)
+        except Exception:
+            self.release_lock()
+            raise
+        return True
+
+    def _wait_for_scoped_locks(self, start, timeout):
+        prefix = self.lock_config.full_name + '.'
+        while True:
+            held = [
+                lock for lock in self.lock_config.list_locks()
+                if self.lock_config.get_name(lock).startswith(prefix)
+                and self.expires_in(lock) >= 0
+            ]
+            if not held:
+                return
+            remaining = timeout - (time.time() - start)
+            if remaining <= 0:
+                raise LockException("Unable to acquire lock before timeout")
+            LOG.info("Waiting for %s scoped locks to be released", len(held))
+            self.wait_for_release(
+                held[0], max(min(remaining, self.expires_in(held[0])), 0))
+
+
+class LockSet:
+    def __init__(self, lock_name, lock_names, bearer_token=None):
+        """Scoped locks, e.g. of the releases touched by an apply, which are
+        acquired in sorted order so that overlapping sets of locks cannot
+        deadlock. They are not held while the global lock is.
+
+        :param lock_name: name of the global lock
+        :param lock_names: names of the scoped locks
+        """
+        self.timeout = CONF.lock_acquire_timeout
+        self.global_lock = Lock(lock_name, bearer_token=bearer_token)
+        self.locks = [
+            Lock(name, bearer_token=bearer_token)
+            for name in sorted(set(lock_names))
+        ]
+
+    def acquire_lock(self):
+        start = time.time()
+        while True:
+            acquired = []
+            try:
+                for lock in self.locks:
+                    lock.acquire_lock(
+                        max(self.timeout - (time.time() - start), 0))
+                    acquired.append(lock)
+            except Exception:
+                self._release(acquired)
+                raise
+            # The global lock waits for scoped locks only once acquired, so
+            # checking for it after acquiring the scoped locks cannot race.
+            global_lock = self.global_lock.lock_config.get_lock()
+            if not global_lock:
+                return True
+            expires_in = self.global_lock.expires_in(global_lock)
+            if expires_in < 0:
+                return True
+            self._release(acquired)
+            remaining = self.timeout - (time.time() - start)
+            if remaining <= 0:
+                raise LockException("Unable to acquire lock before timeout")
+            LOG.info("Waiting for the global lock to be released")
+            self.global_lock.wait_for_release(
+                global_lock, max(min(remaining, expires_in), 0))
+
+    def _release(self, locks):
+        for lock in reversed(locks):
+            lock.release_lock()
+
+    def release_lock(self):
+        self._release(self.locks)
+
+    def update_lock(self):
+        for lock in self.locks:
+            lock.update_lock()
+
+    def __enter__(self):
+        self.acquire_lock()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release_lock()
+        return False
+
+
 class LockConfig:
     def __init__(self, name, bearer_token=None, additional_data=None):
         self.name = name
@@ -279,6 +497,76 @@ class LockConfig:
         self.metadata = lock.get('metadata', self.metadata)
         return lock
 
+    def is_owner(self, lock):
+        """Whether ``lock`` is the lock created by this object
+
+        If the uid of the current lock is the same as the one given when we
+        created the lock, then it must be the one created by this program.
+        """
+        return self.metadata.get('uid', None) == lock['metadata']['uid']
+
+    def get_age(self, lock):
+        """Time since ``lock`` was last updated
+
+        :rtype: timedelta
+        """
+        updated = datetime.strptime(lock['data']['lastUpdated'], TIME_FORMAT)
+        return datetime.utcnow() - updated
+
+    def get_duration(self, lock):
+        """Time in seconds for which ``lock`` is held without updates, or
+        None when the lock does not record it
+
+        :rtype: int
+        """
+        return None
+
+    def take_over(self, lock):
+        """Removes the expired ``lock`` of another process
+
+        :return: whether the lock is now held by this object, otherwise it
+            must be created again
+        :rtype: bool
+        """
+        self.delete_lock()
+        return False
+
+    def _list_lock(self, **kwargs):
+        return self.k8s.custom_objects.list_namespaced_custom_object(
+            LOCK_GROUP, LOCK_VERSION, LOCK_NAMESPACE, LOCK_PLURAL, **kwargs)
+
+    def _get_resource_version(self, lock):
+        return lock['metadata']['resourceVersion']
+
+    def get_name(self, lock):
+        return lock['metadata']['name']
+
+    def list_locks(self):
+        """Lists all the locks, of any name
+
+        :rtype: list
+        """
+        return self._list_lock()['items']
+
+    def wait_for_release(self, lock, timeout):
+        """Watches ``lock`` until it is deleted or ``timeout`` passes
+
+        :return: whether the lock was deleted
+        :rtype: bool
+        """
+        if timeout <= 0:
+            return False
+        w = watch.Watch()
+        for event in w.stream(
+                self._list_lock,
+                field_selector='metadata.name={}'.format(self.get_name(lock)),
+                resource_version=self._get_resource_version(lock),
+                timeout_seconds=max(int(timeout), 1)):
+            if event['type'] == 'DELETED':
+                w.stop()
+                return True
+        return False
+
     def create_definition(self):
         names = client.V1CustomResourceDefinitionNames(
             kind="Resource", plural=LOCK_PLURAL, singular=LOCK_SINGULAR)
@@ -310,3 +598,133 @@ class LockConfig:
             # If a 409 is received then the definition already exists
             if err.status != 409:
                 raise
+
+
+class LeaseLockConfig(LockConfig):
+    """Lock backed by a ``coordination.k8s.io`` Lease, which needs no custom
+    resource definition. Taking over an expired lease is done with a single
+    conditional update, so only one of several waiting processes succeeds.
+    """
+    def __init__(self, name, bearer_token=None, additional_data=None):
+        super(LeaseLockConfig, self).__init__(
+            name, bearer_token=bearer_token, additional_data=additional_data)
+        self.annotations = {
+            k: str(v)
+            for k, v in (additional_data or {}).items()
+        }
+        self.identity = str(uuid.uuid4())
+        self.lease = None
+
+    def _hold(self, lease):
+        now = datetime.now(timezone.utc)
+        lease.spec.holder_identity = self.identity
+        lease.spec.lease_duration_seconds = CONF.lock_expiration
+        lease.spec.acquire_time = now
+        lease.spec.renew_time = now
+        return lease
+
+    def create_lock(self):
+        """ Creates the Lease object
+        :return: the Lease object
+        :rtype: V1Lease
+        """
+        lease = self._hold(
+            client.V1Lease(
+                metadata=client.V1ObjectMeta(
+                    name=self.full_name, annotations=self.annotations),
+                spec=client.V1LeaseSpec(lease_transitions=0)))
+        self.lease = self.k8s.coordination_api.create_namespaced_lease(
+            LOCK_NAMESPACE, lease)
+        return self.lease
+
+    def get_lock(self):
+        """Retrieves the Lease object
+
+        :return: the Lease object
+        :rtype: V1Lease
+        """
+        try:
+            return self.k8s.coordination_api.read_namespaced_lease(
+                self.full_name, LOCK_NAMESPACE)
+        except ApiException as err:
+            if err.status == 404:
+                return None
+            raise
+
+    def delete_lock(self):
+        """Deletes the Lease, unless another process has taken it over
+
+        :return: whether it was successfully deleted
+        :rtype: bool
+        """
+        body = client.V1DeleteOptions()
+        if self.lease is not None:
+            body.preconditions = client.V1Preconditions(
+                uid=self.lease.metadata.uid,
+                resource_version=self.lease.metadata.resource_version)
+        try:
+            self.k8s.coordination_api.delete_namespaced_lease(
+                self.full_name, LOCK_NAMESPACE, body=body)
+            return True
+        except ApiException as err:
+            # A 404 means something else deleted it, and a 409 that it has
+            # been taken over
+            if err.status in (404, 409):
+                return True
+            raise
+        finally:
+            self.lease = None
+
+    def replace_lock(self):
+        """Renews the Lease
+
+        :return: the Lease object
+        :rtype: V1Lease
+        """
+        self.lease.spec.renew_time = datetime.now(timezone.utc)
+        self.lease = self.k8s.coordination_api.replace_namespaced_lease(
+            self.full_name, LOCK_NAMESPACE, self.lease)
+        return self.lease
+
+    def is_owner(self, lock):
+        return lock.spec.holder_identity == self.identity
+
+    def get_age(self, lock):
+        updated = (
+            lock.spec.renew_time or lock.spec.acquire_time
+            or lock.metadata.creation_timestamp)
+        return datetime.now(timezone.utc) - updated
+
+    def get_duration(self, lock):
+        return lock.spec.lease_duration_seconds
+
+    def take_over(self, lock):
+        lock.spec.lease_transitions = (lock.spec.lease_transitions or 0) + 1
+        try:
+            # The resource version of the expired lease is a precondition of
+            # the update, so this fails if it has been renewed or taken over
+            # by another process in the meantime.
+            self.lease = self.k8s.coordination_api.replace_namespaced_lease(
+                self.full_name, LOCK_NAMESPACE, self._hold(lock))
+            return True
+        except ApiException as err:
+            if err.status in (404, 409):
+                return False
+            raise
+
+    def _list_lock(self, **kwargs):
+        return self.k8s.coordination_api.list_namespaced_lease(
+            LOCK_NAMESPACE, **kwargs)
+
+    def _get_resource_version(self, lock):
+        return lock.metadata.resource_version
+
+    def get_name(self, lock):
+        return lock.metadata.name
+
+    def list_locks(self):
+        return self._list_lock().items
+
+    def create_definition(self):
+        # Leases are built into Kubernetes
+        pass
@@ -11,13 +11,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from copy import deepcopy
 
 from oslo_log import log as logging
 
 from armada import const
 from armada import exceptions
+from armada.handlers.helm import HelmReleaseId
 from armada.handlers import schema
+from armada.utils.release import release_prefixer
 
 LOG = logging.getLogger(__name__)
 
@@ -48,9 +49,10 @@ class Manifest(object):
             are not found or if the document types are missing required
             properties.
         """
-        self.documents = deepcopy(documents)
+        self.documents = [_copy_document(d) for d in documents]
         self.charts, self.groups, manifests = self._find_documents(
             target_manifest)
+        self._index = schema.DocumentIndex(self.charts + self.groups)
 
         if len(manifests) > 1:
             error = (
@@ -114,9 +116,9 @@ class Manifest(object):
         :raises ManifestException: If a chart document with the
             specified name is not found
         """
-        for chart in self.charts:
-            if chart.get('metadata', {}).get('name') == name:
-                return chart
+        chart = self._index.get(schema.TYPE_CHART, name)
+        if chart is not None:
+            return chart
         raise exceptions.BuildChartException(
             details='Could not find {} named "{}"'.format(
                 schema.TYPE_CHART, name))
@@ -130,9 +132,9 @@ class Manifest(object):
         :raises ManifestException: If a chart
             group document with the specified name is not found
         """
-        for group in self.groups:
-            if group.get('metadata', {}).get('name') == name:
-                return group
+        group = self._index.get(schema.TYPE_CHARTGROUP, name)
+        if group is not None:
+            return group
         raise exceptions.BuildChartGroupException(
             details='Could not find {} named "{}"'.format(
                 schema.TYPE_CHARTGROUP, name))
@@ -222,3 +224,42 @@ class Manifest(object):
         self.build_armada_manifest()
 
         return self.manifest
+
+
+def get_release_ids(manifest):
+    """
+    :param manifest: Armada manifest, as built by ``Manifest.get_manifest``
+
+    :return: ids of the releases of all the charts in the manifest
+    """
+    manifest_data = manifest[const.KEYWORD_DATA]
+    prefix = manifest_data[const.KEYWORD_PREFIX]
+    release_ids = []
+    for group in manifest_data.get(const.KEYWORD_GROUPS, []):
+        group_data = group.get(const.KEYWORD_DATA, {})
+        for chart in group_data.get(const.KEYWORD_CHARTS, []):
+            chart_data = chart.get(const.KEYWORD_DATA, {})
+            release_ids.append(
+                HelmReleaseId(
+                    chart_data['namespace'],
+                    release_prefixer(prefix, chart_data['release'])))
+    return release_ids
+
+
+def _copy_document(document):
+    """Copies the parts of ``document`` which building a manifest replaces,
+    which are the document, its data, and its lists of chart group, chart and
+    dependency names. Everything else, e.g. the chart values, is shared with
+    ``document`` rather than deep copied, and must not be changed in place.
+    """
+    if not isinstance(document, dict):
+        return document
+    document = dict(document)
+    data = document.get(const.KEYWORD_DATA)
+    if isinstance(data, dict):
+        data = document[const.KEYWORD_DATA] = dict(data)
+        for key in (const.KEYWORD_GROUPS, const.KEYWORD_CHARTS,
+                    'dependencies'):
+            if isinstance(data.get(key), list):
+                data[key] = list(data[key])
+    return document
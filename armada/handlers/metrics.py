@@ -15,6 +15,8 @@
 from contextlib import ExitStack
 from enum import Enum
 import os
+import threading
+import time
 
 import prometheus_client
 from prometheus_client import multiprocess, values, context_managers
@@ -129,6 +131,109 @@ class ActionWithTimeoutMetrics(ActionMetrics):
         return context
 
 
+class CacheMetrics():
+    """ Support for defining and observing metrics for a cache, tracking hits
+    and misses.
+    """
+
+    _PREFIX = 'armada'
+
+    def __init__(self, prefix, description, labels):
+        """
+        :param prefix: prefix to use for each metric name
+        :param description: description of cache to use in metric description
+        :param labels: label names to define for each metric
+        """
+        self.full_prefix = '{}_{}'.format(self.__class__._PREFIX, prefix)
+        self.hit_total = prometheus_client.Counter(
+            '{}_hit_total'.format(self.full_prefix),
+            'Total hits of {}'.format(description),
+            labels,
+            registry=REGISTRY)
+        self.miss_total = prometheus_client.Counter(
+            '{}_miss_total'.format(self.full_prefix),
+            'Total misses of {}'.format(description),
+            labels,
+            registry=REGISTRY)
+
+    def hit(self, *args, **kwargs):
+        """ Any args are used as metric label values.
+        """
+        self.hit_total.labels(*args, **kwargs).inc()
+
+    def miss(self, *args, **kwargs):
+        """ Any args are used as metric label values.
+        """
+        self.miss_total.labels(*args, **kwargs).inc()
+
+
+class PoolMetrics():
+    """ Support for defining metrics for a connection pool, tracking its size
+    and usage, which are observed when collected.
+    """
+
+    _PREFIX = 'armada'
+    # Seconds between updates of the metrics in multiprocess mode
+    _UPDATE_INTERVAL = 10
+
+    def __init__(self, prefix, description):
+        """
+        :param prefix: prefix to use for each metric name
+        :param description: description of pool to use in metric description
+        """
+        self.full_prefix = '{}_{}'.format(self.__class__._PREFIX, prefix)
+        self._functions = None
+        self._lock = threading.Lock()
+        self._pid = None
+        self.size = prometheus_client.Gauge(
+            '{}_size'.format(self.full_prefix),
+            'Maximum connections of {}'.format(description),
+            registry=REGISTRY,
+            multiprocess_mode='livesum')
+        self.in_use = prometheus_client.Gauge(
+            '{}_in_use'.format(self.full_prefix),
+            'Connections in use of {}'.format(description),
+            registry=REGISTRY,
+            multiprocess_mode='livesum')
+
+    def observe(self, get_size, get_in_use):
+        """ The functions are called when the metrics are collected, except
+        in multiprocess mode, where only the values stored by each process
+        are collected, so that each process rather sets them periodically
+        once :meth:`start` is called.
+
+        :param get_size: function returning the maximum connections
+        :param get_in_use: function returning the connections in use
+        """
+        self._functions = (get_size, get_in_use)
+        if not MULTIPROCESS:
+            self.size.set_function(get_size)
+            self.in_use.set_function(get_in_use)
+
+    def start(self):
+        """ Starts updating the metrics from a thread of the current process
+        in multiprocess mode, unless already started.
+        """
+        if not MULTIPROCESS:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(
+            target=self._run, name=self.full_prefix, daemon=True).start()
+
+    def update(self):
+        get_size, get_in_use = self._functions
+        self.size.set(get_size())
+        self.in_use.set(get_in_use())
+
+    def _run(self):
+        while True:
+            self.update()
+            time.sleep(self._UPDATE_INTERVAL)
+
+
 class ChartDeployAction(Enum):
     """ Enum to define sub-actions for the chart deploy action, to be used as
     label values.
@@ -148,7 +253,9 @@ class ChartDeployAction(Enum):
 
 REGISTRY = prometheus_client.CollectorRegistry()
 
-if "prometheus_multiproc_dir" in os.environ:
+MULTIPROCESS = "prometheus_multiproc_dir" in os.environ
+
+if MULTIPROCESS:
     # For why this is needed see:
     #   https://github.com/prometheus/client_python/issues/275#issuecomment-504755024
     import uwsgi
@@ -175,3 +282,8 @@ CHART_DEPLOY = ActionWithTimeoutMetrics(
     ['manifest', 'chart', 'action'])
 CHART_TEST = ActionWithTimeoutMetrics(
     'chart_test', 'test a chart', ['manifest', 'chart'])
+HELM_COMMAND = ActionMetrics('helm_command', 'run a helm command', ['command'])
+CHART_SOURCE_CACHE = CacheMetrics(
+    'chart_source_cache', 'the persistent chart source cache', ['type'])
+K8S_CONNECTION_POOL = PoolMetrics(
+    'k8s_connection_pool', 'the Kubernetes API client connection pools')
@@ -15,12 +15,11 @@
 import collections.abc
 import json
 
-import yaml
-
 from armada.exceptions import override_exceptions
 from armada.exceptions import validate_exceptions
 from armada.handlers import schema
 from armada.utils import validate
+from armada.utils import yaml as yaml_utils
 
 
 class Override(object):
@@ -28,6 +27,11 @@ class Override(object):
         self.documents = documents
         self.overrides = overrides
         self.values = values
+        # Documents changed since the documents were last validated, by id,
+        # or None until they are first validated.
+        self._changed = None
+        self._validation_cache = {}
+        self._index = None
 
     def _load_yaml_file(self, doc):
         '''
@@ -35,14 +39,19 @@ class Override(object):
         '''
         try:
             with open(doc) as f:
-                return list(yaml.safe_load_all(f.read()))
+                return list(yaml_utils.load_all(f))
         except IOError:
             raise override_exceptions.InvalidOverrideFileException(doc)
 
     def _document_checker(self, doc, ovr=None):
-        # Validate document or raise the appropriate exception
+        # Validate document or raise the appropriate exception. Once
+        # validated, only the documents changed since are validated again.
+        changed = None
+        if self._changed is not None:
+            changed = list(self._changed.values())
         try:
-            valid, details = validate.validate_armada_documents(doc)
+            valid, details = validate.validate_armada_documents(
+                doc, changed=changed, cache=self._validation_cache)
         except (RuntimeError, TypeError):
             raise override_exceptions.InvalidOverrideValueException(ovr)
         if not valid:
@@ -51,6 +60,11 @@ class Override(object):
             else:
                 raise validate_exceptions.InvalidManifestException(
                     error_messages=details)
+        self._changed = {}
+
+    def _set_changed(self, doc):
+        if self._changed is not None:
+            self._changed[id(doc)] = doc
 
     def update(self, d, u):
         for k, v in u.items():
@@ -73,13 +87,18 @@ class Override(object):
         else:
             raise ValueError("Could not find {} document".format(alias))
 
+    def _get_index(self):
+        # Overrides only change the data of documents, so their index is
+        # built once.
+        if self._index is None:
+            self._index = schema.DocumentIndex(self.documents)
+        return self._index
+
     def find_manifest_document(self, doc_path):
-        for doc in self.documents:
-            schema_info = schema.get_schema_info(doc.get('schema'))
-            if schema_info.type == self.find_document_type(
-                    doc_path[0]) and doc.get('metadata',
-                                             {}).get('name') == doc_path[1]:
-                return doc
+        doc = self._get_index().get(
+            self.find_document_type(doc_path[0]), doc_path[1])
+        if doc is not None:
+            return doc
 
         raise override_exceptions.UnknownDocumentOverrideException(
             doc_path[0], doc_path[1])
@@ -121,6 +140,7 @@ class Override(object):
         document = self.find_manifest_document(doc_path)
         new_data = self.array_to_dict(data_path, new_value)
         self.update(document.get('data', {}), new_data)
+        self._set_changed(document)
 
     def update_documents(self, merging_values):
         for doc in merging_values:
@@ -129,15 +149,15 @@ class Override(object):
     def update_document(self, ovr):
         ovr_schema_info = schema.get_schema_info(ovr.get('schema'))
         if ovr_schema_info:
-            for doc in self.documents:
+            for doc in self._get_index().find(ovr_schema_info.type,
+                                              ovr['metadata']['name']):
                 schema_info = schema.get_schema_info(doc.get('schema'))
-                if schema_info:
-                    if schema_info == ovr_schema_info:
-                        if doc['metadata']['name'] == ovr['metadata']['name']:
-                            data = doc.get('data', {})
-                            ovr_data = ovr.get('data', {})
-                            self.update(data, ovr_data)
-                            return
+                if schema_info == ovr_schema_info:
+                    data = doc.get('data', {})
+                    ovr_data = ovr.get('data', {})
+                    self.update(data, ovr_data)
+                    self._set_changed(doc)
+                    return
 
     def update_manifests(self):
 
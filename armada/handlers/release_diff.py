@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import json
+
 from deepdiff import DeepDiff
 
 
@@ -59,7 +62,73 @@ class ReleaseDiff(object):
         old_input = self.make_release_input(self.old_chart, self.old_values)
         new_input = self.make_release_input(self.new_chart, self.new_values)
 
+        # Only diff the subtrees whose content hashes differ, which are
+        # usually few, or none at all for a no-op apply.
+        old_input, new_input = _get_changed_subtrees(old_input, new_input)
+        if not old_input and not new_input:
+            return {}
+
         return DeepDiff(old_input, new_input, view='tree')
 
     def make_release_input(self, chart, values):
         return {'chart': chart, 'values': values}
+
+
+def _get_hash(obj):
+    '''
+    :returns: A canonical content hash of ``obj``, or ``None`` if it is not
+        plain JSON data.
+    '''
+    try:
+        data = json.dumps(obj, sort_keys=True, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(data.encode('utf-8')).digest()
+
+
+def _is_unchanged(old, new):
+    if old is new:
+        return True
+    old_hash = _get_hash(old)
+    if old_hash is None or old_hash != _get_hash(new):
+        return False
+    # The JSON encoding loses some types, e.g. of the keys 1 and '1', so the
+    # content of equal hashes is compared too. The hash in turn tells apart
+    # values which compare equal, e.g. 1 and 1.0.
+    return old == new
+
+
+def _get_changed_subtrees(old_input, new_input):
+    '''
+    Drops the subtrees of the release inputs which are unchanged, two levels
+    deep (e.g. ``chart.templates`` or ``values``), keeping the paths of
+    the remaining subtrees intact.
+
+    :returns: Tuple of the changed old and new subtrees.
+    '''
+    old_changed = {}
+    new_changed = {}
+    for key in set(old_input) | set(new_input):
+        old = old_input.get(key)
+        new = new_input.get(key)
+        if isinstance(old, dict) and isinstance(new, dict):
+            old_sub = {}
+            new_sub = {}
+            for sub_key in set(old) | set(new):
+                if sub_key in old and sub_key in new and _is_unchanged(
+                        old[sub_key], new[sub_key]):
+                    continue
+                if sub_key in old:
+                    old_sub[sub_key] = old[sub_key]
+                if sub_key in new:
+                    new_sub[sub_key] = new[sub_key]
+            if old_sub or new_sub:
+                old_changed[key] = old_sub
+                new_changed[key] = new_sub
+        elif not (key in old_input and key in new_input
+                  and _is_unchanged(old, new)):
+            if key in old_input:
+                old_changed[key] = old
+            if key in new_input:
+                new_changed[key] = new
+    return old_changed, new_changed
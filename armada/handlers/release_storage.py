@@ -0,0 +1,199 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from base64 import b64decode
+import gzip
+import hashlib
+import json
+import threading
+
+from oslo_log import log as logging
+
+from armada.handlers import informer
+
+LOG = logging.getLogger(__name__)
+
+OWNER_LABEL_SELECTOR = 'owner=helm'
+SECRET_NAME_FORMAT = 'sh.helm.release.v1.{}.v{}'
+
+# Statuses of the latest revision of the releases listed by ``helm ls`` with
+# ``--deployed --failed --pending --superseded --uninstalling``.
+LISTED_STATUSES = {
+    'deployed', 'failed', 'pending-install', 'pending-upgrade',
+    'pending-rollback', 'superseded', 'uninstalling'
+}
+
+
+class ReleaseStorage(object):
+    '''
+    Reads helm release records directly from the helm storage secrets, as
+    described here:
+      https://gist.github.com/DzeryCZ/c4adf39d4a1a99ae6e594a183628eaee
+
+    Each revision of a release is stored in a secret labelled with
+    ``owner=helm``, ``name=<release>`` and ``version=<revision>``, so the
+    latest revision can be found with a single labelled list, without running
+    ``helm status``.
+
+    :param k8s: K8s handler to read secrets with.
+    '''
+    def __init__(self, k8s):
+        self.k8s = k8s
+
+    def get_release(self, release_id, version):
+        '''
+        :returns: The decoded release record of revision ``version``.
+        :rtype: dict
+        '''
+        secret = self.k8s.read_namespaced_secret(
+            SECRET_NAME_FORMAT.format(release_id.name, version),
+            release_id.namespace)
+        return decode_release(secret)
+
+    def get_latest_release(self, release_id):
+        '''
+        :returns: The decoded release record of the latest revision, or
+            ``None`` if the release is not found.
+        :rtype: dict
+        '''
+        secrets = self.k8s.list_namespaced_secret(
+            release_id.namespace,
+            label_selector='{},name={}'.format(
+                OWNER_LABEL_SELECTOR, release_id.name)).items
+        latest = _get_latest_secrets(secrets).get(release_id.name)
+        if latest is None:
+            return None
+        return decode_release(latest)
+
+    def get_latest_releases(self, namespace):
+        '''
+        :returns: Mapping of release name to the decoded release record of
+            its latest revision, for every release in ``namespace``.
+        :rtype: dict
+        '''
+        secrets = self.k8s.list_namespaced_secret(
+            namespace, label_selector=OWNER_LABEL_SELECTOR).items
+        return {
+            name: decode_release(secret)
+            for name, secret in _get_latest_secrets(secrets).items()
+        }
+
+
+class ReleaseIndex(object):
+    '''
+    In-memory index of the helm releases of all namespaces, kept up to date
+    by an informer watching the helm storage secrets. The index is built
+    from the secret labels alone, so release records are never decoded, and
+    it is only rebuilt after the secrets change.
+
+    :param k8s: K8s handler to list and watch secrets with.
+    '''
+    def __init__(self, k8s):
+        self._informer = informer.Informer(
+            k8s.client.list_secret_for_all_namespaces,
+            None,
+            label_selector=OWNER_LABEL_SELECTOR)
+        self._lock = threading.Lock()
+        self._started = False
+        self._generation = None
+        self._releases = None
+        self._etag = None
+
+    def get_releases(self, timeout):
+        '''
+        :param timeout: Time in seconds to wait for the secrets to be listed
+            initially.
+        :returns: Tuple of the mapping of namespace to the sorted names of its
+            releases, as listed by ``helm ls``, and an entity tag which only
+            changes along with them.
+        :rtype: tuple
+        :raises: Any error listing the secrets initially.
+        '''
+        with self._lock:
+            if not self._started:
+                self._informer.start()
+                self._started = True
+        generation, secrets = self._informer.get_items({}, timeout)
+        with self._lock:
+            if generation != self._generation:
+                releases = _index_releases(secrets)
+                if releases != self._releases:
+                    self._releases = releases
+                    self._etag = hashlib.sha256(
+                        json.dumps(releases,
+                                   sort_keys=True).encode()).hexdigest()
+                self._generation = generation
+            return self._releases, self._etag
+
+    def stop(self):
+        self._informer.stop()
+
+
+def _index_releases(secrets):
+    latest = {}
+    for secret in secrets:
+        version = _get_version(secret)
+        if version is None:
+            continue
+        labels = secret.metadata.labels
+        key = (secret.metadata.namespace, labels.get('name'))
+        if key not in latest or version > latest[key][0]:
+            latest[key] = (version, labels.get('status'))
+    releases = {}
+    for (namespace, name), (_, status) in latest.items():
+        if status in LISTED_STATUSES:
+            releases.setdefault(namespace, []).append(name)
+    for names in releases.values():
+        names.sort()
+    return releases
+
+
+def _get_version(secret):
+    try:
+        return int(secret.metadata.labels['version'])
+    except (KeyError, TypeError, ValueError):
+        LOG.warning(
+            'Ignoring helm storage secret %s with invalid version label',
+            secret.metadata.name)
+        return None
+
+
+def _get_latest_secrets(secrets):
+    '''
+    :returns: Mapping of release name to the secret of its latest revision.
+    :rtype: dict
+    '''
+    latest = {}
+    for secret in secrets:
+        version = _get_version(secret)
+        if version is None:
+            continue
+        name = secret.metadata.labels.get('name')
+        if name not in latest or version > latest[name][0]:
+            latest[name] = (version, secret)
+    return {name: secret for name, (_, secret) in latest.items()}
+
+
+def decode_release(secret):
+    '''
+    Decodes a helm release record from its storage secret. The record is
+    gzipped JSON, base64 encoded by helm and again by the Kubernetes API.
+
+    :returns: The release record.
+    :rtype: dict
+    '''
+    raw_data = secret.data['release']
+    k8s_data = b64decode(raw_data)
+    helm_data = b64decode(k8s_data)
+    return json.loads(gzip.decompress(helm_data))
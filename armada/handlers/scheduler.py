@@ -0,0 +1,247 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import threading
+import time
+
+from oslo_log import log as logging
+
+from armada import const
+from armada import exceptions
+
+LOG = logging.getLogger(__name__)
+
+
+class ChartNode(object):
+    '''
+    A chart to deploy, along with the charts which must be deployed before it.
+    '''
+    def __init__(self, index, chart, chart_group, cg_test_all_charts):
+        self.index = index
+        self.chart = chart
+        self.chart_group = chart_group
+        # TODO: Remove when v1 doc support is removed.
+        self.cg_test_all_charts = cg_test_all_charts
+        self.depends_on = set()
+        self.dependents = set()
+        self.start_time = None
+        self.end_time = None
+
+    @property
+    def name(self):
+        return self.chart['metadata']['name']
+
+    @property
+    def duration(self):
+        if self.start_time is None or self.end_time is None:
+            return 0
+        return self.end_time - self.start_time
+
+
+class ChartScheduler(object):
+    '''
+    Schedules the charts of a manifest as a dependency graph (DAG) rather
+    than as a sequence of chart groups separated by barriers.
+
+    Each chart is started as soon as the charts it depends on have been
+    deployed. Edges of the graph are derived from:
+
+    * chart group order: each chart depends on every chart of the chart
+      groups listed in its chart group's ``depends_on``, which defaults to
+      the preceding chart group. Chart groups are not assumed to be
+      independent of the preceding ones, e.g. of those deploying the CRDs or
+      namespaces they use, so charts only start ahead of the chart group
+      barrier when their chart group lists its ``depends_on`` explicitly,
+    * ``sequenced`` chart groups: each chart depends on the chart before it
+      in the chart group.
+
+    Chart ``dependencies`` are not edges: they are subcharts which are
+    bundled into the release of the chart, not releases of their own.
+    As edges only lead to charts of preceding chart groups or to preceding
+    charts of the same chart group, the graph cannot have cycles.
+
+    Failures keep the chart group semantics: once any chart fails no further
+    charts are started, charts already in progress are allowed to finish,
+    and the names of the failed charts are reported.
+
+    :param list chart_groups: The built chart group documents of the
+        manifest.
+    :param bool force_wait: Whether to treat every chart group as
+        ``sequenced``.
+    '''
+    def __init__(self, chart_groups, force_wait=False):
+        self.nodes = []
+        self.critical_path = []
+        self._build(chart_groups, force_wait)
+
+    def _build(self, chart_groups, force_wait):
+        group_nodes = {}
+        previous_group = None
+
+        for cg in chart_groups:
+            cg_name = cg.get('metadata').get('name')
+            chartgroup = cg.get(const.KEYWORD_DATA)
+            cg_sequenced = chartgroup.get('sequenced', False) or force_wait
+            cg_test_all_charts = chartgroup.get('test_charts')
+
+            if 'depends_on' in chartgroup:
+                cg_depends_on = chartgroup['depends_on']
+            elif previous_group is not None:
+                cg_depends_on = [previous_group]
+            else:
+                cg_depends_on = []
+
+            upstream = set()
+            for dep_group in cg_depends_on:
+                if dep_group not in group_nodes:
+                    raise exceptions.BuildChartGroupException(
+                        details='Chart group "{}" depends on "{}", which '
+                        'is not a preceding chart group of the '
+                        'manifest'.format(cg_name, dep_group))
+                upstream.update(group_nodes[dep_group])
+
+            cg_nodes = []
+            for chart in chartgroup.get(const.KEYWORD_CHARTS, []):
+                node = ChartNode(
+                    len(self.nodes), chart, cg_name, cg_test_all_charts)
+                node.depends_on.update(upstream)
+                if cg_sequenced and cg_nodes:
+                    node.depends_on.add(cg_nodes[-1].index)
+                self.nodes.append(node)
+                cg_nodes.append(node)
+
+            group_nodes[cg_name] = [node.index for node in cg_nodes]
+            previous_group = cg_name
+
+        for node in self.nodes:
+            for index in node.depends_on:
+                self.nodes[index].dependents.add(node.index)
+
+    def run(self, deploy_chart, executor=None):
+        '''
+        Deploys every chart, each as soon as its dependencies are deployed.
+
+        :param deploy_chart: Callable taking the chart document, whether to
+            test all charts of its chart group, and the count of charts
+            being deployed concurrently, which returns the deploy result.
+        :param executor: Executor to deploy the charts with, which bounds
+            how many charts are deployed concurrently. Defaults to an
+            executor with one worker per chart.
+        :returns: Tuple of the list of deploy results and the list of names
+            of the charts which failed to deploy.
+        :rtype: tuple
+        '''
+        if not self.nodes:
+            return [], []
+
+        if executor is None:
+            with ThreadPoolExecutor(max_workers=len(self.nodes)) as executor:
+                return self.run(deploy_chart, executor)
+
+        results = []
+        failures = []
+        remaining = {node.index: set(node.depends_on) for node in self.nodes}
+        running = {}
+        active = [0]
+        active_lock = threading.Lock()
+
+        def deploy(node):
+            with active_lock:
+                active[0] += 1
+                concurrency = active[0]
+            node.start_time = time.time()
+            try:
+                return deploy_chart(
+                    node.chart, node.cg_test_all_charts, concurrency)
+            finally:
+                node.end_time = time.time()
+                with active_lock:
+                    active[0] -= 1
+
+        def submit_ready():
+            ready = [index for index, deps in remaining.items() if not deps]
+            for index in sorted(ready):
+                node = self.nodes[index]
+                del remaining[index]
+                LOG.info(
+                    'Scheduling chart %s (chart group %s)', node.name,
+                    node.chart_group)
+                running[executor.submit(deploy, node)] = node
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                try:
+                    results.append(future.result())
+                except Exception:
+                    LOG.exception('Chart deploy [{}] failed'.format(node.name))
+                    failures.append(node.name)
+                else:
+                    for dependent in node.dependents:
+                        if dependent in remaining:
+                            remaining[dependent].discard(node.index)
+            if not failures:
+                submit_ready()
+            else:
+                # Don't start charts still queued for a worker.
+                for future in list(running):
+                    if future.cancel():
+                        node = running.pop(future)
+                        remaining[node.index] = node.depends_on
+
+        if remaining:
+            LOG.info(
+                'Skipped charts due to failures: %s',
+                [self.nodes[index].name for index in sorted(remaining)])
+
+        self.critical_path = self._get_critical_path()
+        self._log_critical_path()
+        return results, failures
+
+    def _get_critical_path(self):
+        '''
+        Returns the chain of charts which determined the overall duration,
+        by walking back from the last chart to finish through the dependency
+        which finished last.
+        '''
+        finished = [node for node in self.nodes if node.end_time is not None]
+        if not finished:
+            return []
+
+        node = max(finished, key=lambda n: n.end_time)
+        path = [node]
+        while True:
+            deps = [
+                self.nodes[index] for index in node.depends_on
+                if self.nodes[index].end_time is not None
+            ]
+            if not deps:
+                break
+            node = max(deps, key=lambda n: n.end_time)
+            path.append(node)
+        path.reverse()
+        return path
+
+    def _log_critical_path(self):
+        if not self.critical_path:
+            return
+        start = self.critical_path[0].start_time
+        end = self.critical_path[-1].end_time
+        LOG.info(
+            'Critical path (%.1fs): %s', end - start, ' -> '.join(
+                '{} ({:.1f}s)'.format(node.name, node.duration)
+                for node in self.critical_path))
@@ -15,8 +15,16 @@
 import os
 import re
 from importlib.resources import files
+import threading
 
-import yaml
+import jsonschema
+
+from armada.utils import yaml as yaml_utils
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
 
 # Types
 TYPE_CHART = 'Chart'
@@ -39,6 +47,23 @@ class SchemaInfo(object):
         self.type = type
         self.version = version
         self.data = data
+        # Built once per schema, and shared by all validations.
+        self.validator = jsonschema.Draft4Validator(data)
+        self._fast_validator = None
+        self._fast_validator_lock = threading.Lock()
+
+    def get_fast_validator(self):
+        """Returns a function validating data against this schema, generated
+        and compiled by fastjsonschema on first use, which raises
+        ``fastjsonschema.JsonSchemaValueException`` on the first error found.
+        It is ``None`` if fastjsonschema is not installed.
+        """
+        if fastjsonschema is None:
+            return None
+        with self._fast_validator_lock:
+            if self._fast_validator is None:
+                self._fast_validator = fastjsonschema.compile(self.data)
+            return self._fast_validator
 
     def __eq__(self, other):
         return self.type == other.type and self.version == other.version
@@ -48,6 +73,46 @@ def get_schema_info(name):
     return _SCHEMAS.get(name)
 
 
+def get_document_key(document):
+    """Returns the schema type and ``metadata.name`` of ``document``, the
+    type being None for unknown schemas.
+    """
+    schema_info = get_schema_info(document.get('schema'))
+    return (
+        schema_info.type if schema_info else None,
+        document.get('metadata', {}).get('name'))
+
+
+class DocumentIndex(object):
+    """Index of documents by schema type and ``metadata.name``, built once to
+    look up documents in constant time rather than scanning all of them.
+
+    :param List[dict] documents: Documents to index, in order.
+    """
+    def __init__(self, documents):
+        self._documents = {}
+        for document in documents:
+            self._documents.setdefault(get_document_key(document),
+                                       []).append(document)
+
+    def find(self, type, name):
+        """Returns the documents of schema type ``type`` named ``name``, in
+        the order they were given.
+
+        :rtype: List[dict]
+        """
+        return self._documents.get((type, name), [])
+
+    def get(self, type, name):
+        """Returns the first document of schema type ``type`` named
+        ``name``, or None if there is no such document.
+
+        :rtype: dict
+        """
+        documents = self.find(type, name)
+        return documents[0] if documents else None
+
+
 def _get_schema_info(name, data):
     parts = name.split('/')
     prefix, type, version_string = parts
@@ -68,7 +133,7 @@ def _load_schemas():
     schema_dir = _get_schema_dir()
     for schema_file in os.listdir(schema_dir):
         with open(os.path.join(schema_dir, schema_file)) as f:
-            for schema in yaml.safe_load_all(f):
+            for schema in yaml_utils.load_all(f):
                 name = schema['metadata']['name']
                 if name in _SCHEMAS:
                     raise RuntimeError(
@@ -14,13 +14,16 @@
 
 from abc import ABC, abstractmethod
 import collections
+import concurrent.futures
 import copy
 import math
 import re
 import subprocess  # nosec
+import threading
 import time
 
 from kubernetes import watch
+from kubernetes.client.rest import ApiException
 from oslo_config import cfg
 from oslo_log import log as logging
 from retry import retry
@@ -30,7 +33,10 @@ from armada import const
 from armada.exceptions import k8s_exceptions
 from armada.exceptions import manifest_exceptions
 from armada.exceptions import armada_exceptions
+from armada.handlers import informer
 from armada.handlers.schema import get_schema_info
+from armada.utils import backoff
+from armada.utils import concurrency
 from armada.utils.helm import is_test_pod
 from armada.utils.release import label_selectors
 
@@ -38,6 +44,11 @@ LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 
 ROLLING_UPDATE_STRATEGY_TYPE = 'RollingUpdate'
+HTTP_GONE = 410
+
+# Connection errors after which a watch can be resumed.
+RETRY_EXCEPTIONS = (
+    urllib3.exceptions.ProtocolError, urllib3.exceptions.MaxRetryError)
 ASYNC_UPDATE_NOT_ALLOWED_MSG = 'Async update not allowed: '
 
 
@@ -64,8 +75,9 @@ class ChartWait():
 
         resources = self.wait_config.get('resources')
         if isinstance(resources, list):
-            # Explicit resource config list provided.
-            resources_list = resources
+            # Explicit resource config list provided, which is copied as the
+            # chart document may be shared with the caller.
+            resources_list = copy.deepcopy(resources)
         else:
             # TODO: Remove when v1 doc support is removed.
             if schema_info.version < 2:
@@ -125,6 +137,14 @@ class ChartWait():
 
         self.native_enabled = native.get('enabled', default_native)
 
+        # Determine whether to wait for jobs before other resources, or
+        # else wait for all resources concurrently.
+        # TODO: Remove when v1 doc support is removed.
+        default_jobs_first = schema_info.version < 2
+
+        self.jobs_first = self.wait_config.get(
+            'jobs_first', default_jobs_first)
+
     def get_timeout(self):
         return self.timeout
 
@@ -133,10 +153,74 @@ class ChartWait():
 
     def wait(self, timeout):
         deadline = time.time() + timeout
-        # TODO(seaneagan): Parallelize waits
-        for wait in self.waits:
-            wait.wait(timeout=timeout)
-            timeout = int(round(deadline - time.time()))
+        waits = self.waits
+        if self.jobs_first:
+            # Jobs may perform initialization, so wait for them before
+            # waiting for any other resources.
+            self._wait_all(
+                [w for w in waits if isinstance(w, JobWait)], deadline)
+            waits = [w for w in waits if not isinstance(w, JobWait)]
+        self._wait_all(waits, deadline)
+
+    def _wait_all(self, waits, deadline):
+        '''
+        Runs ``waits`` concurrently until ``deadline``, and then reports the
+        outcome of each of them.
+
+        The first wait to fail other than by timing out stops the others, as
+        the release has failed regardless of them. Stopped waits are not
+        waited for, they end by themselves as soon as they notice.
+
+        :raises: The error of the failed wait, or if several waits failed, a
+            combined error of all of them.
+        '''
+        if not waits:
+            return
+
+        timeout = int(round(deadline - time.time()))
+        stop = threading.Event()
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(waits))
+        try:
+            futures = [executor.submit(w.wait, timeout, stop) for w in waits]
+            done = set()
+            while len(done) < len(futures) and not stop.is_set():
+                finished, _ = concurrent.futures.wait(
+                    set(futures) - done,
+                    return_when=concurrent.futures.FIRST_EXCEPTION)
+                done.update(finished)
+                if any(_is_failure(f.exception()) for f in finished):
+                    stop.set()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        errors = [f.exception() if f in done else None for f in futures]
+
+        report = []
+        for w, f, error in zip(waits, futures, errors):
+            if error:
+                status = 'failed: {}'.format(error)
+            elif f not in done:
+                status = 'stopped'
+            else:
+                status = 'ready'
+            report.append(
+                '{} (labels=({})): {}'.format(
+                    w.resource_type, w.label_selector, status))
+        LOG.info(
+            'Wait results for release %s:\n%s', self.release_id,
+            '\n'.join(report))
+
+        errors = [e for e in errors if e]
+        if len(errors) == 1:
+            raise errors[0]
+        if errors:
+            message = '{} of {} waits failed: {}'.format(
+                len(errors), len(waits), '; '.join(report))
+            if all(isinstance(e,
+                              k8s_exceptions.KubernetesWatchTimeoutException)
+                   for e in errors):
+                raise k8s_exceptions.KubernetesWatchTimeoutException(message)
+            raise armada_exceptions.WaitException(message)
 
     def get_resources_list(self, resources):
         # Use default resource configs, with any provided resource type
@@ -213,6 +297,13 @@ class ChartWait():
                 resource_config['type']))
 
 
+def _is_failure(error):
+    # Waits share the deadline, so after one times out the others are left to
+    # time out as well, to report all resources which were not ready.
+    return error is not None and not isinstance(
+        error, k8s_exceptions.KubernetesWatchTimeoutException)
+
+
 class ResourceWait(ABC):
     def __init__(
             self,
@@ -223,9 +314,12 @@ class ResourceWait(ABC):
             required=True):
         self.resource_type = resource_type
         self.chart_wait = chart_wait
+        self.labels = labels
         self.label_selector = label_selectors(labels)
         self.get_resources = get_resources
         self.required = required
+        # Set to stop waiting, see `ChartWait._wait_all`.
+        self._stop = threading.Event()
 
     @abstractmethod
     def is_resource_ready(self, resource):
@@ -272,10 +366,14 @@ class ResourceWait(ABC):
             LOG.warn('%s unlikely to become ready: %s', resource_desc, e)
             return False
 
-    def wait(self, timeout):
+    def wait(self, timeout, stop=None):
         '''
         :param timeout: time before disconnecting ``Watch`` stream
+        :param threading.Event stop: Event which stops the wait once set.
+        :raises: WaitException if stopped.
         '''
+        if stop is not None:
+            self._stop = stop
 
         min_ready_msg = ', min_ready={}'.format(
             self.min_ready.source) if isinstance(self, ControllerWait) else ''
@@ -316,20 +414,14 @@ class ResourceWait(ABC):
                     'Continuing to wait: %s consecutive attempts without '
                     'modified resources of %s required.', successes,
                     self.chart_wait.k8s_wait_attempts)
-                time.sleep(self.chart_wait.k8s_wait_attempt_sleep)
+                self._stop.wait(self.chart_wait.k8s_wait_attempt_sleep)
         else:
             self._wait(deadline)
 
-    # The Kubernetes Python Client does not always recover from broken
-    # connections to the k8s apiserver, and the resulting uncaught exceptions
-    # in the Watch.stream method cause the chart installation to fail. As long
-    # as the wait deadline has not passed, it is better to retry the entire
-    # wait operation.
-    @retry(
-        exceptions=(
-            urllib3.exceptions.ProtocolError,
-            urllib3.exceptions.MaxRetryError),
-        delay=1)
+    # Broken watch connections are resumed by `_stream_events`, but listing
+    # the resources may still fail the same way. As long as the wait deadline
+    # has not passed, it is better to retry the entire wait operation.
+    @retry(exceptions=RETRY_EXCEPTIONS, delay=1)
     def _wait(self, deadline):
         '''
         Waits for resources to become ready.
@@ -337,18 +429,21 @@ class ResourceWait(ABC):
         ignored.
         '''
 
-        deadline_remaining = int(round(deadline - time.time()))
-        if deadline_remaining <= 0:
-            error = (
-                "Timed out waiting for resource type={}, namespace={}, "
-                "labels={}".format(
-                    self.resource_type, self.chart_wait.release_id.namespace,
-                    self.label_selector))
-            LOG.error(error)
-            raise k8s_exceptions.KubernetesWatchTimeoutException(error)
-
-        timed_out, modified, unready, found_resources = (
-            self._watch_resource_completions(timeout=deadline_remaining))
+        self._check_stopped()
+        with concurrency.K8S_WATCH.hold():
+            deadline_remaining = int(round(deadline - time.time()))
+            if deadline_remaining <= 0:
+                error = (
+                    "Timed out waiting for resource type={}, namespace={}, "
+                    "labels={}".format(
+                        self.resource_type,
+                        self.chart_wait.release_id.namespace,
+                        self.label_selector))
+                LOG.error(error)
+                raise k8s_exceptions.KubernetesWatchTimeoutException(error)
+
+            timed_out, modified, unready, found_resources = (
+                self._watch_resource_completions(timeout=deadline_remaining))
 
         if (not found_resources) and not self.required:
             return None
@@ -373,6 +468,14 @@ class ResourceWait(ABC):
 
         return modified
 
+    def _check_stopped(self):
+        if self._stop.is_set():
+            raise armada_exceptions.WaitException(
+                'Stopped waiting for resource type={}, namespace={}, '
+                'labels={}'.format(
+                    self.resource_type, self.chart_wait.release_id.namespace,
+                    self.label_selector))
+
     def _watch_resource_completions(self, timeout):
         '''
         Watch and wait for resource completions.
@@ -384,9 +487,6 @@ class ResourceWait(ABC):
             'label_selector=(%s), timeout=%s',
             self.chart_wait.release_id.namespace, self.resource_type,
             self.label_selector, timeout)
-        ready = {}
-        modified = set()
-        found_resources = False
 
         if CONF.go_wait:
             command = [
@@ -415,18 +515,125 @@ class ResourceWait(ABC):
                 LOG.info("armada-go wait exception: %s", e)
                 raise armada_exceptions.WaitException(e)
 
+        namespace = self.chart_wait.release_id.namespace
+        if CONF.k8s_wait_informers:
+            deadline = time.time() + timeout
+            with informer.INFORMERS.subscribe(self.get_resources, namespace,
+                                              self.labels,
+                                              timeout) as subscription:
+                return self._handle_resource_events(
+                    subscription.items, lambda: subscription.events(
+                        deadline - time.time(), self._stop))
+
         kwargs = {
-            'namespace': self.chart_wait.release_id.namespace,
+            'namespace': namespace,
             'label_selector': self.label_selector,
             'timeout_seconds': timeout
         }
 
+        deadline = time.time() + timeout
         resource_list = self.get_resources(**kwargs)
-        for resource in resource_list.items:
+
+        return self._handle_resource_events(
+            resource_list.items,
+            lambda: self._stream_events(resource_list, deadline))
+
+    def _stream_events(self, resource_list, deadline):
+        '''
+        Yields watch events for the resources following ``resource_list``,
+        until ``deadline``.
+
+        After a dropped connection, the watch is resumed from the last seen
+        resource version after a jittered backoff. The resources are only
+        listed again once that version has expired, in which case the
+        differences from the last seen resources are yielded as events.
+        '''
+        kwargs = {
+            'namespace': self.chart_wait.release_id.namespace,
+            'label_selector': self.label_selector
+        }
+        # Last seen resources by name
+        resources = {r.metadata.name: r for r in resource_list.items}
+        resource_version = resource_list.metadata.resource_version
+        attempt = 0
+
+        while True:
+            self._check_stopped()
+            timeout = int(round(deadline - time.time()))
+            if timeout <= 0:
+                return
+            try:
+                if resource_version is None:
+                    resource_list = self.get_resources(
+                        timeout_seconds=timeout, **kwargs)
+                    listed = {r.metadata.name: r for r in resource_list.items}
+                    for name in set(resources) - set(listed):
+                        yield {
+                            'type': 'DELETED',
+                            'object': resources.pop(name)
+                        }
+                    for name, resource in listed.items():
+                        old = resources.get(name)
+                        resources[name] = resource
+                        if old is None:
+                            yield {'type': 'ADDED', 'object': resource}
+                        elif (old.metadata.resource_version
+                              != resource.metadata.resource_version):
+                            yield {'type': 'MODIFIED', 'object': resource}
+                    resource_version = resource_list.metadata.resource_version
+                    attempt = 0
+
+                w = watch.Watch()
+                for event in w.stream(self.get_resources,
+                                      resource_version=resource_version,
+                                      allow_watch_bookmarks=True,
+                                      timeout_seconds=timeout, **kwargs):
+                    attempt = 0
+                    resource_version = w.resource_version
+                    event_type = event['type'].upper()
+                    if event_type == 'BOOKMARK':
+                        continue
+                    resource = event['object']
+                    if event_type == 'DELETED':
+                        resources.pop(resource.metadata.name, None)
+                    elif event_type in {'ADDED', 'MODIFIED'}:
+                        resources[resource.metadata.name] = resource
+                    yield event
+                return
+            except ApiException as e:
+                if e.status != HTTP_GONE:
+                    raise
+                LOG.info(
+                    'Resource version %s of %ss (namespace=%s, labels=(%s)) '
+                    'expired, listing again.', resource_version,
+                    self.resource_type, kwargs['namespace'],
+                    self.label_selector)
+                resource_version = None
+            except RETRY_EXCEPTIONS as e:
+                delay = backoff.get_delay(attempt)
+                attempt += 1
+                LOG.warning(
+                    'Watch of %ss (namespace=%s, labels=(%s)) disconnected, '
+                    'resuming from resource version %s in %.1fs: %s',
+                    self.resource_type, kwargs['namespace'],
+                    self.label_selector, resource_version, delay, e)
+                time.sleep(delay)
+
+    def _handle_resource_events(self, resources, stream):
+        '''
+        Evaluates the readiness of ``resources``, and then of the events
+        yielded by ``stream()`` until all resources are ready.
+        Returns the same as ``_watch_resource_completions``.
+        '''
+        ready = {}
+        modified = set()
+        found_resources = False
+
+        for resource in resources:
             # Only include resources that should be included in wait ops
             if self.include_resource(resource):
                 ready[resource.metadata.name] = self.handle_resource(resource)
-        if not resource_list.items:
+        if not resources:
             if not self.required:
                 msg = 'Skipping non-required wait, no %s resources found.'
                 LOG.debug(msg, self.resource_type)
@@ -436,11 +643,8 @@ class ResourceWait(ABC):
             if all(ready.values()):
                 return (False, modified, [], found_resources)
 
-        # Only watch new events.
-        kwargs['resource_version'] = resource_list.metadata.resource_version
-
-        w = watch.Watch()
-        for event in w.stream(self.get_resources, **kwargs):
+        for event in stream():
+            self._check_stopped()
             event_type = event['type'].upper()
             resource = event['object']
             resource_name = resource.metadata.name
@@ -467,7 +671,7 @@ class ResourceWait(ABC):
 
             elif event_type == 'DELETED':
                 LOG.debug('Resource %s: removed from tracking', resource_name)
-                ready.pop(resource_name)
+                ready.pop(resource_name, None)
 
             elif event_type == 'ERROR':
                 LOG.error(
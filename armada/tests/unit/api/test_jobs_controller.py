@@ -0,0 +1,269 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+
+from kubernetes.client.rest import ApiException
+import mock
+
+from armada import api
+from armada.api.controller import armada as armada_api
+from armada.api.controller import jobs as jobs_api
+from armada.api import jobs
+from armada.common.policies import base as policy_base
+from armada.tests import test_utils
+from armada.tests.unit.api import base
+from armada.tests.unit import base as test_base
+
+
+def wait_done(job):
+    while not job.done:
+        job.get_events(len(job.get_events()), timeout=5)
+
+
+def make_store():
+    """Returns a job store whose config maps are kept in a dict."""
+    config_maps = {}
+    core = mock.Mock()
+
+    def create(namespace, body):
+        if body.metadata.name in config_maps:
+            raise ApiException(status=409)
+        config_maps[body.metadata.name] = body
+
+    def replace(name, namespace, body):
+        if name not in config_maps:
+            raise ApiException(status=404)
+        config_maps[name] = body
+
+    def read(name, namespace):
+        if name not in config_maps:
+            raise ApiException(status=404)
+        return config_maps[name]
+
+    def delete(name, namespace):
+        del config_maps[name]
+
+    core.create_namespaced_config_map.side_effect = create
+    core.replace_namespaced_config_map.side_effect = replace
+    core.read_namespaced_config_map.side_effect = read
+    core.delete_namespaced_config_map.side_effect = delete
+    core.list_namespaced_config_map.side_effect = (
+        lambda namespace, label_selector: mock.Mock(
+            items=list(config_maps.values())))
+    return jobs.JobStore(k8s=mock.Mock(client=core))
+
+
+def parse_events(text):
+    events = []
+    for chunk in text.split('\n\n'):
+        fields = dict(
+            line.split(': ', 1) for line in chunk.splitlines()
+            if not line.startswith(':'))
+        if fields:
+            events.append(fields)
+    return events
+
+
+@mock.patch.object(
+    armada_api.Apply, 'handle', armada_api.Apply.handle.__wrapped__)
+class JobsControllerTest(base.BaseControllerTest):
+    def setUp(self):
+        super(JobsControllerTest, self).setUp()
+        manager = jobs.JobManager(store=make_store())
+        for module in (armada_api, jobs_api):
+            patcher = mock.patch.object(module, 'JOBS', manager)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @mock.patch.object(api, 'Helm')
+    @mock.patch.object(armada_api, 'Armada')
+    def test_async_apply(self, mock_armada, mock_helm):
+        self.policy.set_rules(
+            {
+                'armada:create_endpoints': '@',
+                'armada:get_job': '@'
+            })
+        m_helm = mock_helm.return_value
+        m_helm.__enter__.return_value = m_helm
+        proceed = threading.Event()
+
+        def sync():
+            progress = mock_armada.call_args[1]['progress']
+            progress('chart_started', chart='c1')
+            proceed.wait(5)
+            progress('chart_succeeded', chart='c1', result={})
+            return {'install': ['c1']}
+
+        mock_armada.return_value.sync.side_effect = sync
+
+        result = self.app.simulate_post(
+            path='/api/v1.0/apply',
+            body="---\nfoo: bar",
+            headers={'Content-Type': 'application/x-yaml'},
+            params={'async': 'true'})
+
+        self.assertEqual(202, result.status_code)
+        job = result.json['job']
+        self.assertEqual('apply', job['kind'])
+        self.assertEqual(
+            '/api/v1.0/jobs/{}'.format(job['id']), result.headers['location'])
+
+        # Clients reconnect for the remaining events, until the job finished.
+        threading.Timer(0.1, proceed.set).start()
+        received = []
+        last_event_id = '1'
+        while True:
+            events = self.app.simulate_get(
+                '/api/v1.0/jobs/{}/events'.format(job['id']),
+                headers={'Last-Event-ID': last_event_id})
+            if events.status_code == 204:
+                break
+            self.assertEqual(
+                'text/event-stream', events.headers['content-type'])
+            for event in parse_events(events.text):
+                if 'id' in event:
+                    received.append((event['id'], event['event']))
+                    last_event_id = event['id']
+        self.assertEqual(
+            [
+                ('2', 'chart_started'), ('3', 'chart_succeeded'),
+                ('4', 'succeeded')
+            ], received)
+
+        result = self.app.simulate_get(
+            '/api/v1.0/jobs/{}'.format(job['id']), params={'after': '3'})
+        self.assertEqual(200, result.status_code)
+        job = result.json['job']
+        self.assertEqual('succeeded', job['status'])
+        self.assertEqual({'install': ['c1']}, job['result'])
+        self.assertEqual(['succeeded'], [e['type'] for e in job['events']])
+        mock_armada.assert_called_once_with(
+            [{
+                'foo': 'bar'
+            }],
+            helm=m_helm,
+            disable_update_pre=None,
+            disable_update_post=None,
+            enable_chart_cleanup=None,
+            force_wait=None,
+            timeout=None,
+            target_manifest=None,
+            progress=mock.ANY)
+
+    @mock.patch.object(api, 'Helm')
+    @mock.patch.object(armada_api, 'Armada')
+    def test_async_apply_failure(self, mock_armada, mock_helm):
+        self.policy.set_rules(
+            {
+                'armada:create_endpoints': '@',
+                'armada:get_job': '@'
+            })
+        mock_armada.return_value.sync.side_effect = Exception('boom')
+
+        result = self.app.simulate_post(
+            path='/api/v1.0/apply',
+            body="---\nfoo: bar",
+            headers={'Content-Type': 'application/x-yaml'},
+            params={'async': 'true'})
+        job_id = result.json['job']['id']
+        wait_done(jobs_api.JOBS.get(job_id))
+        events = self.app.simulate_get(
+            '/api/v1.0/jobs/{}/events'.format(job_id))
+
+        event = parse_events(events.text)[-1]
+        self.assertEqual('failed', event['event'])
+        self.assertEqual('boom', json.loads(event['data'])['data']['error'])
+        job = self.app.simulate_get(
+            '/api/v1.0/jobs/{}'.format(job_id)).json['job']
+        self.assertEqual('failed', job['status'])
+        self.assertEqual('boom', job['error'])
+
+    def test_job_not_found(self):
+        self.policy.set_rules({'armada:get_job': '@'})
+        for path in ['/api/v1.0/jobs/missing',
+                     '/api/v1.0/jobs/missing/events']:
+            result = self.app.simulate_get(path)
+            self.assertEqual(404, result.status_code)
+
+
+class JobManagerTest(test_base.ArmadaTestCase):
+    @mock.patch.object(jobs, 'JOB_POLL_INTERVAL', 0.01)
+    def test_get_job_of_other_process(self):
+        store = make_store()
+        unit = jobs.JobManager(store=store)
+        other = jobs.JobManager(store=store)
+        proceed = threading.Event()
+
+        def func(job):
+            job.add_event('chart_started', chart='c1')
+            proceed.wait(5)
+            return {'install': ['c1']}
+
+        job = unit.submit('apply', func)
+        snapshot, events = other.get_events(other.get(job.id), 1, timeout=5)
+        self.assertIsNot(job, snapshot)
+        self.assertEqual(['chart_started'], [e['type'] for e in events])
+        self.assertFalse(snapshot.done)
+
+        proceed.set()
+        wait_done(job)
+        snapshot, events = other.get_events(snapshot, 2, timeout=5)
+        self.assertEqual(['succeeded'], [e['type'] for e in events])
+        self.assertEqual(job.to_dict(), snapshot.to_dict())
+        self.assertIsNone(other.get('missing'))
+
+    def test_store_retention(self):
+        self.override_config('api_job_retention', 1)
+        store = make_store()
+        unit = jobs.JobManager(store=store)
+        first = unit.submit('test', lambda job: None)
+        wait_done(first)
+        second = unit.submit('test', lambda job: None)
+        wait_done(second)
+
+        other = jobs.JobManager(store=store)
+        self.assertIsNone(other.get(first.id))
+        self.assertEqual(second.id, other.get(second.id).id)
+
+    def test_retention(self):
+        self.override_config('api_job_retention', 2)
+        unit = jobs.JobManager(store=make_store())
+        proceed = threading.Event()
+        running = unit.submit('test', lambda job: proceed.wait(5))
+        finished = []
+        for i in range(3):
+            job = unit.submit('test', lambda job: None)
+            wait_done(job)
+            finished.append(job)
+
+        # The oldest finished jobs are forgotten, but not running ones.
+        self.assertIs(running, unit.get(running.id))
+        self.assertIsNone(unit.get(finished[0].id))
+        self.assertIsNone(unit.get(finished[1].id))
+        self.assertIs(finished[2], unit.get(finished[2].id))
+        proceed.set()
+
+
+@test_utils.attr(type=['negative'])
+class JobsControllerNegativeRbacTest(base.BaseControllerTest):
+    def test_get_job_insufficient_permissions(self):
+        """Tests the GET /api/v1.0/jobs/{job_id} endpoint returns 403
+        following failed authorization.
+        """
+        rules = {'armada:get_job': policy_base.RULE_ADMIN_REQUIRED}
+        self.policy.set_rules(rules)
+        resp = self.app.simulate_get('/api/v1.0/jobs/any')
+        self.assertEqual(403, resp.status_code)
@@ -16,6 +16,7 @@ import mock
 from oslo_config import cfg
 
 from armada import api
+from armada.api.controller import releases
 from armada.common.policies import base as policy_base
 from armada.tests import test_utils
 from armada.tests.unit.api import base
@@ -87,6 +88,55 @@ class ReleasesControllerTest(base.BaseControllerTest):
         m_helm.list_release_ids.assert_called_once_with()
         m_helm.__exit__.assert_called()
 
+    @mock.patch.object(api, 'Helm')
+    @mock.patch.object(releases, 'get_release_index')
+    def test_helm_releases_cached(self, mock_get_index, mock_helm):
+        """Tests GET /api/v1.0/releases endpoint served from the release
+        index, with entity tags.
+        """
+        rules = {'armada:get_release': '@'}
+        self.policy.set_rules(rules)
+        self.override_config('api_releases_cache', True)
+        index = mock_get_index.return_value
+        index.get_releases.return_value = ({'bar': ['foo']}, 'tag1')
+
+        result = self.app.simulate_get('/api/v1.0/releases')
+        self.assertEqual(200, result.status_code)
+        self.assertEqual({'releases': {'bar': ['foo']}}, result.json)
+        self.assertEqual('"tag1"', result.headers['etag'])
+
+        result = self.app.simulate_get(
+            '/api/v1.0/releases', headers={'If-None-Match': '"tag1"'})
+        self.assertEqual(304, result.status_code)
+        self.assertEqual('', result.text)
+
+        index.get_releases.return_value = ({'bar': ['baz']}, 'tag2')
+        result = self.app.simulate_get(
+            '/api/v1.0/releases', headers={'If-None-Match': '"tag1"'})
+        self.assertEqual(200, result.status_code)
+        self.assertEqual({'releases': {'bar': ['baz']}}, result.json)
+        mock_helm.assert_not_called()
+
+    @mock.patch.object(api, 'Helm')
+    @mock.patch.object(releases, 'get_release_index')
+    def test_helm_releases_cache_unavailable(self, mock_get_index, mock_helm):
+        """Tests GET /api/v1.0/releases endpoint falls back to helm when the
+        release index is unavailable.
+        """
+        rules = {'armada:get_release': '@'}
+        self.policy.set_rules(rules)
+        self.override_config('api_releases_cache', True)
+        mock_get_index.return_value.get_releases.side_effect = Exception(
+            'forbidden')
+        m_helm = mock_helm.return_value
+        m_helm.__enter__.return_value = m_helm
+        m_helm.list_release_ids.return_value = []
+
+        result = self.app.simulate_get('/api/v1.0/releases')
+        self.assertEqual(200, result.status_code)
+        self.assertEqual({'releases': {}}, result.json)
+        m_helm.list_release_ids.assert_called_once_with()
+
 
 class ReleasesControllerNegativeRbacTest(base.BaseControllerTest):
     @test_utils.attr(type=['negative'])
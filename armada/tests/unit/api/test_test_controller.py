@@ -27,8 +27,8 @@ from armada.tests.unit.api import base
 
 
 @mock.patch.object(
-    test.TestReleasesManifestController, 'handle',
-    test.TestReleasesManifestController.handle.__wrapped__)
+    test.TestReleasesManifestController, '_test_manifest',
+    test.TestReleasesManifestController._test_manifest.__wrapped__)
 class TestReleasesManifestControllerTest(base.BaseControllerTest):
     @mock.patch.object(test, 'Manifest')
     @mock.patch.object(api, 'Helm')
@@ -57,6 +57,17 @@ class TestReleasesManifestControllerTest(base.BaseControllerTest):
         mock_Helm.assert_called()
         m_helm.__exit__.assert_called()
 
+    @mock.patch.object(api, 'Helm')
+    def test_test_controller_invalid_yaml(self, mock_Helm):
+        rules = {'armada:test_manifest': '@'}
+        self.policy.set_rules(rules)
+        m_helm = mock_Helm.return_value
+        m_helm.__enter__.return_value = m_helm
+
+        resp = self.app.simulate_post(
+            '/api/v1.0/tests', body='---\nfoo: bar\n---\n: [invalid\n')
+        self.assertEqual(400, resp.status_code)
+
 
 @mock.patch.object(
     test.TestReleasesReleaseNameController, 'handle',
@@ -109,8 +120,8 @@ class TestReleasesReleaseNameControllerTest(base.BaseControllerTest):
 
 @test_utils.attr(type=['negative'])
 @mock.patch.object(
-    test.TestReleasesManifestController, 'handle',
-    test.TestReleasesManifestController.handle.__wrapped__)
+    test.TestReleasesManifestController, '_test_manifest',
+    test.TestReleasesManifestController._test_manifest.__wrapped__)
 class TestReleasesManifestControllerNegativeTest(base.BaseControllerTest):
     @mock.patch.object(test, 'Manifest')
     @mock.patch.object(api, 'Helm')
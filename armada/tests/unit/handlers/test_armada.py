@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import os
 
+from kubernetes.client.rest import ApiException
 import mock
 import yaml
 
@@ -21,6 +23,7 @@ from armada import const
 from armada.handlers import armada
 from armada.tests.unit import base
 from armada.handlers import helm
+from armada.handlers.chartbuilder import get_fingerprint_description
 from armada.utils.release import release_prefixer, get_release_status
 from armada.exceptions import ManifestException
 from armada.exceptions.override_exceptions import InvalidOverrideValueException
@@ -155,6 +158,7 @@ def set_source_dir(ch, manifest=None):
 class ArmadaHandlerTestCase(base.ArmadaTestCase):
     def _test_pre_flight_ops(self, armada_obj, MockChartDownload):
         MockChartDownload.return_value.get_chart.side_effect = set_source_dir
+        armada_obj.helm.namespace_release_metadata.return_value = {}
         armada_obj.pre_flight_ops()
 
         expected_config = {
@@ -313,6 +317,21 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
         self._test_pre_flight_ops(armada_obj, MockChartDownload)
 
         MockChartDownload.return_value.get_chart.assert_called()
+        m_helm.namespace_release_metadata.assert_called_once_with('test')
+        self.assertEqual(
+            {'test': {}}, armada_obj.chart_deploy.release_snapshot)
+
+    @mock.patch.object(armada, 'ChartDownload')
+    def test_pre_flight_ops_download_failure(self, MockChartDownload):
+        """Test pre-flight operations raise chart download failures."""
+        yaml_documents = list(yaml.safe_load_all(TEST_YAML))
+        m_helm = mock.Mock()
+        m_helm.namespace_release_metadata.return_value = {}
+        armada_obj = armada.Armada(yaml_documents, m_helm)
+        MockChartDownload.return_value.get_chart.side_effect = Exception(
+            'download failed')
+
+        self.assertRaises(Exception, armada_obj.pre_flight_ops)
 
     @mock.patch.object(armada, 'ChartDownload')
     def test_post_flight_ops(self, MockChartDownload):
@@ -335,6 +354,40 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
                         const.KEYWORD_DATA).get('source').get('type') == 'git':
                     MockChartDownload.return_value.cleanup.assert_called_with()
 
+    @mock.patch.object(armada, 'ChartDownload')
+    def test_deploy_chart_progress(self, MockChartDownload):
+        """Test chart deploys report their progress."""
+        yaml_documents = list(yaml.safe_load_all(TEST_YAML))
+        progress = mock.Mock()
+        armada_obj = armada.Armada(
+            yaml_documents, mock.Mock(), progress=progress)
+        armada_obj.chart_deploy = mock.Mock()
+        armada_obj.chart_deploy.execute.side_effect = [
+            {
+                'install': helm.HelmReleaseId('test', 'test-chart-1')
+            },
+            Exception('deploy failed')
+        ]
+        chart = {'metadata': {'name': 'example-chart-1'}}
+
+        armada_obj._deploy_chart(chart, None, 'test', 1)
+        self.assertRaises(
+            Exception, armada_obj._deploy_chart, chart, None, 'test', 1)
+
+        progress.assert_has_calls(
+            [
+                mock.call('chart_started', chart='example-chart-1'),
+                mock.call(
+                    'chart_succeeded',
+                    chart='example-chart-1',
+                    result={'install': 'test/test-chart-1'}),
+                mock.call('chart_started', chart='example-chart-1'),
+                mock.call(
+                    'chart_failed',
+                    chart='example-chart-1',
+                    error='deploy failed')
+            ])
+
     # TODO(seaneagan): Separate ChartDeploy tests into separate module.
     # TODO(seaneagan): Once able to make mock library sufficiently thread safe,
     # run sync tests for unsequenced as well by moving them to separate test
@@ -346,8 +399,17 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
             test_success=True,
             test_failure_to_run=False,
             expected_last_test_result=None,
-            diff={'some_key': {'some diff'}}):
+            diff={'some_key': {'some diff'}},
+            dag_scheduling=False,
+            prefetch=True,
+            fingerprint=None):
         """Test install functionality from the sync() method."""
+        self.override_config('dag_scheduling', dag_scheduling)
+        self.override_config('chart_fingerprint', fingerprint is not None)
+        description = None
+        if fingerprint is not None:
+            description = get_fingerprint_description(fingerprint)
+
         @mock.patch.object(armada.Armada, 'post_flight_ops')
         @mock.patch.object(armada, 'ChartDownload')
         @mock.patch('armada.handlers.chart_deploy.ChartBuilder.from_chart_doc')
@@ -359,6 +421,11 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
                 set_source_dir
             # Instantiate Armada object.
             yaml_documents = list(yaml.safe_load_all(TEST_YAML))
+            chart_4 = next(
+                d for d in yaml_documents
+                if d['data'].get('chart_name') == 'test_chart_4')
+            chart_4['data']['wait']['resources'] = [{'type': 'pod'}]
+            original_documents = copy.deepcopy(yaml_documents)
             m_helm = mock.MagicMock()
             armada_obj = armada.Armada(yaml_documents, m_helm)
             prefix = armada_obj.manifest['data']['release_prefix']
@@ -372,7 +439,17 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
                 except StopIteration:
                     return None
 
+            def namespace_release_metadata(namespace):
+                if not prefetch:
+                    raise ApiException(status=403, reason='Forbidden')
+                return {
+                    r['name']: r
+                    for r in known_releases if r['namespace'] == namespace
+                }
+
             m_helm.release_metadata.side_effect = release_metadata
+            m_helm.namespace_release_metadata.side_effect = \
+                namespace_release_metadata
             armada_obj.chart_deploy.get_diff = mock.Mock()
 
             cg = armada_obj.manifest['data']['chart_groups'][0]
@@ -390,12 +467,17 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
 
             # Stub out irrelevant methods called by `armada.sync()`.
             mock_chartbuilder.get_helm_chart.return_value = None
+            mock_chartbuilder.return_value.get_fingerprint.return_value = \
+                fingerprint
 
             # Simulate chart diff, upgrade should only happen if non-empty.
             armada_obj.chart_deploy.get_diff.return_value = diff
 
             armada_obj.sync()
 
+            # The documents which were deployed are left unchanged
+            self.assertEqual(original_documents, yaml_documents)
+
             expected_install_release_calls = []
             expected_upgrade_release_calls = []
             expected_uninstall_release_calls = []
@@ -422,7 +504,8 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
                             release_id,
                             values=chart['values'],
                             wait=native_wait_enabled,
-                            timeout=mock.ANY))
+                            timeout=mock.ANY,
+                            description=description))
                 else:
                     target_release = None
                     for known_release in known_releases:
@@ -445,7 +528,8 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
                                         release_id,
                                         values=chart['values'],
                                         wait=native_wait_enabled,
-                                        timeout=mock.ANY))
+                                        timeout=mock.ANY,
+                                        description=description))
                             else:
                                 p_continue = protected.get(
                                     'continue_processing', False)
@@ -455,8 +539,12 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
                                     if chart_group['sequenced']:
                                         break
 
+                        fingerprint_changed = (
+                            fingerprint is None
+                            or target_release['info'].get('description')
+                            != description)
                         if status == helm.STATUS_DEPLOYED:
-                            if diff:
+                            if diff and fingerprint_changed:
                                 upgrade = chart.get('upgrade', {})
                                 disable_hooks = upgrade.get('no_hooks', False)
                                 options = upgrade.get('options', {})
@@ -470,7 +558,8 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
                                         force=force,
                                         values=chart['values'],
                                         wait=native_wait_enabled,
-                                        timeout=mock.ANY))
+                                        timeout=mock.ANY,
+                                        description=description))
 
                 expected_test_constructor_calls.append(
                     mock.call(
@@ -512,6 +601,20 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
 
             mock_test.assert_has_calls(
                 expected_test_constructor_calls, any_order=True)
+            if fingerprint is not None:
+                get_helm_chart = \
+                    mock_chartbuilder.return_value.get_helm_chart
+                self.assertEqual(
+                    len(expected_upgrade_release_calls),
+                    get_helm_chart.call_count)
+            # Verify that release state is read with a single list per
+            # namespace, unless listing is not permitted.
+            m_helm.namespace_release_metadata.assert_called_once_with('test')
+            if prefetch:
+                m_helm.release_metadata.assert_not_called()
+            else:
+                self.assertEqual(
+                    len(charts), m_helm.release_metadata.call_count)
 
         _do_test()
 
@@ -552,6 +655,37 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
         known_releases = []
         self._test_sync(known_releases)
 
+    def test_armada_sync_without_release_prefetch(self):
+        c1 = 'armada-test_chart_1'
+
+        known_releases = [self.get_mock_release(c1, helm.STATUS_DEPLOYED)]
+        self._test_sync(known_releases, prefetch=False)
+
+    def test_armada_sync_with_chart_fingerprint_changed(self):
+        c1 = 'armada-test_chart_1'
+
+        known_releases = [self.get_mock_release(c1, helm.STATUS_DEPLOYED)]
+        self._test_sync(known_releases, fingerprint='abc')
+
+    def test_armada_sync_with_chart_fingerprint_unchanged(self):
+        c1 = 'armada-test_chart_1'
+
+        release = self.get_mock_release(c1, helm.STATUS_DEPLOYED)
+        release['info']['description'] = get_fingerprint_description('abc')
+        self._test_sync([release], fingerprint='abc')
+
+    def test_armada_sync_with_dag_scheduling(self):
+        c1 = 'armada-test_chart_1'
+
+        known_releases = [self.get_mock_release(c1, helm.STATUS_DEPLOYED)]
+        self._test_sync(known_releases, dag_scheduling=True)
+
+    def test_armada_sync_with_dag_scheduling_failure(self):
+        def _test_method():
+            self._test_sync([], test_success=False, dag_scheduling=True)
+
+        self.assertRaises(ChartDeployException, _test_method)
+
     def test_armada_sync_with_one_deployed_release(self):
         c1 = 'armada-test_chart_1'
 
@@ -642,6 +776,30 @@ class ArmadaHandlerTestCase(base.ArmadaTestCase):
 
         self.assertRaises(ChartDeployException, _test_method)
 
+    @mock.patch.object(armada, 'ChartDownload')
+    def test_get_release_ids(self, MockChartDownload):
+        yaml_documents = list(yaml.safe_load_all(TEST_YAML))
+        override = (
+            'chart:example-chart-1:namespace=other',
+            'chart:example-chart-2:release=renamed')
+
+        armada_obj = armada.Armada(
+            yaml_documents, mock.Mock(), set_ovr=override)
+
+        # The releases are those deployed with the overrides.
+        self.assertEqual(
+            {
+                helm.HelmReleaseId('other', 'armada-test_chart_1'),
+                helm.HelmReleaseId('test', 'armada-renamed'),
+                helm.HelmReleaseId('test', 'armada-test_chart_3'),
+                helm.HelmReleaseId('test', 'armada-test_chart_4')
+            }, set(armada_obj.get_release_ids()))
+
+        # Chart cleanup may purge any release with the manifest prefix.
+        armada_obj = armada.Armada(
+            yaml_documents, mock.Mock(), enable_chart_cleanup=True)
+        self.assertIsNone(armada_obj.get_release_ids())
+
 
 class ArmadaNegativeHandlerTestCase(base.ArmadaTestCase):
     @mock.patch.object(armada, 'ChartDownload')
@@ -0,0 +1,209 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+import ssl
+import threading
+import time
+
+import certifi
+from kubernetes import client
+import testtools
+
+from armada.handlers import async_watch
+from armada.handlers import informer
+from armada.tests.unit import base
+
+if async_watch.aiohttp is not None:
+    from aiohttp import web
+
+
+def pod(name, resource_version):
+    return {
+        'metadata': {
+            'name': name,
+            'namespace': 'test',
+            'labels': {
+                'app': 'x'
+            },
+            'resourceVersion': resource_version
+        }
+    }
+
+
+class FakeApiServer(object):
+    '''
+    Serves pods of the ``test`` namespace: the first watch is disconnected
+    after a bookmark, the resumed watch has expired, and the watch after
+    listing again lasts until cancelled.
+    '''
+    def __init__(self):
+        self.lists = 0
+        self.watches = []
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.runner = asyncio.run_coroutine_threadsafe(
+            self._start(), self.loop).result(5)
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get('/api/v1/namespaces/test/pods', self.handle)
+        runner = web.AppRunner(app, shutdown_timeout=0.1)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return runner
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._stop(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    async def _stop(self):
+        await self.runner.cleanup()
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def handle(self, request):
+        if request.query.get('watch') != 'true':
+            self.lists += 1
+            if self.lists == 1:
+                items, resource_version = [pod('a', '1')], '1'
+            else:
+                items, resource_version = [
+                    pod('a', '1'), pod('b', '2'),
+                    pod('c', '5')
+                ], '5'
+            return web.json_response(
+                {
+                    'items': items,
+                    'metadata': {
+                        'resourceVersion': resource_version
+                    }
+                })
+
+        self.watches.append(dict(request.query))
+        response = web.StreamResponse()
+        await response.prepare(request)
+
+        async def send(event_type, obj):
+            await response.write(
+                json.dumps({
+                    'type': event_type,
+                    'object': obj
+                }).encode() + b'\n')
+
+        if len(self.watches) == 1:
+            await send('ADDED', pod('b', '2'))
+            await send('BOOKMARK', {'metadata': {'resourceVersion': '3'}})
+        elif len(self.watches) == 2:
+            await send(
+                'ERROR', {
+                    'code': 410,
+                    'reason': 'Expired',
+                    'message': 'too old resource version'
+                })
+        else:
+            await asyncio.sleep(60)
+        return response
+
+
+@testtools.skipIf(async_watch.aiohttp is None, 'aiohttp is not installed')
+class WatchEngineTestCase(base.ArmadaTestCase):
+    def setUp(self):
+        super(WatchEngineTestCase, self).setUp()
+        self.override_config('k8s_async_watches', True)
+        self.server = FakeApiServer()
+        self.addCleanup(self.server.close)
+        configuration = client.Configuration()
+        configuration.host = 'http://127.0.0.1:{}'.format(self.server.port)
+        self.api = client.CoreV1Api(client.ApiClient(configuration))
+
+    def test_watch_resume_and_relist(self):
+        unit = informer.Informer(self.api.list_namespaced_pod, 'test')
+        unit.start()
+        self.addCleanup(unit.stop)
+
+        subscription = unit.subscribe({'app': 'x'}, 5)
+        self.assertEqual(['a'], [r.metadata.name for r in subscription.items])
+
+        events = []
+        for event in subscription.events(5):
+            events.append((event['type'], event['object'].metadata.name))
+            if len(events) == 2:
+                break
+        self.assertEqual([('ADDED', 'b'), ('ADDED', 'c')], events)
+
+        deadline = time.time() + 5
+        while len(self.server.watches) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+
+        # The watch resumed from the bookmark without listing again, and
+        # listed again only once the resource version expired.
+        self.assertEqual(2, self.server.lists)
+        self.assertEqual(
+            ['1', '3', '5'],
+            [w['resourceVersion'] for w in self.server.watches])
+        for w in self.server.watches:
+            self.assertEqual('true', w['allowWatchBookmarks'])
+
+
+class ConnectionSettingsTestCase(base.ArmadaTestCase):
+    def get_ca_cert_data(self):
+        # First certificate of the CA bundle of requests.
+        with open(certifi.where()) as f:
+            data = f.read()
+        end = '-----END CERTIFICATE-----'
+        start = data.index('-----BEGIN CERTIFICATE-----')
+        return data[start:data.index(end) + len(end)]
+
+    def test_ssl_context(self):
+        configuration = client.Configuration()
+        configuration.ca_cert_data = self.get_ca_cert_data()
+
+        context = async_watch._get_ssl_context(configuration)
+        self.assertEqual(1, len(context.get_ca_certs()))
+        self.assertTrue(context.check_hostname)
+        self.assertEqual(ssl.CERT_REQUIRED, context.verify_mode)
+
+        configuration.assert_hostname = False
+        context = async_watch._get_ssl_context(configuration)
+        self.assertFalse(context.check_hostname)
+        self.assertEqual(ssl.CERT_REQUIRED, context.verify_mode)
+
+        configuration.verify_ssl = False
+        context = async_watch._get_ssl_context(configuration)
+        self.assertEqual(ssl.CERT_NONE, context.verify_mode)
+
+    def test_request_server_hostname(self):
+        configuration = client.Configuration()
+        api_client = client.ApiClient(configuration)
+        self.assertNotIn(
+            'server_hostname', async_watch._get_request_args(api_client))
+
+        configuration.assert_hostname = 'apiserver'
+        self.assertEqual(
+            'apiserver',
+            async_watch._get_request_args(api_client)['server_hostname'])
+
+        configuration.tls_server_name = 'kubernetes'
+        self.assertEqual(
+            'kubernetes',
+            async_watch._get_request_args(api_client)['server_hostname'])
@@ -0,0 +1,170 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import mock
+
+from armada.handlers import chart_download
+from armada.handlers.chart_download import ChartDownload
+from armada.handlers import metrics
+from armada.tests.unit import base
+
+
+def make_chart(name, location, reference='master'):
+    return {
+        'metadata': {
+            'name': name
+        },
+        'data': {
+            'source': {
+                'type': 'git',
+                'location': location,
+                'reference': reference,
+                'subpath': name
+            }
+        }
+    }
+
+
+@mock.patch.object(chart_download, 'source')
+class ChartDownloadTestCase(base.ArmadaTestCase):
+    def test_concurrent_downloads_deduplicated(self, mock_source):
+        started = threading.Event()
+        release = threading.Event()
+
+        def git_clone(location, reference, **kwargs):
+            started.set()
+            self.assertTrue(release.wait(10))
+            return '/tmp/' + location
+
+        mock_source.git_clone.side_effect = git_clone
+        charts = [make_chart('a', 'repo'), make_chart('b', 'repo')]
+        download = ChartDownload()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(download.get_chart, charts[0])
+            self.assertTrue(started.wait(10))
+            second = executor.submit(download.get_chart, charts[1])
+            release.set()
+            first.result()
+            second.result()
+
+        mock_source.git_clone.assert_called_once_with(
+            'repo',
+            'master',
+            proxy_server=None,
+            auth_method=None,
+            subpath=None)
+        self.assertEqual(('/tmp/repo', 'a'), charts[0]['data']['source_dir'])
+        self.assertEqual(('/tmp/repo', 'b'), charts[1]['data']['source_dir'])
+
+    def test_failed_download_is_retried(self, mock_source):
+        mock_source.git_clone.side_effect = [Exception('clone failed'), '/x']
+        download = ChartDownload()
+
+        self.assertRaises(
+            Exception, download.get_chart, make_chart('a', 'repo'))
+        chart = make_chart('b', 'repo')
+        download.get_chart(chart)
+
+        self.assertEqual(2, mock_source.git_clone.call_count)
+        self.assertEqual(('/x', 'b'), chart['data']['source_dir'])
+
+    @mock.patch.object(chart_download, 'source_cache')
+    def test_cached_git_source(self, mock_source_cache, mock_source):
+        cache = mock_source_cache.get_source_cache.return_value
+        cache.get.side_effect = [None, '/cached']
+        mock_source.resolve_git_ref.return_value = 'abc'
+        mock_source.git_clone.return_value = '/cloned'
+
+        first = make_chart('a', 'repo')
+        ChartDownload().get_chart(first)
+        second = make_chart('a', 'repo')
+        ChartDownload().get_chart(second)
+
+        mock_source.git_clone.assert_called_once()
+        cache.put.assert_called_once_with(
+            ('git', 'repo', 'abc', None), '/cloned')
+        self.assertEqual(('/cloned', 'a'), first['data']['source_dir'])
+        self.assertEqual(('/cached', 'a'), second['data']['source_dir'])
+        self.assertEqual(
+            1,
+            metrics.REGISTRY.get_sample_value(
+                'armada_chart_source_cache_hit_total', {'type': 'git'}))
+
+    @mock.patch.object(chart_download, 'source_cache')
+    def test_cached_tarball_not_modified(self, mock_source_cache, mock_source):
+        cache = mock_source_cache.get_source_cache.return_value
+        cache.get_validator.return_value = {'etag': '"v1"', 'digest': 'abc'}
+        cache.get.return_value = '/cached'
+        mock_source.fetch_tarball.return_value = mock.Mock(path=None)
+        chart = {
+            'metadata': {
+                'name': 'a'
+            },
+            'data': {
+                'source': {
+                    'type': 'tar',
+                    'location': 'http://localhost/a.tgz'
+                }
+            }
+        }
+
+        ChartDownload().get_chart(chart)
+
+        mock_source.fetch_tarball.assert_called_once_with(
+            'http://localhost/a.tgz',
+            verify=False,
+            proxy_server=None,
+            etag='"v1"',
+            checksum=None)
+        cache.get.assert_called_once_with(
+            ('tar', 'http://localhost/a.tgz', 'abc'))
+        cache.put.assert_not_called()
+        self.assertEqual(('/cached', '.'), chart['data']['source_dir'])
+
+    @mock.patch.object(chart_download, 'source_cache')
+    def test_cached_tarball_checksum(self, mock_source_cache, mock_source):
+        cache = mock_source_cache.get_source_cache.return_value
+        cache.get.side_effect = [None, '/cached']
+        cache.get_validator.return_value = None
+        mock_source.fetch_tarball.return_value = mock.Mock(
+            path='/fetched', etag=None, digest='abc')
+
+        charts = []
+        for _ in range(2):
+            chart = {
+                'metadata': {
+                    'name': 'a'
+                },
+                'data': {
+                    'source': {
+                        'type': 'tar',
+                        'location': 'http://localhost/a.tgz',
+                        'checksum': 'ABC'
+                    }
+                }
+            }
+            ChartDownload().get_chart(chart)
+            charts.append(chart)
+
+        # Only downloaded once, without an ETag to revalidate.
+        mock_source.fetch_tarball.assert_called_once()
+        cache.put.assert_called_once_with(
+            ('tar', 'http://localhost/a.tgz', 'abc'), '/fetched')
+        cache.get.assert_called_with(('tar', 'http://localhost/a.tgz', 'abc'))
+        self.assertEqual(('/fetched', '.'), charts[0]['data']['source_dir'])
+        self.assertEqual(('/cached', '.'), charts[1]['data']['source_dir'])
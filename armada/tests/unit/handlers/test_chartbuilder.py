@@ -23,6 +23,8 @@ import yaml
 
 from armada import const
 from armada.handlers.chartbuilder import ChartBuilder
+from armada.handlers.chartbuilder import get_fingerprint_description
+from armada.handlers.chartbuilder import get_release_fingerprint
 from armada.exceptions import chartbuilder_exceptions
 
 
@@ -166,3 +168,58 @@ class ChartBuilderTestCase(BaseChartBuilderTestCase):
         self.assertTrue(expected_symlink_path.is_symlink())
         self.assertEqual(
             dep_chart_dir.path, str(expected_symlink_path.resolve()))
+
+    def test_fingerprint(self):
+        # Main chart directory and files.
+        chart_dir = self.useFixture(fixtures.TempDir())
+        self.addCleanup(shutil.rmtree, chart_dir.path)
+        self._write_temporary_file_contents(
+            chart_dir.path, 'Chart.yaml', self.chart_yaml)
+        chart_doc = yaml.safe_load(self.chart_doc_yaml)
+        chart_doc['data']['source_dir'] = (chart_dir.path, '')
+
+        # Dependency chart directory and files.
+        dep_chart_dir = self.useFixture(fixtures.TempDir())
+        self.addCleanup(shutil.rmtree, dep_chart_dir.path)
+        self._write_temporary_file_contents(
+            dep_chart_dir.path, 'Chart.yaml', self.dep_chart_yaml)
+        dep_chart_doc = yaml.safe_load(self.dep_chart_doc_yaml)
+        dep_chart_doc['data']['source_dir'] = (dep_chart_dir.path, '')
+        chart_doc['data']['dependencies'] = [dep_chart_doc]
+
+        helm_mock = mock.Mock()
+        helm_mock.show_chart.return_value = yaml.safe_load(self.dep_chart_yaml)
+        chartbuilder = ChartBuilder.from_chart_doc(chart_doc, helm_mock)
+        values = {'replicas': 1}
+
+        fingerprint = chartbuilder.get_fingerprint(values)
+        self.assertEqual(fingerprint, chartbuilder.get_fingerprint(values))
+
+        # Values are part of the fingerprint.
+        self.assertNotEqual(
+            fingerprint, chartbuilder.get_fingerprint({'replicas': 2}))
+
+        # Deploy options are part of the fingerprint.
+        options = {'upgrade': {'options': {'no_hooks': True}}}
+        self.assertNotEqual(
+            fingerprint, chartbuilder.get_fingerprint(values, options))
+        self.assertEqual(
+            chartbuilder.get_fingerprint(values, options),
+            chartbuilder.get_fingerprint(values, options))
+
+        # Dependency contents are part of the fingerprint.
+        self._write_temporary_file_contents(
+            dep_chart_dir.path, 'values.yaml', 'replicas: 3')
+        self.assertNotEqual(fingerprint, chartbuilder.get_fingerprint(values))
+
+        helm_mock.upgrade_release.assert_not_called()
+
+    def test_release_fingerprint(self):
+        release = {'info': {'description': get_fingerprint_description('abc')}}
+        self.assertEqual('abc', get_release_fingerprint(release))
+        self.assertIsNone(
+            get_release_fingerprint(
+                {'info': {
+                    'description': 'Upgrade complete'
+                }}))
+        self.assertIsNone(get_release_fingerprint({'info': {}}))
@@ -0,0 +1,64 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import subprocess  # nosec
+
+import mock
+
+from armada.exceptions.helm_exceptions import HelmCommandException
+from armada.handlers import helm
+from armada.handlers import metrics
+from armada.tests.unit import base
+
+
+@mock.patch.object(helm, 'K8s')
+class HelmTestCase(base.ArmadaTestCase):
+    def _get_sample(self, name, command):
+        return metrics.REGISTRY.get_sample_value(
+            'armada_helm_command_{}'.format(name), {'command': command}) or 0
+
+    @mock.patch.object(helm.subprocess, 'run')
+    def test_run_observes_command_metrics(self, mock_run, _):
+        mock_run.return_value.stdout = '{"chart": {}}'
+        before = self._get_sample('attempt_total', 'upgrade --dry-run')
+
+        helm.Helm().upgrade_release(
+            '/tmp/chart', helm.HelmReleaseId('ns', 'name'), dry_run=True)
+
+        self.assertEqual(
+            before + 1, self._get_sample('attempt_total', 'upgrade --dry-run'))
+
+    @mock.patch.object(helm.subprocess, 'run')
+    def test_run_observes_command_failures(self, mock_run, _):
+        mock_run.side_effect = subprocess.CalledProcessError(
+            1, ['helm'], stderr='error')
+        before = self._get_sample('failure_total', 'uninstall')
+
+        self.assertRaises(
+            HelmCommandException,
+            helm.Helm().uninstall_release, helm.HelmReleaseId('ns', 'name'))
+
+        self.assertEqual(
+            before + 1, self._get_sample('failure_total', 'uninstall'))
+
+    @mock.patch.object(helm.subprocess, 'run')
+    def test_show_chart_cached_per_directory(self, mock_run, _):
+        mock_run.return_value.stdout = 'name: helm-toolkit\n'
+        h = helm.Helm()
+
+        for _ in range(3):
+            self.assertEqual(
+                {'name': 'helm-toolkit'}, h.show_chart('/tmp/helm-toolkit'))
+
+        mock_run.assert_called_once()
@@ -0,0 +1,274 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import kubernetes
+from kubernetes.client.rest import ApiException
+import mock
+import urllib3.exceptions
+
+from armada.exceptions import k8s_exceptions
+from armada.handlers import informer
+from armada.tests.unit import base
+
+
+def mock_resource(name, labels, resource_version='1'):
+    resource = mock.Mock()
+    resource.metadata.name = name
+    resource.metadata.labels = labels
+    resource.metadata.resource_version = resource_version
+    return resource
+
+
+def mock_list(items, resource_version='1'):
+    resource_list = mock.Mock(items=items)
+    resource_list.metadata.resource_version = resource_version
+    return resource_list
+
+
+def get_events(subscription):
+    return [
+        (e['type'], e['object'].metadata.name)
+        for e in subscription.events(0.01)
+    ]
+
+
+class InformerTestCase(base.ArmadaTestCase):
+    def get_unit(self, *lists):
+        list_func = mock.Mock(__name__='list_namespaced_pod')
+        list_func.side_effect = lists
+        return informer.Informer(list_func, 'test')
+
+    def test_subscribe_label_index(self):
+        unit = self.get_unit(
+            mock_list(
+                [
+                    mock_resource('a', {
+                        'app': 'x',
+                        'component': 'api'
+                    }),
+                    mock_resource('b', {
+                        'app': 'x',
+                        'component': 'db'
+                    }),
+                    mock_resource('c', {'app': 'y'}),
+                    mock_resource('d', None),
+                ]))
+        unit._list()
+
+        def names(labels):
+            subscription = unit.subscribe(labels, 0)
+            return sorted(r.metadata.name for r in subscription.items)
+
+        self.assertEqual(['a', 'b'], names({'app': 'x'}))
+        self.assertEqual(['a'], names({'app': 'x', 'component': 'api'}))
+        self.assertEqual([], names({'app': 'z'}))
+        self.assertEqual(['a', 'b', 'c', 'd'], names({}))
+
+    def test_subscription_events(self):
+        unit = self.get_unit(mock_list([]))
+        unit._list()
+        subscription = unit.subscribe({'app': 'x'}, 0)
+
+        with unit._lock:
+            unit._update('ADDED', 'a', mock_resource('a', {'app': 'x'}))
+            unit._update('ADDED', 'b', mock_resource('b', {'app': 'y'}))
+            unit._update('MODIFIED', 'a', mock_resource('a', {'app': 'x'}))
+            unit._update('MODIFIED', 'b', mock_resource('b', {'app': 'x'}))
+            # Labels no longer match
+            unit._update('MODIFIED', 'a', mock_resource('a', {'app': 'y'}))
+            unit._update('DELETED', 'b', None)
+
+        self.assertEqual(
+            [
+                ('ADDED', 'a'), ('MODIFIED', 'a'), ('ADDED', 'b'),
+                ('DELETED', 'a'), ('DELETED', 'b')
+            ], get_events(subscription))
+        self.assertEqual({'a'}, unit._get_names({'app': 'y'}))
+        self.assertEqual(set(), unit._get_names({'app': 'x'}))
+
+        unit.unsubscribe(subscription)
+        with unit._lock:
+            unit._update('ADDED', 'c', mock_resource('c', {'app': 'x'}))
+        self.assertEqual([], get_events(subscription))
+
+    def test_subscription_events_stop(self):
+        subscription = informer.Subscription({})
+        stop = threading.Event()
+        self.patchobject(informer, 'STOP_POLL_INTERVAL', 0.01, autospec=False)
+        threading.Timer(0.05, stop.set).start()
+
+        start = time.time()
+        self.assertEqual([], list(subscription.events(5, stop)))
+        self.assertLess(time.time() - start, 5)
+
+    def test_all_namespaces(self):
+        list_func = mock.Mock(__name__='list_secret_for_all_namespaces')
+        a1 = mock_resource('a', {'app': 'x'})
+        a1.metadata.namespace = 'ns1'
+        a2 = mock_resource('a', {'app': 'x'})
+        a2.metadata.namespace = 'ns2'
+        list_func.return_value = mock_list([a1, a2])
+        unit = informer.Informer(list_func, None, label_selector='app=x')
+        unit._list()
+
+        generation, items = unit.get_items({'app': 'x'}, 0)
+        self.assertEqual({a1, a2}, set(items))
+        list_func.assert_called_once_with(label_selector='app=x')
+
+        with unit._lock:
+            unit._update('DELETED', 'ns1/a', None)
+        new_generation, items = unit.get_items({}, 0)
+        self.assertEqual([a2], items)
+        self.assertGreater(new_generation, generation)
+
+    @mock.patch.object(informer, 'watch')
+    def test_relist_on_expired_resource_version(self, mock_watch):
+        unit = self.get_unit(
+            mock_list(
+                [
+                    mock_resource('a', {'app': 'x'}),
+                    mock_resource('b', {'app': 'x'})
+                ]),
+            mock_list(
+                [
+                    mock_resource('a', {'app': 'x'}, '2'),
+                    mock_resource('c', {'app': 'x'}, '2')
+                ], '2'))
+        unit._list()
+        subscription = unit.subscribe({'app': 'x'}, 0)
+
+        def stream(*args, **kwargs):
+            if kwargs['resource_version'] == '1':
+                raise ApiException(status=410)
+            unit._stopped = True
+            return iter([])
+
+        mock_watch.Watch.return_value.stream.side_effect = stream
+        unit._run()
+
+        self.assertEqual(
+            [('DELETED', 'b'), ('MODIFIED', 'a'), ('ADDED', 'c')],
+            get_events(subscription))
+        self.assertEqual('2', unit._resource_version)
+
+    @mock.patch.object(informer.time, 'sleep')
+    @mock.patch.object(informer, 'watch')
+    def test_resume_after_disconnect(self, mock_watch, mock_sleep):
+        unit = self.get_unit(mock_list([mock_resource('a', {'app': 'x'})]))
+        unit._list()
+        subscription = unit.subscribe({'app': 'x'}, 0)
+        resource_versions = []
+
+        def stream(*args, **kwargs):
+            resource_versions.append(kwargs['resource_version'])
+            if len(resource_versions) == 1:
+                return self._disconnect_after(
+                    {
+                        'type': 'BOOKMARK',
+                        'object': {
+                            'kind': 'Pod',
+                            'apiVersion': 'v1',
+                            'metadata': {
+                                'resourceVersion': '3'
+                            }
+                        }
+                    })
+            unit._stopped = True
+            return iter([])
+
+        mock_watch.Watch.return_value.stream.side_effect = stream
+        unit._run()
+
+        # Resumed from the bookmark without listing again.
+        self.assertEqual(['1', '3'], resource_versions)
+        unit.list_func.assert_called_once_with('test')
+        self.assertEqual([], get_events(subscription))
+
+    def _disconnect_after(self, *events):
+        yield from events
+        raise urllib3.exceptions.ProtocolError('Connection broken')
+
+    @mock.patch.object(informer.time, 'sleep')
+    def test_subscribe_list_error(self, mock_sleep):
+        unit = self.get_unit(ApiException(status=403))
+
+        def sleep(delay):
+            # Stop after the first error.
+            unit._stopped = True
+
+        mock_sleep.side_effect = sleep
+        unit._run()
+
+        e = self.assertRaises(ApiException, unit.subscribe, {}, 0)
+        self.assertEqual(403, e.status)
+
+    def test_subscribe_not_synced(self):
+        unit = self.get_unit()
+
+        self.assertRaises(
+            k8s_exceptions.KubernetesWatchTimeoutException, unit.subscribe, {},
+            0)
+        self.assertRaises(
+            k8s_exceptions.KubernetesWatchTimeoutException, unit.get_items, {},
+            0)
+
+
+class InformerCacheTestCase(base.ArmadaTestCase):
+    @mock.patch.object(informer, 'Informer')
+    def test_subscribe_shares_informers(self, mock_informer):
+        informers = [mock.Mock(), mock.Mock()]
+        mock_informer.side_effect = informers
+        unit = informer.InformerCache()
+        list_func = mock.Mock()
+
+        with unit.subscribe(list_func, 'test', {'a': 'b'}, 1):
+            with unit.subscribe(list_func, 'test', {'c': 'd'}, 1):
+                pass
+            informers[0].stop.assert_not_called()
+            with unit.subscribe(list_func, 'other', {}, 1):
+                pass
+            informers[1].stop.assert_called_once_with()
+        informers[0].stop.assert_called_once_with()
+
+        mock_informer.assert_has_calls(
+            [mock.call(list_func, 'test'),
+             mock.call(list_func, 'other')])
+        for i in informers:
+            i.start.assert_called_once_with()
+        self.assertEqual(2, informers[0].subscribe.call_count)
+        self.assertEqual(2, informers[0].unsubscribe.call_count)
+        self.assertEqual({}, unit._informers)
+
+    @mock.patch.object(informer, 'Informer')
+    def test_subscribe_shares_informers_of_api_client(self, mock_informer):
+        unit = informer.InformerCache()
+        api_client = mock.Mock()
+        apis = [
+            kubernetes.client.CoreV1Api(api_client),
+            kubernetes.client.CoreV1Api(api_client),
+            kubernetes.client.CoreV1Api(mock.Mock())
+        ]
+
+        with unit.subscribe(apis[0].list_namespaced_pod, 'test', {}, 1):
+            with unit.subscribe(apis[1].list_namespaced_pod, 'test', {}, 1):
+                self.assertEqual(1, mock_informer.call_count)
+                with unit.subscribe(apis[1].list_namespaced_secret, 'test', {},
+                                    1):
+                    with unit.subscribe(apis[2].list_namespaced_pod, 'test',
+                                        {}, 1):
+                        self.assertEqual(3, mock_informer.call_count)
+        self.assertEqual({}, unit._informers)
@@ -0,0 +1,137 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import socket
+
+from kubernetes import client
+import mock
+
+from armada.handlers import k8s
+from armada.handlers import metrics
+from armada.tests.unit import base
+
+
+class ApiClientTestCase(base.ArmadaTestCase):
+    def setUp(self):
+        super(ApiClientTestCase, self).setUp()
+        self.patchobject(k8s, '_configuration', None, autospec=False)
+        self.patchobject(
+            k8s, '_api_clients', collections.OrderedDict(), autospec=False)
+        self.load_incluster_config = self.patchobject(
+            k8s.config, 'load_incluster_config')
+        self.load_incluster_config.side_effect = (
+            k8s.config.config_exception.ConfigException)
+        self.load_kube_config = self.patchobject(
+            k8s.config, 'load_kube_config')
+        configuration = client.Configuration()
+        configuration.host = 'https://apiserver:6443'
+        get_default_copy = self.patchobject(
+            k8s.client.Configuration, 'get_default_copy', autospec=False)
+        get_default_copy.return_value = configuration
+
+    def test_get_api_client_shared(self):
+        self.override_config('k8s_connection_pool_size', 10)
+
+        api_client = k8s.get_api_client()
+        token_client = k8s.get_api_client('token')
+
+        self.assertIs(api_client, k8s.get_api_client())
+        self.assertIs(token_client, k8s.get_api_client('token'))
+        self.assertIsNot(api_client, token_client)
+        self.load_kube_config.assert_called_once_with()
+
+        configuration = token_client.configuration
+        self.assertEqual('https://apiserver:6443', configuration.host)
+        self.assertEqual(10, configuration.connection_pool_maxsize)
+        self.assertIn(
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            configuration.socket_options)
+        self.assertEqual(
+            'Bearer token',
+            configuration.get_api_key_with_prefix('authorization'))
+        self.assertNotIn('authorization', api_client.configuration.api_key)
+
+    def test_get_api_client_token_ignores_service_account(self):
+        # In cluster, the configuration authenticates with the service
+        # account token, which is refreshed by a hook.
+        configuration = client.Configuration()
+        configuration.host = 'https://10.96.0.1:443'
+        configuration.ssl_ca_cert = '/var/run/secrets/ca.crt'
+        configuration.api_key['BearerToken'] = 'bearer SA-TOKEN'
+        configuration.refresh_api_key_hook = mock.Mock()
+        configuration.cert_file = '/etc/armada/client.crt'
+        client.Configuration.get_default_copy.return_value = configuration
+
+        token_configuration = k8s.get_api_client('token').configuration
+
+        self.assertEqual('https://10.96.0.1:443', token_configuration.host)
+        self.assertEqual(
+            '/var/run/secrets/ca.crt', token_configuration.ssl_ca_cert)
+        self.assertIsNone(token_configuration.cert_file)
+        self.assertIsNone(token_configuration.refresh_api_key_hook)
+        self.assertEqual(
+            {
+                'type': 'api_key',
+                'in': 'header',
+                'key': 'authorization',
+                'value': 'Bearer token'
+            },
+            token_configuration.auth_settings()['BearerToken'])
+        configuration.refresh_api_key_hook.assert_not_called()
+
+    def test_get_api_client_evicts_least_recently_used(self):
+        self.patchobject(k8s, 'MAX_API_CLIENTS', 2, autospec=False)
+
+        first = k8s.get_api_client('first')
+        k8s.get_api_client('second')
+        self.assertIs(first, k8s.get_api_client('first'))
+        k8s.get_api_client('third')
+
+        self.assertEqual(['first', 'third'], list(k8s._api_clients))
+
+    def test_pool_metrics(self):
+        api_client = k8s.get_api_client()
+        pool = api_client.rest_client.pool_manager.connection_from_url(
+            'https://apiserver:6443')
+        maxsize = pool.pool.maxsize
+
+        self.assertEqual(maxsize, k8s.get_pool_size())
+        self.assertEqual(0, k8s.get_pool_in_use())
+
+        conn = pool._get_conn()
+        self.assertEqual(1, k8s.get_pool_in_use())
+        pool._put_conn(conn)
+        self.assertEqual(0, k8s.get_pool_in_use())
+
+    @mock.patch.object(metrics, 'MULTIPROCESS', True)
+    @mock.patch.object(metrics.threading, 'Thread')
+    def test_pool_metrics_multiprocess(self, mock_thread):
+        pool_metrics = metrics.PoolMetrics('test_pool', 'a test pool')
+        pool_metrics.observe(lambda: 4, lambda: 1)
+
+        # Values are stored by each process, rather than computed when
+        # collected, which is not supported in multiprocess mode.
+        pool_metrics.start()
+        pool_metrics.start()
+        mock_thread.assert_called_once_with(
+            target=pool_metrics._run, name='armada_test_pool', daemon=True)
+        pool_metrics.update()
+        self.assertEqual(4, pool_metrics.size._value.get())
+        self.assertEqual(1, pool_metrics.in_use._value.get())
+
+    @mock.patch.object(k8s, 'get_api_client')
+    def test_k8s_uses_shared_api_client(self, get_api_client):
+        k8s.K8s(bearer_token='token')
+        get_api_client.assert_called_once_with('token')
@@ -13,12 +13,15 @@
 # limitations under the License.
 
 import copy
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import threading
 
+from kubernetes import client
 from kubernetes.client.rest import ApiException
 import mock
 import testtools
 
+from armada.handlers.helm import HelmReleaseId
 from armada.handlers import lock
 
 
@@ -56,6 +59,12 @@ class LockTestCase(testtools.TestCase):
             },
             'kind': "Resource"
         }
+        patcher = mock.patch.object(lock, 'watch')
+        self.mock_watch = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_stream = self.mock_watch.Watch.return_value.stream
+        self.mock_stream.return_value = iter([])
+
         with mock.patch("armada.handlers.lock.K8s"):
             self.test_lock = lock.Lock("test")
             self.test_lock.timeout = 1
@@ -171,62 +180,356 @@ class LockTestCase(testtools.TestCase):
         except lock.LockException:
             self.fail("acquire_lock() raised LockException unexpectedly")
 
-    @mock.patch.object(lock.CONF, "lock_update_interval", 0.1)
-    @mock.patch('armada.handlers.lock.ThreadPoolExecutor')
-    @mock.patch('armada.handlers.lock.time', autospec=True)
-    def test_lock_decorator(self, mock_time, mock_thread, _):
+    def test_wait_for_release(self, _):
+        # The lock is recent, so it is only acquired once released
+        self.resp['data']['lastUpdated'] = datetime.utcnow().strftime(
+            '%Y-%m-%dT%H:%M:%SZ')
+        self.mock_create.side_effect = [ApiException(status=409), self.resp]
+        self.mock_read.return_value = self.resp
+        self.mock_stream.return_value = iter(
+            [
+                {
+                    'type': 'MODIFIED',
+                    'object': self.resp
+                }, {
+                    'type': 'DELETED',
+                    'object': self.resp
+                }
+            ])
+
+        self.assertTrue(self.test_lock.acquire_lock())
+
+        self.assertEqual(2, self.mock_create.call_count)
+        self.mock_watch.Watch.return_value.stop.assert_called_once_with()
+        _, kwargs = self.mock_stream.call_args
+        self.assertEqual(
+            'metadata.name=locks.armada.process.test',
+            kwargs['field_selector'])
+        self.assertEqual('95961', kwargs['resource_version'])
+        self.assertEqual(1, kwargs['timeout_seconds'])
+
+    def test_wait_for_release_watch_error(self, _):
+        self.resp['data']['lastUpdated'] = datetime.utcnow().strftime(
+            '%Y-%m-%dT%H:%M:%SZ')
+        self.mock_create.side_effect = [ApiException(status=409), self.resp]
+        self.mock_read.return_value = self.resp
+        self.mock_stream.side_effect = ApiException(status=403)
+
+        with mock.patch.object(lock.time, 'sleep') as mock_sleep:
+            self.assertTrue(self.test_lock.acquire_lock())
+
+        # Falls back to retrying after the acquire delay
+        mock_sleep.assert_called_once_with(self.test_lock.acquire_delay)
+
+    @mock.patch.object(lock.CONF, "lock_update_interval", 0.01)
+    def test_lock_decorator(self, _):
         # read needs to raise a 404 when the lock doesn't exist
         self.mock_read.side_effect = ApiException(status=404)
-        mock_read = self.mock_read
-        resp = self.resp
-
-        def update_get_and_set_return(*args, **kwargs):
-            # Once the lock is 'created' it should no longer raise err
-            mock_read.read_custom_resource.side_effect = None
-            mock_read.read_custom_resource.return_value = resp
-            # Set the mock_create return to return the new lock
-            return resp
-
-        self.mock_create.side_effect = update_get_and_set_return
-        self.mock_replace.return_value = self.resp
-
-        # Mocking the threading in lock_and_thread
-        mock_pool = mock_thread.return_value = mock.Mock()
-        mock_pool.submit = mock.Mock()
-        mock_future = mock_pool.submit.return_value = mock.Mock()
-        mock_future.done = mock.Mock()
-        # future.done() needs to return false so lock.update_lock() gets called
-        mock_future.done.return_value = False
-
-        def clear_done():
-            mock_future.done.return_value = True
-            mock_future.done.side_effect = None
-
-        # After future.done() is called once it can be cleared and return True
-        mock_future.done.side_effect = clear_done
-
-        # Mocking time.time() so it appears that more time has passed than
-        # CONF.lock_update_interval so update_lock() is run
-        # This also affects the acquire_lock() timeout check, which is why
-        # the lock_update_interval is mocked to be a low number
-        test_time = 1550510151.792119
-        mock_time.time = mock.Mock()
+        self.mock_create.return_value = self.resp
+        updated = threading.Event()
 
-        def set_time():
-            nonlocal test_time
-            test_time += lock.CONF.lock_update_interval + 1
-            return test_time
+        def replace(*args, **kwargs):
+            updated.set()
+            return self.resp
 
-        mock_time.time.side_effect = set_time
+        self.mock_replace.side_effect = replace
 
         def func():
-            return
+            # The heartbeat updates the lock while the function runs
+            return updated.wait(5)
 
         test_func_dec = lock.lock_and_thread()(func)
-        test_func_dec.lock = self.test_lock
-        try:
-            test_func_dec()
-        except lock.LockException:
-            self.fail("acquire_lock() raised LockException unexpectedly")
-        except ApiException:
-            self.fail("acquire_lock() raised ApiException unexpectedly")
+        with mock.patch.object(lock, 'Lock',
+                               return_value=self.test_lock) as mock_lock:
+            self.assertTrue(test_func_dec())
+
+        mock_lock.assert_called_once_with('lock', bearer_token=None)
+        self.mock_delete.assert_called_once()
+
+    def test_heartbeat_survives_errors(self, _):
+        mock_lock = mock.Mock()
+        updated = threading.Event()
+
+        def update_lock():
+            if mock_lock.update_lock.call_count > 1:
+                updated.set()
+            else:
+                raise ApiException(status=500)
+
+        mock_lock.update_lock.side_effect = update_lock
+
+        with lock.LockHeartbeat(mock_lock, 0.01) as heartbeat:
+            self.assertTrue(updated.wait(5))
+        self.assertFalse(heartbeat._thread.is_alive())
+
+    def test_heartbeat_stops_when_lock_lost(self, _):
+        mock_lock = mock.Mock()
+        mock_lock.update_lock.side_effect = ApiException(status=409)
+
+        def hold():
+            with lock.LockHeartbeat(mock_lock, 0.01) as heartbeat:
+                heartbeat._thread.join(5)
+                self.assertFalse(heartbeat._thread.is_alive())
+
+        self.assertRaises(lock.LockException, hold)
+        mock_lock.update_lock.assert_called_once_with()
+
+    def test_heartbeat_stops_after_retries(self, _):
+        mock_lock = mock.Mock()
+        mock_lock.update_lock.side_effect = ApiException(status=500)
+
+        def hold():
+            with lock.LockHeartbeat(mock_lock, 0.01) as heartbeat:
+                heartbeat._thread.join(5)
+                self.assertFalse(heartbeat._thread.is_alive())
+
+        self.assertRaises(lock.LockException, hold)
+        self.assertEqual(
+            lock.LOCK_UPDATE_RETRIES, mock_lock.update_lock.call_count)
+
+    @mock.patch.object(lock.CONF, 'lock_scope', 'release')
+    def test_exclusive_lock_waits_for_scoped_locks(self, _):
+        with mock.patch("armada.handlers.lock.K8s"):
+            test_lock = lock.ExclusiveLock("lock")
+        mock_k8s = test_lock.lock_config.k8s = mock.Mock()
+        mock_k8s.create_custom_resource.return_value = self.resp
+        scoped = copy.deepcopy(self.resp)
+        scoped['metadata']['name'] = 'locks.armada.process.lock.release.a.b'
+        scoped['data']['lastUpdated'] = datetime.utcnow().strftime(
+            '%Y-%m-%dT%H:%M:%SZ')
+        other = copy.deepcopy(scoped)
+        other['metadata']['name'] = 'locks.armada.process.other'
+        mock_list = mock_k8s.custom_objects.list_namespaced_custom_object
+        mock_list.side_effect = [
+            {
+                'items': [other, scoped]
+            }, {
+                'items': [other]
+            }
+        ]
+        self.mock_stream.return_value = iter([{'type': 'DELETED'}])
+
+        self.assertTrue(test_lock.acquire_lock())
+
+        _, kwargs = self.mock_stream.call_args
+        self.assertEqual(
+            'metadata.name=locks.armada.process.lock.release.a.b',
+            kwargs['field_selector'])
+        self.assertEqual(2, mock_list.call_count)
+
+
+@mock.patch.object(lock.CONF, 'lock_scope', 'release')
+class ScopedLockTestCase(testtools.TestCase):
+    def setUp(self):
+        super(ScopedLockTestCase, self).setUp()
+        self.locks = {}
+
+        def make_lock(name, bearer_token=None):
+            self.locks[name] = mock.MagicMock(name=name)
+            return self.locks[name]
+
+        patcher = mock.patch.object(lock, 'Lock', side_effect=make_lock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_lock_names(self):
+        release_ids = [
+            HelmReleaseId('ns-b', 'x'),
+            HelmReleaseId('ns-a', 'y'),
+            HelmReleaseId('ns-a', 'x'),
+            HelmReleaseId('ns-a', 'x')
+        ]
+        self.assertEqual(
+            [
+                'lock.release.ns-a.x', 'lock.release.ns-a.y',
+                'lock.release.ns-b.x'
+            ], lock.get_lock_names('lock', release_ids))
+        with mock.patch.object(lock.CONF, 'lock_scope', 'namespace'):
+            self.assertEqual(
+                ['lock.namespace.ns-a', 'lock.namespace.ns-b'],
+                lock.get_lock_names('lock', release_ids))
+
+    def test_lock_decorator_scope(self):
+        calls = []
+
+        def get_release_ids(arg):
+            calls.append(arg)
+            return [HelmReleaseId('ns', 'b'), HelmReleaseId('ns', 'a')]
+
+        def func(arg):
+            return arg
+
+        with mock.patch.object(lock, 'LockSet') as mock_set, \
+                mock.patch.object(lock, 'LockHeartbeat'):
+            self.assertEqual(
+                'x',
+                lock.lock_and_thread(release_ids=get_release_ids)(func)('x'))
+        self.assertEqual(['x'], calls)
+        mock_set.assert_called_once_with(
+            'lock', ['lock.release.ns.a', 'lock.release.ns.b'],
+            bearer_token=None)
+        mock_set.return_value.__enter__.assert_called_once_with()
+
+        # Without known releases the global lock is exclusive
+        with mock.patch.object(lock, 'ExclusiveLock') as mock_exclusive, \
+                mock.patch.object(lock, 'LockHeartbeat'):
+            lock.lock_and_thread(release_ids=lambda arg: None)(func)('x')
+        mock_exclusive.assert_called_once_with('lock', bearer_token=None)
+
+        with mock.patch.object(lock.CONF, 'lock_scope', 'global'), \
+                mock.patch.object(lock, 'LockHeartbeat'):
+            lock.lock_and_thread(release_ids=get_release_ids)(func)('x')
+        self.assertEqual(['x'], calls)
+        self.locks['lock'].__enter__.assert_called_once_with()
+
+    def test_lock_set_acquires_in_order(self):
+        unit = lock.LockSet('lock', ['lock.b', 'lock.a', 'lock.b'])
+        self.locks['lock'].lock_config.get_lock.return_value = None
+        order = mock.Mock()
+        order.attach_mock(self.locks['lock.a'], 'a')
+        order.attach_mock(self.locks['lock.b'], 'b')
+
+        with unit:
+            unit.update_lock()
+
+        self.assertEqual(
+            [
+                mock.call.a.acquire_lock(mock.ANY),
+                mock.call.b.acquire_lock(mock.ANY),
+                mock.call.a.update_lock(),
+                mock.call.b.update_lock(),
+                mock.call.b.release_lock(),
+                mock.call.a.release_lock()
+            ], order.mock_calls)
+
+    def test_lock_set_backs_off_for_global_lock(self):
+        unit = lock.LockSet('lock', ['lock.a'])
+        global_lock = self.locks['lock']
+        held = {'metadata': {'name': 'locks.armada.process.lock'}}
+        global_lock.lock_config.get_lock.side_effect = [held, None]
+        global_lock.expires_in.return_value = 5
+
+        self.assertTrue(unit.acquire_lock())
+
+        self.assertEqual(2, self.locks['lock.a'].acquire_lock.call_count)
+        self.locks['lock.a'].release_lock.assert_called_once_with()
+        global_lock.wait_for_release.assert_called_once_with(held, mock.ANY)
+
+    def test_lock_set_releases_on_error(self):
+        unit = lock.LockSet('lock', ['lock.a', 'lock.b'])
+        self.locks['lock.b'].acquire_lock.side_effect = lock.LockException()
+
+        self.assertRaises(lock.LockException, unit.acquire_lock)
+        self.locks['lock.a'].release_lock.assert_called_once_with()
+        self.locks['lock.b'].release_lock.assert_not_called()
+
+
+def make_lease(holder, renew_time, resource_version='1'):
+    return client.V1Lease(
+        metadata=client.V1ObjectMeta(
+            name='locks.armada.process.test',
+            uid='uid-' + holder,
+            resource_version=resource_version),
+        spec=client.V1LeaseSpec(
+            holder_identity=holder,
+            lease_duration_seconds=10,
+            acquire_time=renew_time,
+            renew_time=renew_time,
+            lease_transitions=0))
+
+
+@mock.patch.object(lock.CONF, 'lock_backend', 'lease')
+@mock.patch.object(lock.time, 'sleep', lambda x: True)
+class LeaseLockTestCase(testtools.TestCase):
+    def setUp(self):
+        super(LeaseLockTestCase, self).setUp()
+        with mock.patch.object(lock.CONF, 'lock_backend', 'lease'), \
+                mock.patch.object(lock, 'K8s'):
+            self.test_lock = lock.Lock('test')
+        self.test_lock.timeout = 1
+        self.test_lock.expire_time = 10
+        self.config = self.test_lock.lock_config
+        self.api = self.config.k8s.coordination_api = mock.Mock()
+
+    def test_backend(self):
+        self.assertIsInstance(self.config, lock.LeaseLockConfig)
+
+    def test_acquire_and_release(self):
+        self.api.create_namespaced_lease.side_effect = (
+            lambda namespace, body: body)
+
+        self.assertTrue(self.test_lock.acquire_lock())
+        _, body = self.api.create_namespaced_lease.call_args[0]
+        self.assertEqual(self.config.identity, body.spec.holder_identity)
+        self.assertEqual(
+            lock.CONF.lock_expiration, body.spec.lease_duration_seconds)
+
+        self.api.replace_namespaced_lease.side_effect = (
+            lambda name, namespace, body: body)
+        self.test_lock.update_lock()
+        self.api.replace_namespaced_lease.assert_called_once_with(
+            'locks.armada.process.test', 'kube-system', body)
+
+        self.test_lock.release_lock()
+        _, kwargs = self.api.delete_namespaced_lease.call_args
+        self.assertEqual(
+            body.metadata.resource_version,
+            kwargs['body'].preconditions.resource_version)
+
+    def test_take_over_expired_lease(self):
+        self.api.create_namespaced_lease.side_effect = ApiException(status=409)
+        expired = make_lease(
+            'other',
+            datetime.now(timezone.utc) - timedelta(seconds=20))
+        self.api.read_namespaced_lease.return_value = expired
+        self.api.replace_namespaced_lease.side_effect = (
+            lambda name, namespace, body: body)
+
+        self.assertTrue(self.test_lock.acquire_lock())
+
+        _, _, body = self.api.replace_namespaced_lease.call_args[0]
+        self.assertEqual(self.config.identity, body.spec.holder_identity)
+        self.assertEqual(1, body.spec.lease_transitions)
+        # The stale resource version guards against concurrent take overs
+        self.assertEqual('1', body.metadata.resource_version)
+
+    def test_lease_duration(self):
+        # The lease outlives the configured expiration, so it is still held
+        lease = make_lease(
+            'other',
+            datetime.now(timezone.utc) - timedelta(seconds=20))
+        lease.spec.lease_duration_seconds = 60
+        self.assertGreater(self.test_lock.expires_in(lease), 0)
+
+        lease.spec.lease_duration_seconds = None
+        self.assertLess(self.test_lock.expires_in(lease), 0)
+
+    def test_take_over_conflict(self):
+        self.api.create_namespaced_lease.side_effect = [
+            ApiException(status=409),
+            ApiException(status=409),
+            make_lease(self.config.identity, datetime.now(timezone.utc))
+        ]
+        expired = make_lease(
+            'other',
+            datetime.now(timezone.utc) - timedelta(seconds=20))
+        renewed = make_lease('other', datetime.now(timezone.utc), '2')
+        self.api.read_namespaced_lease.side_effect = [expired, renewed]
+        self.api.replace_namespaced_lease.side_effect = ApiException(
+            status=409)
+
+        with mock.patch.object(lock, 'watch') as mock_watch:
+            mock_stream = mock_watch.Watch.return_value.stream
+            mock_stream.return_value = iter(
+                [{
+                    'type': 'DELETED',
+                    'object': renewed
+                }])
+
+            self.assertTrue(self.test_lock.acquire_lock())
+
+        # Another process renewed the lease first, so this waited for it to
+        # be released
+        _, kwargs = mock_stream.call_args
+        self.assertEqual('2', kwargs['resource_version'])
+        self.assertEqual(3, self.api.create_namespaced_lease.call_count)
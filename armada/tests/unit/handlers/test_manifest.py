@@ -114,6 +114,23 @@ class ManifestTestCase(testtools.TestCase):
         self.assertEqual(
             obtained_manifest['data'], armada_manifest.manifest['data'])
 
+    def test_get_manifest_keeps_documents(self):
+        original = copy.deepcopy(self.documents)
+        armada_manifest = manifest.Manifest(
+            self.documents, target_manifest='armada-manifest')
+        obtained_manifest = armada_manifest.get_manifest()
+
+        # The given documents are not changed, and chart values are shared
+        # with them rather than copied.
+        self.assertEqual(original, self.documents)
+        group = obtained_manifest['data']['chart_groups'][0]
+        chart = group['data']['chart_group'][0]
+        name = chart['metadata']['name']
+        document = [
+            d for d in self.documents if d['metadata']['name'] == name
+        ][0]
+        self.assertIs(document['data']['values'], chart['data']['values'])
+
     def test_find_documents(self):
         armada_manifest = manifest.Manifest(self.documents)
         chart_documents, chart_groups, manifests = armada_manifest. \
@@ -329,6 +346,17 @@ class ManifestTestCase(testtools.TestCase):
         self.assertEqual(
             expected_helm_toolkit_dependency, memcached_dependencies[0])
 
+    def test_find_duplicate_chart_document(self):
+        duplicate = copy.deepcopy(self.documents[1])
+        duplicate['data']['release'] = 'duplicate'
+        armada_manifest = manifest.Manifest(self.documents + [duplicate])
+
+        # The first chart of a name is found, as listed in the documents.
+        self.assertIs(
+            armada_manifest.charts[1],
+            armada_manifest.find_chart_document(
+                self.documents[1]['metadata']['name']))
+
 
 class ManifestNegativeTestCase(testtools.TestCase):
     def setUp(self):
@@ -16,11 +16,13 @@ import copy
 import json
 import os
 
+import mock
 import testtools
 import yaml
 
 from armada.handlers.override import Override
 from armada.handlers import schema
+from armada.utils import validate
 from armada.exceptions import override_exceptions
 
 
@@ -98,6 +100,29 @@ class OverrideTestCase(testtools.TestCase):
             original_documents[2]['data']['chart_groups'],
             comparison_documents[0]['data']['chart_groups'])
 
+    def test_update_manifests_validates_changed_documents(self):
+        values_yaml = "{}/templates/override-{}-expected.yaml".format(
+            self.basepath, '01')
+        with open(self.base_manifest) as f:
+            documents = list(yaml.safe_load_all(f.read()))
+        override = ('manifest:simple-armada:release_prefix='
+                    'overridden', )
+
+        with mock.patch.object(validate, 'Manifest',
+                               wraps=validate.Manifest) as mock_manifest, \
+                mock.patch.object(validate, 'validate_armada_document',
+                                  wraps=validate.validate_armada_document) \
+                as mock_validate:
+            ovr = Override(documents, override, [values_yaml])
+            ovr.update_manifests()
+
+        # All documents are validated with the values, and then only the
+        # overridden manifest.
+        self.assertEqual(
+            documents + [documents[2]],
+            [c[0][0] for c in mock_validate.call_args_list])
+        self.assertEqual(2, mock_manifest.call_count)
+
     def test_update_manifests_invalid_override_format(self):
         with open(self.base_manifest) as f:
             original_documents = list(yaml.safe_load_all(f.read()))
@@ -311,6 +336,15 @@ class OverrideTestCase(testtools.TestCase):
 
             self.assertEqual(ovr, expected_doc)
 
+    def test_find_manifest_document_skips_unknown_schemas(self):
+        with open(self.base_manifest) as f:
+            documents = list(yaml.safe_load_all(f.read()))
+        unknown = {'schema': 'unknown/Document/v1', 'metadata': {}}
+        ovr = Override([unknown] + documents)
+
+        self.assertIs(
+            documents[0], ovr.find_manifest_document(['chart', 'blog-1']))
+
     def test_convert_array_to_dict_valid(self):
         data_path = ['a', 'b', 'c']
         new_value = "dev"
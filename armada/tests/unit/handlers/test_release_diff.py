@@ -31,3 +31,90 @@ class ReleaseDiffTestCase(base.ArmadaTestCase):
             mock.sentinel.old_chart, mock.sentinel.old_values,
             mock.sentinel.new_chart, mock.sentinel.new_values).get_diff()
         self.assertTrue(diff)
+
+
+# Test diffs narrowed to the changed subtrees of the release inputs.
+class ReleaseDiffSubtreeTestCase(base.ArmadaTestCase):
+    def _get_chart(self, templates=None, files=None):
+        return {
+            'metadata': {
+                'name': 'chart',
+                'version': '0.1.0'
+            },
+            'templates':
+            templates or [{
+                'name': 'templates/a.yaml',
+                'data': 'YQ=='
+            }],
+            'files':
+            files or [],
+            'values': {
+                'replicas': 1
+            }
+        }
+
+    def test_same_content(self):
+        with mock.patch('armada.handlers.release_diff.DeepDiff') as m_diff:
+            diff = ReleaseDiff(
+                self._get_chart(), {
+                    'a': 1
+                }, self._get_chart(), {
+                    'a': 1
+                }).get_diff()
+
+        self.assertFalse(diff)
+        m_diff.assert_not_called()
+
+    def test_diff_narrowed_to_changed_subtree(self):
+        new_chart = self._get_chart(
+            templates=[{
+                'name': 'templates/a.yaml',
+                'data': 'Yg=='
+            }])
+        old_chart = self._get_chart()
+
+        with mock.patch('armada.handlers.release_diff.DeepDiff') as m_diff:
+            ReleaseDiff(old_chart, {}, new_chart, {}).get_diff()
+
+        m_diff.assert_called_once_with(
+            {'chart': {
+                'templates': old_chart['templates']
+            }}, {'chart': {
+                'templates': new_chart['templates']
+            }},
+            view='tree')
+
+    def test_diff_key_types(self):
+        chart = self._get_chart()
+
+        diff = ReleaseDiff(chart, {
+            'a': {
+                1: 'x'
+            }
+        }, chart, {
+            'a': {
+                '1': 'x'
+            }
+        }).get_diff()
+
+        self.assertTrue(diff)
+
+    def test_diff_paths(self):
+        old_chart = self._get_chart()
+        new_chart = self._get_chart(files=[{'name': 'f', 'data': 'Zg=='}])
+
+        diff = ReleaseDiff(old_chart, {
+            'a': 1
+        }, new_chart, {
+            'a': 2,
+            'b': 1
+        }).get_diff()
+
+        self.assertEqual(
+            ["root['values']['b']"],
+            [item.path() for item in diff['dictionary_item_added']])
+        self.assertEqual(
+            ["root['chart']['files'][0]", "root['values']['a']"],
+            sorted(
+                item.path() for item in diff['values_changed']
+                | diff['iterable_item_added']))
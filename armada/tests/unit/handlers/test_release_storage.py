@@ -0,0 +1,144 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from base64 import b64encode
+import gzip
+import json
+from unittest import mock
+
+from armada.handlers.helm import HelmReleaseId
+from armada.handlers import release_storage
+from armada.tests.unit import base
+
+
+def make_secret(name, version, namespace='test', status='deployed'):
+    record = {'name': name, 'namespace': namespace, 'version': version}
+    helm_data = b64encode(gzip.compress(json.dumps(record).encode()))
+    secret = mock.Mock()
+    secret.metadata.name = release_storage.SECRET_NAME_FORMAT.format(
+        name, version)
+    secret.metadata.namespace = namespace
+    secret.metadata.resource_version = '{}.{}'.format(name, version)
+    secret.metadata.labels = {
+        'name': name,
+        'owner': 'helm',
+        'status': status,
+        'version': str(version)
+    }
+    secret.data = {'release': b64encode(helm_data).decode()}
+    return secret
+
+
+class ReleaseStorageTestCase(base.ArmadaTestCase):
+    def setUp(self):
+        super(ReleaseStorageTestCase, self).setUp()
+        self.k8s = mock.Mock()
+        self.storage = release_storage.ReleaseStorage(self.k8s)
+
+    def test_get_release(self):
+        self.k8s.read_namespaced_secret.return_value = make_secret('a', 2)
+
+        release = self.storage.get_release(HelmReleaseId('test', 'a'), 2)
+
+        self.assertEqual(
+            {
+                'name': 'a',
+                'namespace': 'test',
+                'version': 2
+            }, release)
+        self.k8s.read_namespaced_secret.assert_called_once_with(
+            'sh.helm.release.v1.a.v2', 'test')
+
+    def test_get_latest_release(self):
+        self.k8s.list_namespaced_secret.return_value.items = [
+            make_secret('a', 9),
+            make_secret('a', 10),
+            make_secret('a', 2)
+        ]
+
+        release = self.storage.get_latest_release(HelmReleaseId('test', 'a'))
+
+        self.assertEqual(10, release['version'])
+        self.k8s.list_namespaced_secret.assert_called_once_with(
+            'test', label_selector='owner=helm,name=a')
+        self.k8s.read_namespaced_secret.assert_not_called()
+
+    def test_get_latest_release_not_found(self):
+        self.k8s.list_namespaced_secret.return_value.items = []
+
+        self.assertIsNone(
+            self.storage.get_latest_release(HelmReleaseId('test', 'a')))
+
+    def test_get_latest_releases(self):
+        invalid = make_secret('c', 1)
+        invalid.metadata.labels['version'] = 'bad'
+        self.k8s.list_namespaced_secret.return_value.items = [
+            make_secret('a', 1),
+            make_secret('b', 3),
+            make_secret('a', 2), invalid
+        ]
+
+        releases = self.storage.get_latest_releases('test')
+
+        self.assertEqual(
+            {
+                'a': 2,
+                'b': 3
+            }, {
+                name: r['version']
+                for name, r in releases.items()
+            })
+        self.k8s.list_namespaced_secret.assert_called_once_with(
+            'test', label_selector='owner=helm')
+
+
+@mock.patch.object(
+    release_storage.informer.Informer, 'start', lambda self: self._list())
+class ReleaseIndexTestCase(base.ArmadaTestCase):
+    def setUp(self):
+        super(ReleaseIndexTestCase, self).setUp()
+        self.k8s = mock.Mock()
+        self.list_func = self.k8s.client.list_secret_for_all_namespaces
+        self.list_func.__name__ = 'list_secret_for_all_namespaces'
+        self.index = release_storage.ReleaseIndex(self.k8s)
+
+    def test_get_releases(self):
+        self.list_func.return_value = mock.Mock(
+            items=[
+                make_secret('b', 1),
+                make_secret('a', 1, status='superseded'),
+                make_secret('a', 2),
+                # Names are only unique within a namespace
+                make_secret('a', 1, namespace='other', status='failed'),
+                make_secret('c', 1, status='superseded'),
+                make_secret('c', 2, status='uninstalled'),
+            ])
+
+        releases, etag = self.index.get_releases(0)
+
+        self.assertEqual({'test': ['a', 'b'], 'other': ['a']}, releases)
+        self.list_func.assert_called_once_with(label_selector='owner=helm')
+
+        # The index is reused until the secrets change, and its entity tag
+        # until the releases do.
+        self.assertIs(releases, self.index.get_releases(0)[0])
+        self.index._informer.apply_event(
+            'ADDED', make_secret('b', 2, status='pending-upgrade'))
+        self.assertEqual((releases, etag), self.index.get_releases(0))
+
+        self.index._informer.apply_event(
+            'DELETED', make_secret('a', 1, namespace='other'))
+        releases, new_etag = self.index.get_releases(0)
+        self.assertEqual({'test': ['a', 'b']}, releases)
+        self.assertNotEqual(etag, new_etag)
@@ -0,0 +1,171 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from armada import exceptions
+from armada.handlers.scheduler import ChartScheduler
+from armada.tests.unit import base
+
+
+def make_chart(name, dependencies=None):
+    return {
+        'schema': 'armada/Chart/v2',
+        'metadata': {
+            'name': name
+        },
+        'data': {
+            'release': name,
+            'namespace': 'test',
+            'dependencies': dependencies or []
+        }
+    }
+
+
+def make_group(name, charts, sequenced=False, depends_on=None):
+    data = {'sequenced': sequenced, 'chart_group': charts}
+    if depends_on is not None:
+        data['depends_on'] = depends_on
+    return {
+        'schema': 'armada/ChartGroup/v2',
+        'metadata': {
+            'name': name
+        },
+        'data': data
+    }
+
+
+class ChartSchedulerTestCase(base.ArmadaTestCase):
+    def _get_deps(self, scheduler):
+        return {
+            node.name:
+            sorted(scheduler.nodes[index].name for index in node.depends_on)
+            for node in scheduler.nodes
+        }
+
+    def test_group_order_edges(self):
+        a, b, c = make_chart('a'), make_chart('b'), make_chart('c')
+        scheduler = ChartScheduler(
+            [make_group('g1', [a, b]),
+             make_group('g2', [c])])
+
+        self.assertEqual(
+            {
+                'a': [],
+                'b': [],
+                'c': ['a', 'b']
+            }, self._get_deps(scheduler))
+
+    def test_sequenced_edges(self):
+        charts = [make_chart('a'), make_chart('b'), make_chart('c')]
+        scheduler = ChartScheduler([make_group('g1', charts, sequenced=True)])
+
+        self.assertEqual(
+            {
+                'a': [],
+                'b': ['a'],
+                'c': ['b']
+            }, self._get_deps(scheduler))
+
+    def test_force_wait_sequences_groups(self):
+        charts = [make_chart('a'), make_chart('b')]
+        scheduler = ChartScheduler([make_group('g1', charts)], force_wait=True)
+
+        self.assertEqual({'a': [], 'b': ['a']}, self._get_deps(scheduler))
+
+    def test_depends_on_relaxes_group_order(self):
+        a, b, c = make_chart('a'), make_chart('b'), make_chart('c')
+        scheduler = ChartScheduler(
+            [
+                make_group('g1', [a]),
+                make_group('g2', [b]),
+                make_group('g3', [c], depends_on=['g1'])
+            ])
+
+        self.assertEqual(
+            {
+                'a': [],
+                'b': ['a'],
+                'c': ['a']
+            }, self._get_deps(scheduler))
+
+    def test_chart_dependencies_not_edges(self):
+        # Dependencies are subcharts of the release of the chart.
+        a = make_chart('a')
+        b = make_chart('b', dependencies=[a])
+        scheduler = ChartScheduler([make_group('g1', [b, a])])
+
+        self.assertEqual({'a': [], 'b': []}, self._get_deps(scheduler))
+
+    def test_depends_on_unknown_group(self):
+        self.assertRaises(
+            exceptions.BuildChartGroupException, ChartScheduler,
+            [make_group('g1', [make_chart('a')], depends_on=['g2'])])
+
+    def test_run_starts_charts_when_dependencies_deployed(self):
+        slow, fast, after_fast = (
+            make_chart('slow'), make_chart('fast'), make_chart('after_fast'))
+        scheduler = ChartScheduler(
+            [
+                make_group('g1', [slow]),
+                make_group('g2', [fast], depends_on=[]),
+                make_group('g3', [after_fast], depends_on=['g2'])
+            ])
+        slow_release = threading.Event()
+        deployed = []
+
+        def deploy_chart(chart, cg_test_all_charts, concurrency):
+            name = chart['metadata']['name']
+            if name == 'slow':
+                # Only finish once the dependent of `fast` has run.
+                self.assertTrue(slow_release.wait(10))
+            if name == 'after_fast':
+                slow_release.set()
+            deployed.append(name)
+            return {'install': name}
+
+        results, failures = scheduler.run(deploy_chart)
+
+        self.assertEqual([], failures)
+        self.assertEqual(['fast', 'after_fast', 'slow'], deployed)
+        self.assertEqual(3, len(results))
+
+    def test_run_stops_scheduling_after_failure(self):
+        charts = [make_chart('a'), make_chart('b'), make_chart('c')]
+        scheduler = ChartScheduler([make_group('g1', charts, sequenced=True)])
+        deployed = []
+
+        def deploy_chart(chart, cg_test_all_charts, concurrency):
+            name = chart['metadata']['name']
+            deployed.append(name)
+            if name == 'b':
+                raise Exception('deploy failed')
+            return {'install': name}
+
+        results, failures = scheduler.run(deploy_chart)
+
+        self.assertEqual(['b'], failures)
+        self.assertEqual(['a', 'b'], deployed)
+        self.assertEqual([{'install': 'a'}], results)
+
+    def test_critical_path(self):
+        charts = [make_chart('a'), make_chart('b')]
+        scheduler = ChartScheduler(
+            [make_group('g1', charts[:1]),
+             make_group('g2', charts[1:])])
+
+        scheduler.run(lambda *args: {})
+
+        self.assertEqual(
+            ['a', 'b'], [node.name for node in scheduler.critical_path])
@@ -12,9 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+import time
+
+from kubernetes.client.rest import ApiException
 import mock
+import urllib3.exceptions
 
 from armada import const
+from armada.exceptions import armada_exceptions
+from armada.exceptions import k8s_exceptions
 from armada.exceptions import manifest_exceptions
 from armada.handlers import helm
 from armada.handlers import wait
@@ -197,6 +204,88 @@ class ChartWaitTestCase(base.ArmadaTestCase):
         for w in unit.waits:
             w.wait.assert_called_once()
 
+    def test_wait_concurrent(self):
+        unit = self.get_unit({})
+        barrier = threading.Barrier(len(unit.waits), timeout=5)
+        for w in unit.waits:
+            w.wait = mock.Mock(
+                side_effect=lambda timeout, stop: barrier.wait())
+
+        # Waits would deadlock on the barrier unless run concurrently.
+        unit.wait(10)
+
+        self.assertFalse(barrier.broken)
+        for w in unit.waits:
+            w.wait.assert_called_once_with(10, mock.ANY)
+
+    def test_wait_jobs_first(self):
+        unit = self.get_unit({'wait': {'jobs_first': True}})
+        calls = []
+        lock = threading.Lock()
+        for w in unit.waits:
+
+            def record(timeout, stop, resource_type=w.resource_type):
+                with lock:
+                    calls.append(resource_type)
+
+            w.wait = mock.Mock(side_effect=record)
+
+        unit.wait(10)
+
+        self.assertEqual('job', calls[0])
+        self.assertEqual(
+            ['daemonset', 'deployment', 'pod', 'statefulset'],
+            sorted(calls[1:]))
+
+    def test_wait_jobs_first_default_v1(self):
+        self.assertTrue(self.get_unit({}, version=1).jobs_first)
+        self.assertFalse(self.get_unit({}).jobs_first)
+
+    def test_wait_combined_errors(self):
+        unit = self.get_unit({})
+        for w in unit.waits:
+            w.wait = mock.Mock()
+        unit.waits[1].wait.side_effect = (
+            k8s_exceptions.KubernetesWatchTimeoutException('first'))
+        unit.waits[3].wait.side_effect = (
+            k8s_exceptions.KubernetesWatchTimeoutException('second'))
+
+        e = self.assertRaises(
+            k8s_exceptions.KubernetesWatchTimeoutException, unit.wait, 10)
+        self.assertIn('2 of 5 waits failed', str(e))
+        self.assertIn('first', str(e))
+        self.assertIn('second', str(e))
+
+        unit.waits[3].wait.side_effect = (
+            armada_exceptions.WaitException('error'))
+        self.assertRaises(armada_exceptions.WaitException, unit.wait, 10)
+
+        unit.waits[3].wait.side_effect = None
+        e = self.assertRaises(
+            k8s_exceptions.KubernetesWatchTimeoutException, unit.wait, 10)
+        self.assertEqual('first', str(e))
+
+    def test_wait_stops_on_error(self):
+        unit = self.get_unit({})
+        stopped = threading.Event()
+
+        def wait_until_stopped(timeout, stop):
+            if not stop.wait(5):
+                raise k8s_exceptions.KubernetesWatchTimeoutException('late')
+            stopped.set()
+            raise armada_exceptions.WaitException('stopped')
+
+        for w in unit.waits:
+            w.wait = mock.Mock(side_effect=wait_until_stopped)
+        unit.waits[2].wait.side_effect = (
+            armada_exceptions.WaitException('error'))
+
+        start = time.time()
+        e = self.assertRaises(armada_exceptions.WaitException, unit.wait, 10)
+        self.assertEqual('error', str(e))
+        self.assertLess(time.time() - start, 5)
+        self.assertTrue(stopped.wait(5))
+
 
 class PodWaitTestCase(base.ArmadaTestCase):
     def get_unit(self, labels, version=2):
@@ -296,3 +385,123 @@ class JobWaitTestCase(base.ArmadaTestCase):
         # Validate other resources included
         for job in included_jobs:
             self.assertTrue(unit.include_resource(job))
+
+
+class ResourceWaitInformerTestCase(base.ArmadaTestCase):
+    @mock.patch.object(wait.informer, 'INFORMERS')
+    def test_watch_resource_completions_informer(self, mock_informers):
+        self.override_config('k8s_wait_informers', True)
+
+        def mock_resource(name, ready):
+            resource = mock.Mock(ready=ready)
+            resource.metadata.name = name
+            resource.metadata.annotations = {}
+            resource.metadata.owner_references = None
+            return resource
+
+        context = mock_informers.subscribe.return_value
+        context.__exit__.return_value = False
+        subscription = context.__enter__.return_value
+        subscription.items = [mock_resource('a', False)]
+        subscription.events.return_value = iter(
+            [
+                {
+                    'type': 'ADDED',
+                    'object': mock_resource('b', False)
+                }, {
+                    'type': 'MODIFIED',
+                    'object': mock_resource('a', True)
+                }, {
+                    'type': 'MODIFIED',
+                    'object': mock_resource('b', True)
+                }
+            ])
+
+        unit = wait.PodWait(
+            resource_type='pod',
+            chart_wait=ChartWaitTestCase.get_unit(None, {}),
+            labels={'app': 'x'})
+        unit.is_resource_ready = lambda r: ('', r.ready)
+
+        timed_out, modified, unready, found = (
+            unit._watch_resource_completions(timeout=10))
+
+        self.assertFalse(timed_out)
+        self.assertEqual({'a', 'b'}, modified)
+        self.assertTrue(found)
+        mock_informers.subscribe.assert_called_once_with(
+            unit.get_resources, 'test', {'app': 'x'}, 10)
+        unit.get_resources.assert_not_called()
+        subscription.events.assert_called_once_with(mock.ANY, unit._stop)
+
+    def test_wait_stopped(self):
+        unit = wait.PodWait(
+            resource_type='pod',
+            chart_wait=ChartWaitTestCase.get_unit(None, {}),
+            labels={'app': 'x'})
+        stop = threading.Event()
+        stop.set()
+
+        self.assertRaises(armada_exceptions.WaitException, unit.wait, 10, stop)
+        unit.get_resources.assert_not_called()
+
+
+class ResourceWaitStreamTestCase(base.ArmadaTestCase):
+    def mock_resource(self, name, resource_version):
+        resource = mock.Mock()
+        resource.metadata.name = name
+        resource.metadata.resource_version = resource_version
+        return resource
+
+    def mock_list(self, items, resource_version):
+        resource_list = mock.Mock(items=items)
+        resource_list.metadata.resource_version = resource_version
+        return resource_list
+
+    @mock.patch.object(wait.time, 'sleep')
+    @mock.patch.object(wait, 'watch')
+    def test_stream_events_resume_and_relist(self, mock_watch, mock_sleep):
+        unit = wait.PodWait(
+            resource_type='pod',
+            chart_wait=ChartWaitTestCase.get_unit(None, {}),
+            labels={'app': 'x'})
+        a1, a2 = self.mock_resource('a', '1'), self.mock_resource('a', '4')
+        b2, c5 = self.mock_resource('b', '2'), self.mock_resource('c', '5')
+        unit.get_resources.return_value = self.mock_list([a2, c5], '5')
+
+        watches = []
+
+        def stream(*args, **kwargs):
+            w = mock_watch.Watch.return_value
+            watches.append(kwargs['resource_version'])
+            if len(watches) == 1:
+                w.resource_version = '2'
+                yield {'type': 'ADDED', 'object': b2}
+                w.resource_version = '3'
+                yield {
+                    'type': 'BOOKMARK',
+                    'object': self.mock_resource('', '3')
+                }
+                raise urllib3.exceptions.ProtocolError('Connection broken')
+            if len(watches) == 2:
+                raise ApiException(status=410)
+
+        mock_watch.Watch.return_value.stream.side_effect = stream
+
+        events = [
+            (e['type'], e['object'].metadata.name)
+            for e in unit._stream_events(
+                self.mock_list([a1], '1'),
+                time.time() + 10)
+        ]
+
+        # Resumed from the bookmark, then listed again once expired.
+        self.assertEqual(['1', '3', '5'], watches)
+        self.assertEqual(
+            [
+                ('ADDED', 'b'), ('DELETED', 'b'), ('MODIFIED', 'a'),
+                ('ADDED', 'c')
+            ], events)
+        unit.get_resources.assert_called_once_with(
+            namespace='test', label_selector='app=x', timeout_seconds=10)
+        mock_sleep.assert_called_once()
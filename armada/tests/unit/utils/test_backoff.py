@@ -0,0 +1,31 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from armada.tests.unit import base
+from armada.utils import backoff
+
+
+class BackoffTestCase(base.ArmadaTestCase):
+    @mock.patch.object(backoff.random, 'uniform')
+    def test_get_delay(self, mock_uniform):
+        mock_uniform.side_effect = lambda low, high: high
+
+        self.assertEqual(1, backoff.get_delay(0))
+        self.assertEqual(8, backoff.get_delay(3))
+        self.assertEqual(30, backoff.get_delay(10))
+        self.assertEqual(30, backoff.get_delay(1000))
+        self.assertEqual(5, backoff.get_delay(4, base=0.5, cap=5))
+        mock_uniform.assert_called_with(0, 5)
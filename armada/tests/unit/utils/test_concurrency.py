@@ -0,0 +1,61 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from armada.tests.unit import base
+from armada.utils import concurrency
+
+
+class ConcurrencyLimitTestCase(base.ArmadaTestCase):
+    def _get_max_concurrent(self, limit, count=6):
+        active = [0]
+        peak = [0]
+        lock = threading.Lock()
+
+        def work():
+            with limit.hold():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.05)
+                with lock:
+                    active[0] -= 1
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            for _ in range(count):
+                executor.submit(work)
+        return peak[0]
+
+    def test_limit_bounds_concurrency(self):
+        self.override_config('helm_concurrency', 2)
+        limit = concurrency.ConcurrencyLimit('test', 'helm_concurrency')
+
+        self.assertEqual(2, self._get_max_concurrent(limit))
+
+    def test_zero_limit_is_unbounded(self):
+        self.override_config('helm_concurrency', 0)
+        limit = concurrency.ConcurrencyLimit('test', 'helm_concurrency')
+
+        self.assertEqual(6, self._get_max_concurrent(limit))
+
+    def test_limit_follows_config(self):
+        limit = concurrency.ConcurrencyLimit('test', 'helm_concurrency')
+        self.override_config('helm_concurrency', 1)
+        self.assertEqual(1, self._get_max_concurrent(limit, count=3))
+
+        self.override_config('helm_concurrency', 3)
+        self.assertEqual(3, self._get_max_concurrent(limit, count=3))
@@ -12,11 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import gzip
+import hashlib
+import io
 import os
 import shutil
+import tarfile
+import threading
 
+import fixtures
+from git import Git
+from git import Repo
 import mock
 import testtools
+import urllib3
 
 from armada.exceptions import source_exceptions
 from armada.tests.unit import base
@@ -96,58 +105,6 @@ class GitTestCase(base.ArmadaTestCase):
             url,
             proxy_server=proxy_url)
 
-    @mock.patch('armada.utils.source.tempfile')
-    @mock.patch('armada.utils.source.requests')
-    def test_tarball_download(self, mock_requests, mock_temp):
-        url = 'http://localhost:8879/charts/mariadb-0.1.0.tgz'
-        mock_temp.mkstemp.return_value = (None, '/tmp/armada')
-        mock_response = mock.Mock()
-        mock_response.content = 'some string'
-        mock_requests.get.return_value = mock_response
-
-        mock_open = mock.mock_open()
-        with mock.patch.object(source, 'open', mock_open, create=True):
-            source.download_tarball(url)
-
-        mock_temp.mkstemp.assert_called_once()
-        mock_requests.get.assert_called_once_with(
-            url, timeout=None, verify=False)
-        mock_open.assert_called_once_with('/tmp/armada', 'wb')
-        mock_open().write.assert_called_once_with(
-            mock_requests.get(url).content)
-
-    @mock.patch('armada.utils.source.tempfile')
-    @mock.patch('armada.utils.source.os.path')
-    @mock.patch('armada.utils.source.tarfile')
-    def test_tarball_extract(self, mock_tarfile, mock_path, mock_temp):
-        mock_path.exists.return_value = True
-        mock_temp.mkdtemp.return_value = '/tmp/armada'
-        mock_opened_file = mock.MagicMock()
-        mock_opened_file.__iter__.return_value = ['file']
-        mock_tarfile.open.return_value = mock_opened_file
-
-        path = '/tmp/mariadb-0.1.0.tgz'
-        source.extract_tarball(path)
-
-        mock_path.exists.assert_called_once()
-        mock_temp.mkdtemp.assert_called_once()
-        mock_tarfile.open.assert_called_once_with(path)
-        mock_opened_file.extract.assert_called_once_with('file', '/tmp/armada')
-
-    @test_utils.attr(type=['negative'])
-    @mock.patch('armada.utils.source.os.path')
-    @mock.patch('armada.utils.source.tarfile')
-    def test_tarball_extract_bad_path(self, mock_tarfile, mock_path):
-        mock_path.exists.return_value = False
-        path = '/tmp/armada'
-
-        self.assertRaises(
-            source_exceptions.InvalidPathException, source.extract_tarball,
-            path)
-
-        mock_tarfile.open.assert_not_called()
-        mock_tarfile.extract.assert_not_called()
-
     @testtools.skipUnless(
         base.is_connected(), 'git clone requires network connectivity.')
     @mock.patch.object(source, 'LOG')
@@ -203,3 +160,299 @@ class GitTestCase(base.ArmadaTestCase):
             url,
             ref='refs/changes/17/388517/5',
             auth_method='SSH')
+
+    def _make_local_repo(self):
+        repo_dir = self.useFixture(fixtures.TempDir()).path
+        repo = Repo.init(repo_dir, initial_branch='master')
+        with repo.config_writer() as config:
+            config.set_value('user', 'name', 'test')
+            config.set_value('user', 'email', 'test@example.com')
+        repo.index.commit('initial')
+        repo.create_tag('v1', message='v1')
+        return repo_dir, repo.head.commit.hexsha
+
+    def test_resolve_git_ref(self):
+        repo_dir, commit = self._make_local_repo()
+
+        self.assertEqual(commit, source.resolve_git_ref(repo_dir, 'master'))
+        self.assertEqual(
+            commit, source.resolve_git_ref(repo_dir, 'refs/heads/master'))
+        self.assertEqual(commit, source.resolve_git_ref(repo_dir, 'v1'))
+        self.assertIsNone(source.resolve_git_ref(repo_dir, 'missing'))
+
+    @mock.patch.object(source, 'Git')
+    def test_resolve_git_ref_commit(self, mock_git):
+        commit = 'cba78d1d03e4910f6ab1691bae633c5bddce893d'
+
+        self.assertEqual(commit, source.resolve_git_ref('repo', commit))
+        mock_git.assert_not_called()
+
+    def test_resolve_git_ref_bad_url(self):
+        self.assertIsNone(source.resolve_git_ref('/nonexistent', 'master'))
+
+    def test_git_clone_from_mirror(self):
+        repo_dir = self.useFixture(fixtures.TempDir()).path
+        repo = Repo.init(repo_dir, initial_branch='master')
+        with repo.config_writer() as config:
+            config.set_value('user', 'name', 'test')
+            config.set_value('user', 'email', 'test@example.com')
+        for name in ('a', 'b'):
+            os.makedirs(os.path.join(repo_dir, name))
+            with open(os.path.join(repo_dir, name, 'Chart.yaml'), 'w') as f:
+                f.write('v1')
+        repo.index.add(['a/Chart.yaml', 'b/Chart.yaml'])
+        first = repo.index.commit('first').hexsha
+        with open(os.path.join(repo_dir, 'a', 'Chart.yaml'), 'w') as f:
+            f.write('v2')
+        repo.index.add(['a/Chart.yaml'])
+        repo.index.commit('second')
+
+        mirror_dir = self.useFixture(fixtures.TempDir()).path
+        self.override_config('git_mirror_dir', mirror_dir)
+
+        latest = source.git_clone(repo_dir, 'master', subpath='a')
+        self.addCleanup(shutil.rmtree, latest)
+        old = source.git_clone(repo_dir, first)
+        self.addCleanup(shutil.rmtree, old)
+
+        # Both clones share a single mirror.
+        self.assertEqual(
+            1, len([d for d in os.listdir(mirror_dir) if d.endswith('.git')]))
+        self.assertEqual(['a'], os.listdir(latest))
+        with open(os.path.join(latest, 'a', 'Chart.yaml')) as f:
+            self.assertEqual('v2', f.read())
+        self.assertEqual(['a', 'b'], sorted(os.listdir(old)))
+        with open(os.path.join(old, 'a', 'Chart.yaml')) as f:
+            self.assertEqual('v1', f.read())
+
+    def test_git_clone_from_mirror_fetches_incrementally(self):
+        repo_dir, _ = self._make_local_repo()
+        repo = Repo(repo_dir)
+
+        def commit(content):
+            with open(os.path.join(repo_dir, 'Chart.yaml'), 'w') as f:
+                f.write(content)
+            repo.index.add(['Chart.yaml'])
+            return repo.index.commit(content).hexsha
+
+        first = commit('v1')
+        mirror_dir = self.useFixture(fixtures.TempDir()).path
+        self.override_config('git_mirror_dir', mirror_dir)
+        self.addCleanup(shutil.rmtree, source.git_clone(repo_dir, 'master'))
+        second = commit('v2')
+
+        trace = os.path.join(self.useFixture(fixtures.TempDir()).path, 'log')
+        self.useFixture(
+            fixtures.EnvironmentVariable('GIT_TRACE_PACKET', trace))
+        self.addCleanup(shutil.rmtree, source.git_clone(repo_dir, 'master'))
+
+        # The commit fetched first is kept by the mirror, so the upstream
+        # only sends the commits after it.
+        with open(trace) as f:
+            self.assertIn('upload-pack> ACK {}'.format(first), f.read())
+        mirror = Git(
+            os.path.join(
+                mirror_dir,
+                hashlib.sha256(repo_dir.encode('utf-8')).hexdigest() + '.git'))
+        self.assertEqual(
+            second,
+            mirror.execute(
+                [
+                    'git', 'rev-parse',
+                    'refs/armada/' + hashlib.sha256(b'master').hexdigest()
+                ]))
+
+    def test_git_clone_from_mirror_bad_ref(self):
+        repo_dir, _ = self._make_local_repo()
+        self.override_config(
+            'git_mirror_dir',
+            self.useFixture(fixtures.TempDir()).path)
+
+        self.assertRaises(
+            source_exceptions.GitException, source.git_clone, repo_dir,
+            'missing')
+
+
+class TarballFetchTestCase(base.ArmadaTestCase):
+    def _make_tarball(self, name='chart/Chart.yaml'):
+        data = io.BytesIO()
+        with tarfile.open(fileobj=data, mode='w:gz') as tar:
+            content = b'name: chart'
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+        return data.getvalue()
+
+    def _mock_response(self, mock_session, status_code=200, body=b''):
+        response = mock.MagicMock()
+        response.status_code = status_code
+        response.headers = {'ETag': '"v1"'}
+        response.raw = io.BytesIO(body)
+        mock_session.return_value.get.return_value = response
+        return response
+
+    @mock.patch.object(source, '_get_session')
+    def test_fetch_tarball(self, mock_session):
+        tarball = self._make_tarball()
+        self._mock_response(mock_session, body=tarball)
+        url = 'http://localhost:8879/charts/chart-0.1.0.tgz'
+
+        fetched = source.fetch_tarball(url)
+        self.addCleanup(shutil.rmtree, fetched.path)
+
+        with open(os.path.join(fetched.path, 'chart', 'Chart.yaml')) as f:
+            self.assertEqual('name: chart', f.read())
+        self.assertEqual('"v1"', fetched.etag)
+        self.assertEqual(hashlib.sha256(tarball).hexdigest(), fetched.digest)
+        mock_session.assert_called_once_with(url)
+        mock_session.return_value.get.assert_called_once_with(
+            url, stream=True, timeout=None, verify=False, headers={})
+
+    @mock.patch.object(source, '_get_session')
+    def test_fetch_tarball_content_encoding(self, mock_session):
+        tarball = self._make_tarball()
+        # Served as is, but declared gzip encoded, e.g. by servers which
+        # store the tarball compressed
+        encoded = gzip.compress(tarball)
+        response = self._mock_response(mock_session, body=encoded)
+        response.headers['Content-Encoding'] = 'gzip'
+
+        fetched = source.fetch_tarball(
+            'http://localhost/c.tgz',
+            checksum=hashlib.sha256(encoded).hexdigest())
+        self.addCleanup(shutil.rmtree, fetched.path)
+
+        with open(os.path.join(fetched.path, 'chart', 'Chart.yaml')) as f:
+            self.assertEqual('name: chart', f.read())
+
+    @test_utils.attr(type=['negative'])
+    @mock.patch.object(source, '_get_session')
+    def test_fetch_tarball_outside_path(self, mock_session):
+        self._mock_response(
+            mock_session, body=self._make_tarball('../Chart.yaml'))
+
+        self.assertRaises(
+            source_exceptions.TarballExtractException, source.fetch_tarball,
+            'http://localhost/c.tgz')
+
+    @mock.patch.object(source, '_get_session')
+    def test_fetch_tarball_not_modified(self, mock_session):
+        self._mock_response(mock_session, status_code=304)
+
+        fetched = source.fetch_tarball('http://localhost/c.tgz', etag='"v1"')
+
+        self.assertEqual(source.TarballFetch(None, '"v1"', None), fetched)
+        mock_session.return_value.get.assert_called_once_with(
+            'http://localhost/c.tgz',
+            stream=True,
+            timeout=None,
+            verify=False,
+            headers={'If-None-Match': '"v1"'})
+
+    @mock.patch.object(source, '_get_session')
+    def test_fetch_tarball_checksum_mismatch(self, mock_session):
+        self._mock_response(mock_session, body=self._make_tarball())
+
+        self.assertRaises(
+            source_exceptions.TarballChecksumException,
+            source.fetch_tarball,
+            'http://localhost/c.tgz',
+            checksum='0' * 64)
+
+    @mock.patch.object(source, '_get_session')
+    def test_fetch_tarball_http_error(self, mock_session):
+        response = self._mock_response(mock_session, status_code=404)
+        response.raise_for_status.side_effect = Exception('not found')
+
+        self.assertRaises(
+            source_exceptions.TarballDownloadException, source.fetch_tarball,
+            'http://localhost/c.tgz')
+
+    def _interrupted(self, body, size):
+        # Raw response which is interrupted after ``size`` bytes.
+        raw = io.BytesIO(body[:size])
+
+        def read(amt=-1):
+            data = raw.read(amt)
+            if not data:
+                raise urllib3.exceptions.ProtocolError('Connection broken')
+            return data
+
+        return mock.Mock(read=read)
+
+    @mock.patch.object(source, '_get_session')
+    def test_fetch_tarball_resume(self, mock_session):
+        tarball = self._make_tarball()
+        response = mock.MagicMock(status_code=200)
+        response.headers = {'ETag': '"v1"', 'Accept-Ranges': 'bytes'}
+        response.raw = self._interrupted(tarball, 100)
+        resumed = mock.MagicMock(status_code=206)
+        resumed.headers = {
+            'Content-Range':
+            'bytes 100-{}/{}'.format(len(tarball) - 1, len(tarball))
+        }
+        resumed.raw = io.BytesIO(tarball[100:])
+        mock_session.return_value.get.side_effect = [response, resumed]
+
+        fetched = source.fetch_tarball('http://localhost/c.tgz')
+        self.addCleanup(shutil.rmtree, fetched.path)
+
+        with open(os.path.join(fetched.path, 'chart', 'Chart.yaml')) as f:
+            self.assertEqual('name: chart', f.read())
+        self.assertEqual(hashlib.sha256(tarball).hexdigest(), fetched.digest)
+        mock_session.return_value.get.assert_called_with(
+            'http://localhost/c.tgz',
+            stream=True,
+            timeout=None,
+            verify=False,
+            headers={
+                'Range': 'bytes=100-',
+                'If-Range': '"v1"',
+                'Accept-Encoding': 'identity'
+            })
+
+    @test_utils.attr(type=['negative'])
+    @mock.patch.object(source, '_get_session')
+    def test_fetch_tarball_resume_changed(self, mock_session):
+        tarball = self._make_tarball()
+        response = mock.MagicMock(status_code=200)
+        response.headers = {'ETag': '"v1"', 'Accept-Ranges': 'bytes'}
+        response.raw = self._interrupted(tarball, 100)
+        # The whole tarball, which has changed since.
+        changed = mock.MagicMock(status_code=200, headers={'ETag': '"v2"'})
+        mock_session.return_value.get.side_effect = [response, changed]
+
+        self.assertRaises(
+            source_exceptions.TarballDownloadException, source.fetch_tarball,
+            'http://localhost/c.tgz')
+
+    @test_utils.attr(type=['negative'])
+    @mock.patch.object(source, '_get_session')
+    def test_fetch_tarball_not_resumable(self, mock_session):
+        tarball = self._make_tarball()
+        response = self._mock_response(mock_session)
+        response.raw = self._interrupted(tarball, 100)
+
+        self.assertRaises(
+            source_exceptions.TarballExtractException, source.fetch_tarball,
+            'http://localhost/c.tgz')
+        mock_session.return_value.get.assert_called_once()
+
+    def test_get_session_per_host(self):
+        session = source._get_session('https://a.example.com/x.tgz')
+
+        self.assertIs(
+            session, source._get_session('https://a.example.com/y.tgz'))
+        self.assertIsNot(
+            session, source._get_session('https://b.example.com/x.tgz'))
+
+    def test_get_session_per_thread(self):
+        sessions = []
+        thread = threading.Thread(
+            target=lambda: sessions.append(
+                source._get_session('https://a.example.com/x.tgz')))
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(
+            sessions[0], source._get_session('https://a.example.com/x.tgz'))
@@ -0,0 +1,104 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import time
+
+import fixtures
+
+from armada.tests.unit import base
+from armada.utils import source_cache
+
+
+class SourceCacheTestCase(base.ArmadaTestCase):
+    def setUp(self):
+        super(SourceCacheTestCase, self).setUp()
+        self.cache_dir = self.useFixture(fixtures.TempDir()).path
+
+    def _make_source(self, content='a', size=1):
+        source_dir = self.useFixture(fixtures.TempDir()).path
+        os.makedirs(os.path.join(source_dir, 'chart', 'templates'))
+        os.makedirs(os.path.join(source_dir, '.git'))
+        with open(os.path.join(source_dir, 'chart', 'Chart.yaml'), 'w') as f:
+            f.write(content * size)
+        with open(os.path.join(source_dir, '.git', 'HEAD'), 'w') as f:
+            f.write('ref')
+        return source_dir
+
+    def _get(self, cache, key):
+        source_dir = cache.get(key)
+        if source_dir is not None:
+            self.addCleanup(shutil.rmtree, source_dir)
+        return source_dir
+
+    def test_get_miss(self):
+        cache = source_cache.SourceCache(self.cache_dir, 1024)
+        self.assertIsNone(self._get(cache, ('git', 'repo', 'abc')))
+
+    def test_put_get(self):
+        cache = source_cache.SourceCache(self.cache_dir, 1024)
+        cache.put(('git', 'repo', 'abc'), self._make_source('a'))
+
+        source_dir = self._get(cache, ('git', 'repo', 'abc'))
+
+        with open(os.path.join(source_dir, 'chart', 'Chart.yaml')) as f:
+            self.assertEqual('a', f.read())
+        self.assertTrue(
+            os.path.isdir(os.path.join(source_dir, 'chart', 'templates')))
+        self.assertFalse(os.path.exists(os.path.join(source_dir, '.git')))
+        self.assertIsNone(self._get(cache, ('git', 'repo', 'def')))
+
+    def test_get_returns_private_copy(self):
+        cache = source_cache.SourceCache(self.cache_dir, 1024)
+        cache.put(('tar', 'url', 'abc'), self._make_source('a'))
+
+        first = self._get(cache, ('tar', 'url', 'abc'))
+        os.remove(os.path.join(first, 'chart', 'Chart.yaml'))
+        second = self._get(cache, ('tar', 'url', 'abc'))
+
+        self.assertNotEqual(first, second)
+        self.assertTrue(
+            os.path.exists(os.path.join(second, 'chart', 'Chart.yaml')))
+
+    def test_evicts_least_recently_used(self):
+        cache = source_cache.SourceCache(self.cache_dir, 250)
+        cache.put(('git', 'repo', '1'), self._make_source('1', 100))
+        cache.put(('git', 'repo', '2'), self._make_source('2', 100))
+        # Make sure the first entry is more recently used.
+        time.sleep(0.01)
+        self._get(cache, ('git', 'repo', '1'))
+        cache.put(('git', 'repo', '3'), self._make_source('3', 100))
+
+        self.assertIsNotNone(self._get(cache, ('git', 'repo', '1')))
+        self.assertIsNone(self._get(cache, ('git', 'repo', '2')))
+        self.assertIsNotNone(self._get(cache, ('git', 'repo', '3')))
+
+    def test_does_not_cache_oversized_source(self):
+        cache = source_cache.SourceCache(self.cache_dir, 10)
+        cache.put(('git', 'repo', '1'), self._make_source('1', 100))
+
+        self.assertIsNone(self._get(cache, ('git', 'repo', '1')))
+        self.assertEqual(['.lock'], os.listdir(self.cache_dir))
+
+    def test_get_source_cache(self):
+        self.assertIsNone(source_cache.get_source_cache())
+
+        self.override_config('chart_cache_dir', self.cache_dir)
+        self.override_config('chart_cache_size', 1)
+        cache = source_cache.get_source_cache()
+
+        self.assertEqual(self.cache_dir, cache.path)
+        self.assertEqual(1024 * 1024, cache.max_size)
+        self.assertIs(cache, source_cache.get_source_cache())
@@ -12,11 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import os
 
+import mock
 import testtools
 import yaml
 
+from armada.handlers import schema as sch
 from armada.tests.unit import base
 from armada.utils import validate
 
@@ -200,6 +203,146 @@ data:
 
         self.assertTrue(is_valid)
 
+    def test_validator_is_shared(self):
+        schema_info = sch.get_schema_info('armada/Chart/v1')
+        with mock.patch.object(sch.jsonschema,
+                               'Draft4Validator') as mock_validator:
+            for _ in range(2):
+                is_valid, _ = validate.validate_armada_document(
+                    yaml.safe_load(template_chart))
+                self.assertTrue(is_valid)
+        mock_validator.assert_not_called()
+        self.assertIs(
+            schema_info.validator,
+            sch.get_schema_info('armada/Chart/v1').validator)
+
+    def _get_documents(self):
+        documents = [
+            yaml.safe_load(t)
+            for t in (template_chart, template_chart_group, template_manifest)
+        ]
+        for name in ('valid_armada_document.yaml', 'keystone-manifest.yaml'):
+            with open(os.path.join(self.basepath, 'resources', name)) as f:
+                documents.extend(yaml.safe_load_all(f))
+        return [d for d in documents if d and sch.get_schema_info(d['schema'])]
+
+    def _get_invalid_data(self, data):
+        # Required keys missing, and keys of the wrong type.
+        for key in data:
+            missing = copy.deepcopy(data)
+            del missing[key]
+            yield missing
+            for value in (None, 1, 'x', [], [1], {}, {'x': 1}):
+                invalid = copy.deepcopy(data)
+                invalid[key] = value
+                yield invalid
+        yield dict(data, unknown_key=True)
+        yield []
+
+    @testtools.skipIf(sch.fastjsonschema is None, 'fastjsonschema not found')
+    def test_fast_validator_matches_jsonschema(self):
+        schemas = sch._SCHEMAS.values()
+        checked = 0
+        for document in self._get_documents():
+            doc_type = sch.get_schema_info(document['schema']).type
+            for data in [document['data']] + list(self._get_invalid_data(
+                    document['data'])):
+                # Validate against all versions of the schema of the type.
+                for schema_info in schemas:
+                    if schema_info.type != doc_type:
+                        continue
+                    fast_validator = schema_info.get_fast_validator()
+                    try:
+                        fast_validator(data)
+                        fast_valid = True
+                    except sch.fastjsonschema.JsonSchemaValueException:
+                        fast_valid = False
+                    self.assertEqual(
+                        schema_info.validator.is_valid(data), fast_valid,
+                        '{} {}'.format(document['schema'], data))
+                    checked += 1
+        self.assertGreater(checked, 100)
+
+    @testtools.skipIf(sch.fastjsonschema is None, 'fastjsonschema not found')
+    def test_fast_validator_passes(self):
+        self.override_config('schema_validator', 'fastjsonschema')
+        schema_info = sch.get_schema_info('armada/Chart/v1')
+        with mock.patch.object(schema_info, 'validator') as validator:
+            chart = yaml.safe_load(template_chart)
+            is_valid, _ = validate.validate_armada_document(chart)
+
+        self.assertTrue(is_valid)
+        self.assertIs(
+            schema_info.get_fast_validator(), schema_info.get_fast_validator())
+        validator.iter_errors.assert_not_called()
+
+    @testtools.skipIf(sch.fastjsonschema is None, 'fastjsonschema not found')
+    def test_fast_validator_reports_all_errors(self):
+        self.override_config('schema_validator', 'fastjsonschema')
+        chart = yaml.safe_load(template_chart)
+        del chart['data']['release']
+        del chart['data']['namespace']
+        is_valid, details = validate.validate_armada_document(chart)
+
+        # Errors are reported by jsonschema, which finds all of them.
+        self.assertFalse(is_valid)
+        self.assertEqual(2, len(details))
+
+    def test_fast_validator_not_installed(self):
+        self.override_config('schema_validator', 'fastjsonschema')
+        schema_info = sch.get_schema_info('armada/Chart/v1')
+        with mock.patch.object(sch, 'fastjsonschema', None):
+            self.assertIsNone(schema_info.get_fast_validator())
+            is_valid, _ = validate.validate_armada_document(
+                yaml.safe_load(template_chart))
+        self.assertTrue(is_valid)
+
+    def test_validate_changed_documents(self):
+        template = '{}/resources/valid_armada_document.yaml'.format(
+            self.basepath)
+        with open(template) as f:
+            documents = list(yaml.safe_load_all(f.read()))
+        unused = yaml.safe_load(template_chart)
+        documents.append(unused)
+        mariadb = [d for d in documents
+                   if d['metadata']['name'] == 'mariadb'][0]
+
+        with mock.patch.object(validate, 'Manifest',
+                               wraps=validate.Manifest) as mock_manifest, \
+                mock.patch.object(validate, 'validate_armada_document',
+                                  wraps=validate.validate_armada_document) \
+                as mock_validate:
+            # Charts outside of the manifest do not affect it.
+            valid, _ = validate.validate_armada_documents(
+                documents, changed=[unused])
+            self.assertTrue(valid)
+            mock_validate.assert_called_once_with(unused)
+            mock_manifest.assert_not_called()
+
+            valid, _ = validate.validate_armada_documents(
+                documents, changed=[mariadb])
+            self.assertTrue(valid)
+            mock_manifest.assert_called_once_with(
+                documents, target_manifest='armada-manifest')
+
+    def test_validate_documents_cache(self):
+        cache = {}
+        chart = yaml.safe_load(template_chart)
+        with mock.patch.object(validate, 'validate_armada_document',
+                               wraps=validate.validate_armada_document) \
+                as mock_validate:
+            for document in [chart, copy.deepcopy(chart)]:
+                valid, _ = validate.validate_armada_documents(
+                    [document], changed=[document], cache=cache)
+                self.assertTrue(valid)
+            mock_validate.assert_called_once_with(chart)
+
+            chart['data']['timeout'] = 'invalid'
+            valid, details = validate.validate_armada_documents(
+                [chart], changed=[chart], cache=cache)
+            self.assertFalse(valid)
+            self.assertEqual(2, mock_validate.call_count)
+
     @testtools.skipUnless(
         base.is_connected(),
         'validate_manifest_url requires network connectivity.')
@@ -0,0 +1,58 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+
+import testtools
+import yaml
+
+from armada.utils import yaml as yaml_utils
+
+DOCUMENTS = """
+---
+schema: armada/Chart/v1
+metadata:
+  name: chart
+---
+schema: armada/ChartGroup/v1
+metadata:
+  name: group
+"""
+
+
+class YamlTestCase(testtools.TestCase):
+    def test_load_all(self):
+        expected = list(yaml.safe_load_all(DOCUMENTS))
+        for stream in [DOCUMENTS, DOCUMENTS.encode('utf-8'),
+                       io.StringIO(DOCUMENTS)]:
+            self.assertEqual(expected, list(yaml_utils.load_all(stream)))
+
+    def test_load_all_raises_while_iterating(self):
+        documents = yaml_utils.load_all(DOCUMENTS + '---\n: [invalid\n')
+        self.assertEqual('chart', next(documents)['metadata']['name'])
+        self.assertEqual('group', next(documents)['metadata']['name'])
+        self.assertRaises(yaml.YAMLError, next, documents)
+
+    @testtools.skipUnless(yaml.__with_libyaml__, 'libyaml is not available.')
+    def test_libyaml(self):
+        self.assertIs(yaml.CSafeLoader, yaml_utils.SafeLoader)
+        self.assertIs(yaml.CSafeDumper, yaml_utils.SafeDumper)
+
+    def test_dump(self):
+        values = {'key': ['value', {'nested': 1}]}
+        self.assertEqual(values, yaml.safe_load(yaml_utils.dump(values)))
+        stream = io.StringIO()
+        yaml_utils.dump_all([values, values], stream)
+        self.assertEqual(
+            [values, values], list(yaml.safe_load_all(stream.getvalue())))
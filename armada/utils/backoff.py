@@ -0,0 +1,34 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+# Time in seconds of the first retry delay, which doubles with each attempt.
+BASE_DELAY = 1
+
+# Maximum time in seconds of a retry delay.
+MAX_DELAY = 30
+
+
+def get_delay(attempt, base=BASE_DELAY, cap=MAX_DELAY):
+    '''
+    Returns a delay before retrying, which grows exponentially with the
+    number of failed attempts, with full jitter so that clients retrying at
+    the same time, e.g. after an apiserver restart, are spread out.
+
+    :param int attempt: Number of consecutive failed attempts, from 0.
+    :returns: Time in seconds to wait.
+    :rtype: float
+    '''
+    return random.uniform(0, min(cap, base * 2**min(attempt, 32)))  # nosec
@@ -0,0 +1,80 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import threading
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+
+class ConcurrencyLimit(object):
+    '''
+    Bounds how many operations of a kind may run at once across all threads
+    of the process.
+
+    The limit is read from the config option ``opt_name`` when the limit is
+    next held, so it follows configuration loaded after import. A limit of
+    0 means unbounded.
+
+    :param str name: Description of the limited operations, for logging.
+    :param str opt_name: Name of the config option holding the limit.
+    '''
+    def __init__(self, name, opt_name):
+        self.name = name
+        self.opt_name = opt_name
+        self._lock = threading.Lock()
+        self._limit = None
+        self._semaphore = None
+
+    def get_limit(self):
+        return getattr(CONF, self.opt_name, 0) or 0
+
+    def _get_semaphore(self):
+        limit = self.get_limit()
+        with self._lock:
+            if limit != self._limit:
+                self._limit = limit
+                self._semaphore = (
+                    threading.BoundedSemaphore(limit) if limit > 0 else None)
+            return self._semaphore
+
+    @contextlib.contextmanager
+    def hold(self):
+        '''
+        Context manager which blocks until a slot is free and holds it for
+        the duration of the context.
+        '''
+        semaphore = self._get_semaphore()
+        if semaphore is None:
+            yield
+            return
+
+        if not semaphore.acquire(blocking=False):
+            LOG.debug(
+                'Waiting for a free %s slot (limit=%s)', self.name,
+                self._limit)
+            semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+HELM = ConcurrencyLimit('helm command', 'helm_concurrency')
+K8S_WATCH = ConcurrencyLimit('kubernetes watch', 'k8s_watch_concurrency')
+DOWNLOAD = ConcurrencyLimit('chart download', 'download_concurrency')
@@ -12,13 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import fcntl
+import hashlib
 import os
+import re
 import shutil
 import tarfile
 import tempfile
+import threading
+from urllib.parse import urlparse
+import zlib
 
 from git import exc as git_exc
-# from git import Git
+from git import Git
 from git import Repo
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -30,10 +37,22 @@ from armada.exceptions import source_exceptions
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+COMMIT_RE = re.compile(r'^[0-9a-f]{40}$')
 
-def git_clone(repo_url, ref='master', proxy_server=None, auth_method=None):
+
+def git_clone(
+        repo_url,
+        ref='master',
+        proxy_server=None,
+        auth_method=None,
+        subpath=None):
     '''Clone a git repository from ``repo_url`` using the reference ``ref``.
 
+    If ``CONF.git_mirror_dir`` is set, ``ref`` is instead fetched into a bare
+    mirror of the repository shared by all clones of ``repo_url``, and only
+    the tree of ``ref`` (limited to ``subpath`` if given) is checked out,
+    without git metadata.
+
     :param repo_url: URL of git repo to clone.
     :param ref: branch, commit or reference in the repo to clone. Default is
         'master'.
@@ -44,6 +63,8 @@ def git_clone(repo_url, ref='master', proxy_server=None, auth_method=None):
         ``CONF.ssh_key_path``. If value is None, authentication is skipped.
         Valid values include "SSH" or None. Note that the values are not
         case sensitive. Default is None.
+    :param subpath: optional, path within the repo to check out when using a
+        mirror. Default is the whole repo.
     :returns: Path to the cloned repo.
     :raises GitException: If ``repo_url`` is invalid or could not be found.
     :raises GitAuthException: If authentication with the Git repository failed.
@@ -56,31 +77,22 @@ def git_clone(repo_url, ref='master', proxy_server=None, auth_method=None):
     if not repo_url:
         raise source_exceptions.GitException(repo_url)
 
-    env_vars = {'GIT_TERMINAL_PROMPT': '0'}
-    ssh_cmd = None
-
     if auth_method and auth_method.lower() == 'ssh':
         LOG.debug(
             'Attempting to clone the repo at %s using reference %s '
             'with SSH authentication.', repo_url, ref)
-
-        if not os.path.exists(CONF.ssh_key_path):
-            LOG.error(
-                'SSH auth method was specified for cloning repo but '
-                'the SSH key under CONF.ssh_key_path was not found.')
-            raise source_exceptions.GitSSHException(CONF.ssh_key_path)
-
-        ssh_cmd = (
-            'ssh -i {} -o ConnectionAttempts=20 -o ConnectTimeout=10 -o '
-            'StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null'.format(
-                os.path.expanduser(CONF.ssh_key_path)))
-        env_vars.update({'GIT_SSH_COMMAND': ssh_cmd})
     else:
         LOG.debug(
             'Attempting to clone the repo at %s using reference %s '
             'with no authentication.', repo_url, ref)
 
+    env_vars, ssh_cmd = _get_git_env(auth_method)
+
     try:
+        if CONF.git_mirror_dir:
+            return _checkout_from_mirror(
+                repo_url, ref, subpath, proxy_server, env_vars)
+
         temp_dir = tempfile.mkdtemp(prefix='armada')
 
         if proxy_server:
@@ -117,54 +129,355 @@ def git_clone(repo_url, ref='master', proxy_server=None, auth_method=None):
     return temp_dir
 
 
-def get_tarball(tarball_url, verify=False, proxy_server=None):
-    tarball_path = download_tarball(
-        tarball_url, verify=verify, proxy_server=proxy_server)
-    return extract_tarball(tarball_path)
+def _checkout_from_mirror(repo_url, ref, subpath, proxy_server, env_vars):
+    '''
+    Fetches ``ref`` into the bare mirror of ``repo_url``, creating it if
+    needed, and extracts the tree of ``ref`` (or only ``subpath`` of it) to
+    a new directory.
+
+    :returns: Path to the extracted tree.
+    '''
+    os.makedirs(CONF.git_mirror_dir, exist_ok=True)
+    mirror_dir = os.path.join(
+        CONF.git_mirror_dir,
+        hashlib.sha256(repo_url.encode('utf-8')).hexdigest() + '.git')
+    git_args = ['git']
+    if proxy_server:
+        git_args = git_args + ['-c', 'http.proxy={}'.format(proxy_server)]
+
+    # The mirror is shared by concurrent clones, including from other
+    # processes. Each ref is fetched into its own ref of the mirror, which
+    # keeps its commits from being pruned, and lets later fetches only
+    # download new commits.
+    mirror_ref = 'refs/armada/' + hashlib.sha256(
+        ref.encode('utf-8')).hexdigest()
+    with open(mirror_dir + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if not os.path.isdir(mirror_dir):
+                LOG.debug(
+                    'Creating mirror of [%s] in %s', repo_url, mirror_dir)
+                Repo.init(mirror_dir, bare=True)
+            git = Git(mirror_dir)
+
+            LOG.debug('Fetching [%s] %s into mirror', repo_url, ref)
+            git.execute(
+                git_args + [
+                    'fetch', '--no-tags', repo_url, '+{}:{}'.format(
+                        ref, mirror_ref)
+                ],
+                env=env_vars)
+            commit = git.execute(
+                ['git', 'rev-parse', mirror_ref + '^{commit}'])
+
+            LOG.debug(
+                'Checking out %s (%s) of [%s]', commit, subpath or 'all',
+                repo_url)
+            temp_dir = tempfile.mkdtemp(prefix='armada')
+            archive_args = ['git', 'archive', '--format=tar', commit]
+            if subpath:
+                archive_args = archive_args + ['--', subpath]
+            with tempfile.TemporaryFile() as archive:
+                git.execute(archive_args, output_stream=archive)
+                archive.seek(0)
+                with tarfile.open(fileobj=archive) as tar:
+                    _extract(tar, temp_dir)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    return temp_dir
 
 
-def download_tarball(tarball_url, verify=False, proxy_server=None):
+def _get_git_env(auth_method):
     '''
-    Downloads a tarball to /tmp and returns the path
+    :returns: Tuple of the environment variables to run git with, and the SSH
+        command used for ``auth_method`` (or ``None``).
+    :raises GitSSHException: If the SSH key specified by ``CONF.ssh_key_path``
+        could not be found and ``auth_method`` is "SSH".
     '''
+    env_vars = {'GIT_TERMINAL_PROMPT': '0'}
+    ssh_cmd = None
+
+    if auth_method and auth_method.lower() == 'ssh':
+        if not os.path.exists(CONF.ssh_key_path):
+            LOG.error(
+                'SSH auth method was specified for cloning repo but '
+                'the SSH key under CONF.ssh_key_path was not found.')
+            raise source_exceptions.GitSSHException(CONF.ssh_key_path)
+
+        ssh_cmd = (
+            'ssh -i {} -o ConnectionAttempts=20 -o ConnectTimeout=10 -o '
+            'StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null'.format(
+                os.path.expanduser(CONF.ssh_key_path)))
+        env_vars.update({'GIT_SSH_COMMAND': ssh_cmd})
+
+    return env_vars, ssh_cmd
+
+
+def resolve_git_ref(
+        repo_url, ref='master', proxy_server=None, auth_method=None):
+    '''Resolve the reference ``ref`` of the git repository at ``repo_url`` to
+    a commit, without cloning the repository.
+
+    :param repo_url: URL of git repo.
+    :param ref: branch, commit or reference in the repo.
+    :param proxy_server: optional, HTTP proxy to use.
+    :param auth_method: Method to use for authenticating against the
+        repository, see ``git_clone``.
+    :returns: The commit ``ref`` refers to, or ``None`` if it could not be
+        resolved.
+    '''
+    if COMMIT_RE.match(ref):
+        return ref
+
     try:
-        if not verify:
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-        kwargs = {}
+        env_vars, _ = _get_git_env(auth_method)
+        args = ['ls-remote']
         if proxy_server:
-            kwargs['proxies'] = {
-                'http': proxy_server,
-                'https': proxy_server,
-                'ftp': proxy_server
-            }
-        tarball_filename = tempfile.mkstemp(prefix='armada')[1]
-        response = requests.get(
-            tarball_url, timeout=None, verify=verify, **kwargs)
-
-        with open(tarball_filename, 'wb') as f:
-            f.write(response.content)
-
-        return tarball_filename
+            args = ['-c', 'http.proxy={}'.format(proxy_server)] + args
+        # Also match the peeled commit of annotated tags.
+        output = Git().execute(
+            ['git'] + args + [repo_url, ref, ref + '^{}'], env=env_vars)
     except Exception:
-        raise source_exceptions.TarballDownloadException(tarball_url)
+        LOG.warning(
+            'Unable to resolve reference %s of repo %s',
+            ref,
+            repo_url,
+            exc_info=True)
+        return None
+
+    refs = {}
+    for line in output.splitlines():
+        commit, _, name = line.partition('\t')
+        refs[name] = commit
+    for name in (ref + '^{}', ref, 'refs/heads/' + ref,
+                 'refs/tags/' + ref + '^{}', 'refs/tags/' + ref):
+        if name in refs:
+            return refs[name]
+    return None
+
+
+TarballFetch = collections.namedtuple(
+    'TarballFetch', ['path', 'etag', 'digest'])
+
+# Times an interrupted tarball download is resumed from where it stopped.
+MAX_RESUME_ATTEMPTS = 3
+
+# Errors of a response body being read, after which it can be resumed.
+RESUME_EXCEPTIONS = (
+    urllib3.exceptions.ProtocolError, urllib3.exceptions.ReadTimeoutError)
 
+# Sessions of the thread by host, since sessions are not thread-safe.
+_sessions = threading.local()
 
-def extract_tarball(tarball_path):
+
+def _get_session(url):
     '''
-    Extracts a tarball to /tmp and returns the path
+    :returns: The session of the current thread for the host of ``url``,
+        whose pooled connections are reused by all downloads of the thread
+        from that host.
+    :rtype: requests.Session
     '''
-    if not os.path.exists(tarball_path):
-        raise source_exceptions.InvalidPathException(tarball_path)
+    parsed = urlparse(url)
+    key = (parsed.scheme, parsed.netloc)
+    sessions = getattr(_sessions, 'by_host', None)
+    if sessions is None:
+        sessions = _sessions.by_host = {}
+    session = sessions.get(key)
+    if session is None:
+        session = sessions[key] = requests.Session()
+    return session
 
-    temp_dir = tempfile.mkdtemp(prefix='armada')
+
+class _DigestReader(object):
+    '''File-like wrapper of a raw HTTP response, which digests its body as
+    received, and decodes its content encoding.
+
+    :param resume: optional, function returning the response of the rest of
+        the body from the given offset, which is called when reading the
+        body fails.
+    '''
+    def __init__(self, response, resume=None):
+        self.response = response
+        self.stream = response.raw
+        self.resume = resume
+        self.offset = 0
+        self.resumed = 0
+        self.digest = hashlib.sha256()
+        encoding = response.headers.get('Content-Encoding', '').lower()
+        if encoding in ('gzip', 'x-gzip'):
+            self.decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self.decoder = zlib.decompressobj()
+        else:
+            self.decoder = None
+
+    def _read_raw(self, size):
+        while True:
+            try:
+                data = self.stream.read(size)
+                break
+            except RESUME_EXCEPTIONS:
+                if (self.resume is None
+                        or self.resumed >= MAX_RESUME_ATTEMPTS):
+                    raise
+                self.resumed += 1
+                self.response.close()
+                self.response = self.resume(self.offset)
+                self.stream = self.response.raw
+        self.offset += len(data)
+        self.digest.update(data)
+        return data
+
+    def close(self):
+        self.response.close()
+
+    def read(self, size=-1):
+        data = self._read_raw(size)
+        if self.decoder is None:
+            return data
+        while data:
+            decoded = self.decoder.decompress(data)
+            if decoded:
+                return decoded
+            data = self._read_raw(size)
+        return self.decoder.flush()
+
+
+def _extract(tar, path):
+    '''Extracts the members of ``tar`` to ``path``, refusing any which would
+    be created or link outside of it.
+    '''
+    for member in tar:
+        tar.extract(member, path, filter='data')
+
+
+def fetch_tarball(
+        tarball_url,
+        verify=False,
+        proxy_server=None,
+        etag=None,
+        checksum=None):
+    '''Download a tarball and extract it as it is streamed, so that it is
+    never held in memory or written to disk whole.
+
+    :param tarball_url: URL of the tarball.
+    :param verify: whether to verify the server certificate, or the path to
+        the CA bundle to verify it with.
+    :param proxy_server: optional, HTTP proxy to use.
+    :param etag: optional, ETag of a previous fetch of ``tarball_url``. The
+        tarball is not downloaded again if it is unchanged.
+    :param checksum: optional, expected sha256 hex digest of the tarball.
+
+    If the download is interrupted, and the server supports it, the rest of
+    the tarball is requested with a ``Range`` request conditional on the
+    tarball being unchanged, and extraction continues where it stopped.
+
+    :returns: ``TarballFetch`` of the path the tarball was extracted to
+        (``None`` if unchanged since ``etag``), its ETag and its sha256
+        digest.
+    :raises TarballDownloadException: If the tarball could not be downloaded.
+    :raises TarballExtractException: If the tarball could not be extracted.
+    :raises TarballChecksumException: If the tarball does not match
+        ``checksum``.
+    '''
+    if not verify:
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    kwargs = {}
+    if proxy_server:
+        kwargs['proxies'] = {
+            'http': proxy_server,
+            'https': proxy_server,
+            'ftp': proxy_server
+        }
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
 
     try:
-        file = tarfile.open(tarball_path)
-        for member in file:
-            file.extract(member, temp_dir)
+        response = _get_session(tarball_url).get(
+            tarball_url,
+            stream=True,
+            timeout=None,
+            verify=verify,
+            headers=headers,
+            **kwargs)
+        response.raise_for_status()
     except Exception:
-        raise source_exceptions.TarballExtractException(tarball_path)
-    return temp_dir
+        raise source_exceptions.TarballDownloadException(tarball_url)
+
+    if etag and response.status_code == 304:
+        response.close()
+        LOG.info('Tarball %s is unchanged since %s', tarball_url, etag)
+        return TarballFetch(None, etag, None)
+
+    def resume(offset):
+        LOG.warning(
+            'Download of tarball %s interrupted after %s bytes, resuming.',
+            tarball_url, offset)
+        try:
+            resumed = _get_session(tarball_url).get(
+                tarball_url,
+                stream=True,
+                timeout=None,
+                verify=verify,
+                headers={
+                    'Range': 'bytes={}-'.format(offset),
+                    'If-Range': validator,
+                    'Accept-Encoding': 'identity'
+                },
+                **kwargs)
+        except Exception:
+            raise source_exceptions.TarballDownloadException(tarball_url)
+        # The rest of the same tarball, or else the tarball has changed.
+        content_range = resumed.headers.get('Content-Range', '')
+        if (resumed.status_code != 206
+                or not content_range.startswith('bytes {}-'.format(offset))):
+            resumed.close()
+            raise source_exceptions.TarballDownloadException(tarball_url)
+        return resumed
+
+    # Only resumed when the server serves byte ranges of the tarball as is,
+    # and the rest of the same version of it can be requested.
+    validator = response.headers.get('ETag', '')
+    if validator.startswith('W/'):
+        validator = ''
+    validator = validator or response.headers.get('Last-Modified')
+    resumable = (
+        validator and response.headers.get('Accept-Ranges') == 'bytes'
+        and not response.headers.get('Content-Encoding'))
+
+    # The checksum is of the tarball as served, before its content encoding
+    # is decoded.
+    reader = _DigestReader(response, resume=resume if resumable else None)
+    temp_dir = tempfile.mkdtemp(prefix='armada')
+    try:
+        with tarfile.open(fileobj=reader, mode='r|*') as tar:
+            _extract(tar, temp_dir)
+        # Digest any trailing padding after the end of the archive.
+        while reader.read(65536):
+            pass
+    except source_exceptions.TarballDownloadException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    except Exception:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise source_exceptions.TarballExtractException(tarball_url)
+    finally:
+        reader.close()
+
+    digest = reader.digest.hexdigest()
+    if checksum and checksum.lower() != digest:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise source_exceptions.TarballChecksumException(
+            tarball_url, checksum, digest)
+
+    return TarballFetch(temp_dir, response.headers.get('ETag'), digest)
+
+
+def get_tarball(tarball_url, verify=False, proxy_server=None):
+    return fetch_tarball(
+        tarball_url, verify=verify, proxy_server=proxy_server).path
 
 
 def source_cleanup(chart_path):
@@ -0,0 +1,213 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+LOCK_FILE = '.lock'
+SOURCE_DIR = 'source'
+SIZE_FILE = 'size'
+VALIDATORS_DIR = '.validators'
+
+
+class SourceCache(object):
+    '''
+    A persistent, content addressed cache of chart source directories,
+    shared by all processes using the same cache directory.
+
+    Entries are keyed by the identity of their content, e.g. the type and
+    location of a source along with its resolved git commit or tarball
+    digest, so entries never go stale. The least recently used entries are
+    evicted once the cache grows beyond ``max_size`` bytes.
+
+    Entries are never handed out directly, since charts modify their source
+    directories (e.g. to link dependencies), instead each hit is a private
+    copy of the entry.
+
+    :param str path: Directory holding the cache.
+    :param int max_size: Maximum size of the cache in bytes.
+    '''
+    def __init__(self, path, max_size):
+        self.path = path
+        self.max_size = max_size
+        os.makedirs(self.path, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _lock(self, shared=False):
+        with open(os.path.join(self.path, LOCK_FILE), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _get_entry_path(self, key):
+        digest = hashlib.sha256(json.dumps(
+            list(key)).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest)
+
+    def get(self, key):
+        '''
+        :param tuple key: Identity of the source content.
+        :returns: Path to a private copy of the cached source, or ``None`` if
+            it is not cached.
+        :rtype: str
+        '''
+        entry_path = self._get_entry_path(key)
+        with self._lock(shared=True):
+            if not os.path.isdir(entry_path):
+                return None
+            # Mark the entry as recently used.
+            os.utime(entry_path)
+            temp_dir = tempfile.mkdtemp(prefix='armada')
+            shutil.copytree(
+                os.path.join(entry_path, SOURCE_DIR),
+                temp_dir,
+                symlinks=True,
+                dirs_exist_ok=True)
+        LOG.debug('Copied cached source %s to %s', key, temp_dir)
+        return temp_dir
+
+    def put(self, key, source_dir):
+        '''
+        Adds a copy of ``source_dir`` to the cache, excluding git metadata,
+        and evicts the least recently used entries beyond the maximum size.
+
+        :param tuple key: Identity of the source content.
+        :param str source_dir: Source directory to cache.
+        '''
+        entry_path = self._get_entry_path(key)
+        if os.path.isdir(entry_path):
+            return
+
+        # Copy outside of the lock, and then move the entry into place.
+        temp_path = tempfile.mkdtemp(prefix='.tmp-', dir=self.path)
+        try:
+            shutil.copytree(
+                source_dir,
+                os.path.join(temp_path, SOURCE_DIR),
+                symlinks=True,
+                ignore=shutil.ignore_patterns('.git'))
+            size = _get_size(temp_path)
+            if size > self.max_size:
+                LOG.info(
+                    'Not caching source %s, its size %s exceeds the cache '
+                    'size %s', key, size, self.max_size)
+                return
+            with open(os.path.join(temp_path, SIZE_FILE), 'w') as f:
+                f.write(str(size))
+
+            with self._lock():
+                if os.path.isdir(entry_path):
+                    return
+                os.rename(temp_path, entry_path)
+                self._evict()
+        finally:
+            if os.path.isdir(temp_path):
+                shutil.rmtree(temp_path, ignore_errors=True)
+
+    def _get_validator_path(self, location):
+        digest = hashlib.sha256(location.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, VALIDATORS_DIR, digest)
+
+    def get_validator(self, location):
+        '''
+        :param str location: Location of a remote source.
+        :returns: The ``etag`` and ``digest`` of the last fetch of
+            ``location``, or ``None`` if unknown.
+        :rtype: dict
+        '''
+        try:
+            with open(self._get_validator_path(location)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put_validator(self, location, etag, digest):
+        '''
+        Records the ``etag`` and content ``digest`` of the latest fetch of
+        ``location``, so it can be conditionally fetched next time.
+        '''
+        if not etag:
+            return
+        path = self._get_validator_path(location)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'etag': etag, 'digest': digest}, f)
+        os.replace(temp_path, path)
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.path):
+            entry_path = os.path.join(self.path, name)
+            if name.startswith('.') or not os.path.isdir(entry_path):
+                continue
+            try:
+                with open(os.path.join(entry_path, SIZE_FILE)) as f:
+                    size = int(f.read())
+            except (OSError, ValueError):
+                size = _get_size(entry_path)
+            entries.append((os.stat(entry_path).st_mtime, size, entry_path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total <= self.max_size:
+                break
+            LOG.info('Evicting cached source %s', entry_path)
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total -= size
+
+
+def _get_size(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if not os.path.islink(file_path):
+                size += os.path.getsize(file_path)
+    return size
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_source_cache():
+    '''
+    :returns: The chart source cache configured by ``chart_cache_dir`` and
+        ``chart_cache_size``, or ``None`` if the cache is disabled.
+    :rtype: SourceCache
+    '''
+    path = CONF.chart_cache_dir
+    if not path:
+        return None
+    max_size = CONF.chart_cache_size * 1024 * 1024
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None or cache.max_size != max_size:
+            cache = _caches[path] = SourceCache(path, max_size)
+        return cache
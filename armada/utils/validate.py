@@ -12,9 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import json
 import traceback
 
 import jsonschema
+from oslo_config import cfg
 import requests
 from oslo_log import log as logging
 
@@ -24,6 +27,7 @@ from armada.handlers.manifest import Manifest
 from armada.exceptions.manifest_exceptions import ManifestException
 from armada.utils.validation_message import ValidationMessage
 
+CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
 
@@ -60,20 +64,31 @@ def _validate_armada_manifest(manifest):
     return True, details
 
 
-def validate_armada_manifests(documents):
+def validate_armada_manifests(documents, changed=None):
     """Validate each Armada manifest found in the document set.
 
     :param documents: List of Armada documents to validate
     :type documents: :func: `list[dict]`.
+    :param changed: Documents changed since the manifests were last
+        validated, in which case only the manifests built out of them are
+        validated again. All manifests are validated by default.
+    :type changed: :func:`list[dict]`.
     """
     messages = []
     all_valid = True
 
+    if changed is not None:
+        changed = {sch.get_document_key(document) for document in changed}
+        index = sch.DocumentIndex(documents)
+
     for document in documents:
         doc_schema = document.get('schema')
         if doc_schema:
             schema_info = sch.get_schema_info(doc_schema)
             if schema_info and schema_info.type == sch.TYPE_MANIFEST:
+                if changed is not None and changed.isdisjoint(
+                        _get_manifest_document_keys(index, document)):
+                    continue
                 target = document.get('metadata').get('name')
                 # TODO(MarshM) explore: why does this pass 'documents'?
                 manifest = Manifest(documents, target_manifest=target)
@@ -84,6 +99,28 @@ def validate_armada_manifests(documents):
     return all_valid, messages
 
 
+def _get_manifest_document_keys(index, manifest):
+    """Returns the type and name of the documents which ``manifest`` is built
+    out of, following its chart groups, their charts, and their dependencies.
+    """
+    keys = {sch.get_document_key(manifest)}
+    pending = [
+        (sch.TYPE_CHARTGROUP, name) for name in manifest.get(
+            const.KEYWORD_DATA, {}).get(const.KEYWORD_GROUPS, [])
+    ]
+    while pending:
+        key = pending.pop()
+        if key in keys:
+            continue
+        keys.add(key)
+        data = (index.get(*key) or {}).get(const.KEYWORD_DATA, {})
+        names = data.get(
+            const.KEYWORD_CHARTS
+            if key[0] == sch.TYPE_CHARTGROUP else 'dependencies', [])
+        pending.extend((sch.TYPE_CHART, name) for name in names)
+    return keys
+
+
 def validate_armada_document(document):
     """Validates a document ingested by Armada by subjecting it to JSON schema
     validation.
@@ -110,8 +147,7 @@ def validate_armada_document(document):
     schema_info = sch.get_schema_info(schema)
     if schema_info:
         try:
-            validator = jsonschema.Draft4Validator(schema_info.data)
-            for error in validator.iter_errors(document.get('data')):
+            for error in _iter_errors(schema_info, document.get('data')):
                 error_message = "Invalid document [%s] %s: %s." % \
                     (schema, document_name, error.message)
                 vmsg = ValidationMessage(
@@ -142,11 +178,32 @@ def validate_armada_document(document):
     return True, details
 
 
-def validate_armada_documents(documents):
+def _iter_errors(schema_info, data):
+    if CONF.schema_validator == 'fastjsonschema':
+        fast_validator = schema_info.get_fast_validator()
+        if fast_validator is not None:
+            try:
+                fast_validator(data)
+                return
+            except sch.fastjsonschema.JsonSchemaValueException:
+                # Only the first error is known, so fall back to jsonschema
+                # to report all of them.
+                pass
+    yield from schema_info.validator.iter_errors(data)
+
+
+def validate_armada_documents(documents, changed=None, cache=None):
     """Validates multiple Armada documents.
 
     :param documents: List of Armada manifests to validate.
     :type documents: :func:`list[dict]`.
+    :param changed: Documents of ``documents`` changed since they were last
+        validated, which are then the only documents validated again, along
+        with the manifests built out of them. All documents are validated by
+        default.
+    :type changed: :func:`list[dict]`.
+    :param dict cache: Validation results of documents by content hash,
+        which are reused rather than validating the same content again.
 
     :returns: A tuple of bool, list[dict] where the first value is whether
         the full set of documents is valid or not and the second is the
@@ -157,13 +214,13 @@ def validate_armada_documents(documents):
     # Track if all the documents in the set are valid
     all_valid = True
 
-    for document in documents:
-        is_valid, details = validate_armada_document(document)
+    for document in documents if changed is None else changed:
+        is_valid, details = _validate_armada_document_cached(document, cache)
         all_valid = all_valid and is_valid
         messages.extend(details)
 
     if all_valid:
-        valid, details = validate_armada_manifests(documents)
+        valid, details = validate_armada_manifests(documents, changed)
         all_valid = all_valid and valid
         messages.extend(details)
         for msg in messages:
@@ -175,6 +232,21 @@ def validate_armada_documents(documents):
     return all_valid, messages
 
 
+def _validate_armada_document_cached(document, cache):
+    if cache is None:
+        return validate_armada_document(document)
+    try:
+        key = hashlib.sha256(
+            json.dumps(document, sort_keys=True,
+                       default=str).encode()).hexdigest()
+    except (TypeError, ValueError):
+        # Not serializable, e.g. with keys of different types.
+        return validate_armada_document(document)
+    if key not in cache:
+        cache[key] = validate_armada_document(document)
+    return cache[key]
+
+
 def validate_manifest_url(value):
     try:
         return (requests.get(value, timeout=None).status_code == 200)
@@ -0,0 +1,56 @@
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Safe loading and dumping of YAML documents, using the libyaml bindings of
+PyYAML when they are available, which are much faster than its pure Python
+implementation.
+"""
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper
+    from yaml import SafeLoader
+
+
+def load(stream):
+    """Parses the single document of a YAML stream.
+
+    :param stream: YAML string, bytes, or file opened for reading.
+    """
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def load_all(stream):
+    """Parses the documents of a YAML stream one at a time, as they are
+    iterated, so that errors are raised while iterating.
+
+    :param stream: YAML string, bytes, or file opened for reading.
+    :returns: Iterator of the documents.
+    """
+    return yaml.load_all(stream, Loader=SafeLoader)
+
+
+def dump(data, stream=None, **kwargs):
+    """Serializes ``data`` to ``stream``, or to a string if it is None."""
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
+
+
+def dump_all(documents, stream=None, **kwargs):
+    """Serializes ``documents`` to ``stream``, or to a string if it is None.
+    """
+    return yaml.dump_all(documents, stream, Dumper=SafeDumper, **kwargs)
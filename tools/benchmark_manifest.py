@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the time and peak memory allocated to build and validate a
+manifest out of a generated document set, compared to a deep copy of the
+documents, which building a manifest used to make.
+
+Usage: tools/benchmark_manifest.py [CHARTS] [VALUES_KEYS]
+"""
+
+import copy
+import sys
+import time
+import tracemalloc
+
+from armada import conf
+from armada.handlers.manifest import Manifest
+from armada.utils import validate
+
+
+def get_documents(charts, values_keys):
+    documents = [{
+        'schema': 'armada/Chart/v1',
+        'metadata': {
+            'schema': 'metadata/Document/v1',
+            'name': 'chart-{}'.format(i)
+        },
+        'data': {
+            'chart_name': 'chart-{}'.format(i),
+            'release': 'chart-{}'.format(i),
+            'namespace': 'benchmark',
+            'values': {
+                'key-{}'.format(k): {
+                    'value': 'value-{}'.format(k)
+                }
+                for k in range(values_keys)
+            },
+            'source': {
+                'type': 'local',
+                'location': '/tmp/chart',
+                'subpath': '.'
+            },
+            'dependencies': []
+        }
+    } for i in range(charts)]
+    documents.append({
+        'schema': 'armada/ChartGroup/v1',
+        'metadata': {
+            'schema': 'metadata/Document/v1',
+            'name': 'group'
+        },
+        'data': {
+            'chart_group': [d['metadata']['name'] for d in documents]
+        }
+    })
+    documents.append({
+        'schema': 'armada/Manifest/v1',
+        'metadata': {
+            'schema': 'metadata/Document/v1',
+            'name': 'manifest'
+        },
+        'data': {
+            'release_prefix': 'benchmark',
+            'chart_groups': ['group']
+        }
+    })
+    return documents
+
+
+def measure(name, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('{:<24} {:>8.3f}s {:>10.1f} MiB'.format(name, elapsed, peak / 2**20))
+    return result
+
+
+def main(charts=1000, values_keys=200):
+    conf.set_app_default_configs()
+    documents = get_documents(charts, values_keys)
+    print('{} charts with {} values keys'.format(charts, values_keys))
+    measure('deepcopy (reference)', lambda: copy.deepcopy(documents))
+    measure('build manifest', lambda: Manifest(documents).get_manifest())
+    measure('validate manifests',
+            lambda: validate.validate_armada_manifests(documents))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
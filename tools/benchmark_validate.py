@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the time to validate a generated document set with each of the
+``schema_validator`` options, along with the time fastjsonschema takes to
+generate and compile the validators on first use.
+
+Usage: PYTHONPATH=. tools/benchmark_validate.py [CHARTS] [VALUES_KEYS]
+"""
+
+import sys
+import time
+
+from oslo_config import cfg
+
+from armada import conf
+from armada.handlers import schema
+from armada.utils import validate
+
+CONF = cfg.CONF
+
+
+def get_documents(charts, values_keys):
+    documents = [{
+        'schema': 'armada/Chart/v2',
+        'metadata': {
+            'schema': 'metadata/Document/v1',
+            'name': 'chart-{}'.format(i)
+        },
+        'data': {
+            'release': 'chart-{}'.format(i),
+            'namespace': 'benchmark',
+            'wait': {
+                'timeout': 100,
+                'labels': {
+                    'release_group': 'chart-{}'.format(i)
+                },
+                'resources': {
+                    'job': False
+                }
+            },
+            'values': {
+                'key-{}'.format(k): {
+                    'value': 'value-{}'.format(k)
+                }
+                for k in range(values_keys)
+            },
+            'source': {
+                'type': 'local',
+                'location': '/tmp/chart',
+                'subpath': '.'
+            }
+        }
+    } for i in range(charts)]
+    documents.append({
+        'schema': 'armada/ChartGroup/v2',
+        'metadata': {
+            'schema': 'metadata/Document/v1',
+            'name': 'group'
+        },
+        'data': {
+            'chart_group': [d['metadata']['name'] for d in documents]
+        }
+    })
+    documents.append({
+        'schema': 'armada/Manifest/v2',
+        'metadata': {
+            'schema': 'metadata/Document/v1',
+            'name': 'manifest'
+        },
+        'data': {
+            'release_prefix': 'benchmark',
+            'chart_groups': ['group']
+        }
+    })
+    return documents
+
+
+def measure(name, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print('{:<32} {:>8.3f}s'.format(name, elapsed))
+    return result
+
+
+def main(charts=1000, values_keys=20):
+    conf.set_app_default_configs()
+    documents = get_documents(charts, values_keys)
+    print('{} charts with {} values keys'.format(charts, values_keys))
+    for validator in ('jsonschema', 'fastjsonschema'):
+        CONF.set_override('schema_validator', validator)
+        if validator == 'fastjsonschema':
+            if schema.fastjsonschema is None:
+                print('fastjsonschema is not installed')
+                break
+            measure(
+                'fastjsonschema compile', lambda:
+                [s.get_fast_validator() for s in schema._SCHEMAS.values()])
+        valid, _ = measure(
+            validator, lambda: validate.validate_armada_documents(documents))
+        assert valid
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+# Copyright 2026 The Armada Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compares the time to load and dump YAML document bundles with:
+
+* the pure Python implementation of PyYAML,
+* ``yaml.safe_load_all`` and ``yaml.safe_dump_all`` with PyYAML patched by
+  pylibyaml, which Armada used to import, if it is installed,
+* armada.utils.yaml, which uses the libyaml bindings when available.
+
+Usage: PYTHONPATH=. tools/benchmark_yaml.py [BUNDLE...]
+
+Bundles default to the examples; site bundles give more realistic figures.
+"""
+
+import glob
+import os
+import sys
+import time
+
+import yaml
+from yaml.dumper import SafeDumper
+from yaml.loader import SafeLoader
+
+from armada.utils import yaml as yaml_utils
+
+try:
+    import pylibyaml
+except ImportError:
+    pylibyaml = None
+
+REPEAT = 5
+
+
+def measure(name, func):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    elapsed = (time.perf_counter() - start) / REPEAT
+    print('{:<32} {:>10.1f} ms'.format(name, elapsed * 1000))
+    return elapsed
+
+
+def benchmark(path):
+    with open(path, 'rb') as f:
+        content = f.read()
+    documents = list(yaml_utils.load_all(content))
+    print('{}: {} documents, {} KiB'.format(path, len(documents),
+                                            len(content) // 1024))
+    if not yaml.__with_libyaml__:
+        print('libyaml is not available.')
+
+    measure('load pure Python',
+            lambda: list(yaml.load_all(content, Loader=SafeLoader)))  # nosec
+    measure('dump pure Python',
+            lambda: yaml.dump_all(documents, Dumper=SafeDumper))
+
+    if pylibyaml is not None:
+        pylibyaml.monkey_patch_pyyaml(force=True)
+        try:
+            measure('load pylibyaml safe_load_all',
+                    lambda: list(yaml.safe_load_all(content)))
+            measure('dump pylibyaml safe_dump_all',
+                    lambda: yaml.safe_dump_all(documents))
+        finally:
+            pylibyaml.restore_original_pyyaml()
+    else:
+        print('pylibyaml is not installed.')
+
+    measure('load armada.utils.yaml',
+            lambda: list(yaml_utils.load_all(content)))
+    measure('dump armada.utils.yaml', lambda: yaml_utils.dump_all(documents))
+
+
+def main(paths):
+    if not paths:
+        examples = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'examples')
+        paths = sorted(glob.glob(os.path.join(examples, '*.yaml')))
+    for path in paths:
+        benchmark(path)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])